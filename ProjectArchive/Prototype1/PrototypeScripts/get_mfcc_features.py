@@ -2,6 +2,11 @@ import numpy as np
 import librosa
 import pandas as pd
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "Prototype2" / "Scripts"))
+from audio_loader import load_audio  # noqa: E402
 
 meta = pd.read_csv("/Users/cianan/Documents/GitHub/FYP/Prototype1/data/metadata.csv")
 audio_folder = "/Users/cianan/Documents/GitHub/FYP/Prototype1/data/audio/"
@@ -9,7 +14,7 @@ features = []
 
 for i, row in meta.iterrows():
     path = os.path.join(audio_folder, row['filename'])
-    y, sr = librosa.load(path, sr=16000)
+    y, sr = load_audio(path, sr=16000)
     mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
     mfcc_mean = np.mean(mfcc, axis=1)
     features.append(mfcc_mean)
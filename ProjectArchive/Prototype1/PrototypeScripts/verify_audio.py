@@ -1,11 +1,15 @@
-import librosa
 import pandas as pd
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "Prototype2" / "Scripts"))
+from audio_loader import load_audio  # noqa: E402
 
 meta = pd.read_csv("/Users/cianan/Documents/GitHub/FYP/Prototype1/data/metadata.csv")
 audio_folder = "/Users/cianan/Documents/GitHub/FYP/Prototype1/data/audio/"
 
 for i, row in meta.iterrows():
     path = os.path.join(audio_folder, row['filename'])
-    y, sr = librosa.load(path, sr=None, mono=True)
+    y, sr = load_audio(path, sr=None)
     print(f"{row['filename']}: {sr} Hz, length {len(y)/sr:.2f}s")
@@ -1,71 +1,390 @@
+import argparse
+import csv
 import os
+import random
+import shutil
 import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# valid_times parsing and the NI metadata sheet live with the NI trimming script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Prototype2" / "NorthernIreland" / "ni_scripts"))
+import trim_ni_segments  # noqa: E402
+from trim_ni_segments import merge_ranges, parse_valid_times  # noqa: E402
 
 # -----------------------------
 # Configuration
 # -----------------------------
 URLS_FILE = "/Users/cianan/Documents/GitHub/FYP/Prototype/data/yt-data/playlistsurls2.txt"
 OUTPUT_DIR = Path("/Users/cianan/Documents/GitHub/FYP/Prototype/data/yt-data/playlists2")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# --metadata mode downloads into its own directory, so the leftover sweep only
+# ever normalizes NI sections into ni_audio_16k_mono, never playlist files
+METADATA_OUTPUT_DIR = Path(trim_ni_segments.AUDIO_DIR).parent / "ni_audio_sections"
 
 # ffmpeg normalization options
 TARGET_SR = 16000   # sampling rate
 TARGET_CHANNELS = 1 # mono
 
-def download_audio(url: str):
-    """Download YouTube audio and convert to mono 16 kHz WAV."""
-    try:
-        print(f"\n🎧 Downloading: {url}")
-
-        # yt-dlp command
-        command = [
-            "yt-dlp",
-            "-f", "best",
-            "--extract-audio",
-            "--audio-format", "wav",
-            "--audio-quality", "0",
-            "--cookies-from-browser", "firefox", 
-            "--download-sections", "*00:30-01:00",
-            "-o", str(OUTPUT_DIR / "%(id)s_%(title).50s.%(ext)s"),
-            url,
-        ]
-
-        subprocess.run(command, check=True)
-
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed to download {url}: {e}")
+# Executables (overridable so the pipeline can be tested offline with stand-ins)
+YTDLP_BIN = os.environ.get("YTDLP_BIN", "yt-dlp")
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+
+# Video IDs yt-dlp has finished ("youtube <id>" per line); shared by all workers
+ARCHIVE_NAME = "download_archive.txt"
+FAILED_NAME = "failed_urls.txt"
+
+DOWNLOAD_SECTIONS = ["*00:30-01:00"]
+
+# --metadata mode: one file per valid_times range (ranges a few seconds apart are
+# merged by trim_ni_segments.merge_ranges, since another request + seek costs more
+# than the extra audio), named by its start second; whole video when valid_times is blank
+SECTION_TEMPLATE = "%(id)s_%(section_start)d.%(ext)s"
+WHOLE_VIDEO_TEMPLATE = "%(id)s.%(ext)s"
+
+# Concurrency: parallel yt-dlp processes / parallel ffmpeg normalizations
+DOWNLOAD_WORKERS = 4
+NORMALIZE_WORKERS = 4
+
+# Retries per URL with exponential backoff (BACKOFF_SECONDS * 2**attempt, plus jitter)
+RETRIES = 3
+BACKOFF_SECONDS = 5.0
+
+
+def extract_video_id(url: str) -> str:
+    """Video ID of a single-video URL, or "" (playlists, unknown formats)."""
+    parsed = urlparse((url or "").strip())
+    qs = parse_qs(parsed.query)
+    if "v" in qs and qs["v"]:
+        return qs["v"][0].strip()
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "shorts":
+        return parts[1].strip()
+    if "youtu.be" in parsed.netloc and parts and parts[0]:
+        return parts[0].strip()
+    return ""
+
+
+def load_archive(archive_path: Path) -> set[str]:
+    if not archive_path.exists():
+        return set()
+    with open(archive_path, encoding="utf-8") as f:
+        return {line.split()[-1] for line in f if line.strip()}
+
+
+def section_arg(start: int, end: int) -> str:
+    """yt-dlp --download-sections value for a time range in seconds, e.g. "*00:01:33-00:02:00"."""
+    def hms(sec):
+        return f"{sec // 3600:02d}:{sec % 3600 // 60:02d}:{sec % 60:02d}"
+    return f"*{hms(start)}-{hms(end)}"
+
+
+def metadata_rows(csv_path: str) -> list[tuple[str, str, dict, list[tuple[int, int]]]]:
+    """
+    (url, video_id, row, valid_times ranges) per video in the NI metadata
+    sheet, parsed with the same parse_valid_times() rules trim_ni_segments
+    uses. The first row of a repeated video wins (as in trimming); rows with
+    unparseable valid_times are reported and skipped.
+    """
+    rows = []
+    seen = set()
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            url = (row.get(trim_ni_segments.URL_COL) or "").strip()
+            video_id = extract_video_id(url)
+            if not video_id or video_id in seen:
+                continue
+            seen.add(video_id)
+
+            try:
+                ranges = parse_valid_times(row.get(trim_ni_segments.TIMES_COL, ""))
+            except ValueError as e:
+                print(f"⚠️  Skipping {video_id}: bad valid_times ({e})")
+                continue
+            rows.append((url, video_id, row, ranges))
+    return rows
+
+
+def jobs_from_metadata(csv_path: str) -> list[tuple[str, list[str]]]:
+    """
+    (url, download sections) per video in the NI metadata sheet. Blank
+    valid_times means the whole video is used, so no sections are passed.
+    """
+    return [
+        (url, [section_arg(s, e) for s, e in merge_ranges(ranges)])
+        for url, _, _, ranges in metadata_rows(csv_path)
+    ]
+
+
+def run_ytdlp(command: list[str], url: str, retries: int = RETRIES, backoff: float = BACKOFF_SECONDS) -> str:
+    """
+    Run yt-dlp, retrying failures with exponential backoff; returns stdout.
+    Raises CalledProcessError once the retries are used up.
+    """
+    for attempt in range(retries + 1):
+        print(f"\n🎧 Downloading: {url}" + (f" (retry {attempt})" if attempt else ""))
+        result = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+        if result.returncode == 0:
+            return result.stdout
+        if attempt == retries:
+            raise subprocess.CalledProcessError(result.returncode, command)
+
+        delay = backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+        print(f"⚠️  {url} failed (exit {result.returncode}); retrying in {delay:.1f}s")
+        time.sleep(delay)
+    return ""
+
+
+def download_audio(url: str, output_dir: Path = OUTPUT_DIR, sections=DOWNLOAD_SECTIONS,
+                   retries: int = RETRIES, backoff: float = BACKOFF_SECONDS,
+                   template: str = "%(id)s_%(title).50s.%(ext)s") -> list[Path]:
+    """
+    Download YouTube audio (a video or a playlist) as WAV, only the given
+    --download-sections ranges if any (one file per section). Sections take
+    the audio-only stream and are cut with --force-keyframes-at-cuts, so each
+    file starts exactly at its section start (trim_ni_segments offsets into
+    section files from that start); a stream copy of a muxed format would
+    begin at the previous video keyframe, seconds early.
+    yt-dlp skips videos already in the download archive. Retries failed runs
+    with exponential backoff. Returns the WAV files written by this call.
+    Raises CalledProcessError once the retries are used up.
+    """
+    command = [
+        YTDLP_BIN,
+        "-f", "bestaudio/best" if sections else "best",
+        "--extract-audio",
+        "--audio-format", "wav",
+        "--audio-quality", "0",
+        "--cookies-from-browser", "firefox",
+        "--download-archive", str(output_dir / ARCHIVE_NAME),
+        "--print", "after_move:filepath",
+        "-o", str(output_dir / template),
+    ]
+    for section in sections:
+        command += ["--download-sections", section]
+    if sections:
+        command.append("--force-keyframes-at-cuts")
+    command.append(url)
+
+    stdout = run_ytdlp(command, url, retries, backoff)
+    files = [Path(line.strip()) for line in stdout.splitlines() if line.strip()]
+    return [f for f in files if f.suffix.lower() == ".wav" and f.exists()]
+
+
+def media_url(url: str, retries: int = RETRIES, backoff: float = BACKOFF_SECONDS) -> str:
+    """Direct URL of a video's best audio stream (ffmpeg reads and seeks it over HTTP)."""
+    command = [
+        YTDLP_BIN,
+        "-g",
+        "-f", "bestaudio",
+        "--cookies-from-browser", "firefox",
+        url,
+    ]
+    return run_ytdlp(command, url, retries, backoff).splitlines()[0].strip()
+
+
+def normalize_file(wav_file: Path, processed_dir: Path) -> Path | None:
+    """
+    Convert one WAV to mono 16 kHz in processed_dir. Skips files whose
+    output is already newer than the source. Writes to <name>.wav.part first
+    so an interrupted run never leaves a half-written output that looks
+    finished, and a watcher on processed_dir (ingest_daemon.py) never sees
+    the temp file as audio.
+    """
+    out_path = processed_dir / wav_file.name
+    if out_path.exists() and out_path.stat().st_mtime >= wav_file.stat().st_mtime:
         return None
 
-def normalize_audio():
-    """Convert all WAV files to mono, 16 kHz using ffmpeg."""
-    processed_dir = OUTPUT_DIR / "processed"
-    processed_dir.mkdir(exist_ok=True)
-
-    for wav_file in OUTPUT_DIR.glob("*.wav"):
-        out_path = processed_dir / wav_file.name
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", str(wav_file),
-            "-ac", str(TARGET_CHANNELS),
-            "-ar", str(TARGET_SR),
-            str(out_path)
-        ]
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        print(f"✅ Normalized {wav_file.name}")
+    tmp_path = out_path.with_name(out_path.name + ".part")
+    cmd = [
+        FFMPEG_BIN, "-y",
+        "-i", str(wav_file),
+        "-ac", str(TARGET_CHANNELS),
+        "-ar", str(TARGET_SR),
+        "-f", "wav",
+        str(tmp_path)
+    ]
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    os.replace(tmp_path, out_path)
+    print(f"✅ Normalized {wav_file.name}")
+    return out_path
+
+
+def normalize_audio(output_dir: Path = OUTPUT_DIR, workers: int = NORMALIZE_WORKERS,
+                    processed_dir: Path | None = None) -> int:
+    """Normalize every WAV in output_dir not already done (e.g. after an interrupted run)."""
+    processed_dir = processed_dir or output_dir / "processed"
+    processed_dir.mkdir(parents=True, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda f: normalize_file(f, processed_dir), sorted(output_dir.glob("*.wav"))))
+    return sum(1 for r in results if r is not None)
+
+
+def run_downloads(jobs: list[tuple[str, list[str]]], output_dir: Path = OUTPUT_DIR,
+                  processed_dir: Path | None = None, download_workers: int = DOWNLOAD_WORKERS,
+                  normalize_workers: int = NORMALIZE_WORKERS, retries: int = RETRIES,
+                  backoff: float = BACKOFF_SECONDS) -> dict[str, int]:
+    """
+    Download (url, sections) jobs with bounded concurrency and normalize each
+    file into processed_dir (default output_dir/processed) as soon as its
+    download finishes. Single-video URLs already in the archive are skipped
+    without starting yt-dlp. URLs that still fail after retries are written
+    to failed_urls.txt, so a rerun only redoes what is missing.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    processed_dir = processed_dir or output_dir / "processed"
+    processed_dir.mkdir(parents=True, exist_ok=True)
+
+    done_ids = load_archive(output_dir / ARCHIVE_NAME)
+    todo = [(u, sec) for u, sec in jobs if not extract_video_id(u) or extract_video_id(u) not in done_ids]
+    skipped = len(jobs) - len(todo)
+
+    failed: list[str] = []
+    normalize_futures = []
+
+    with ThreadPoolExecutor(max_workers=normalize_workers) as normalize_pool, \
+         ThreadPoolExecutor(max_workers=download_workers) as download_pool:
+
+        futures = {}
+        for url, sections in todo:
+            # Playlists (URLs files) keep titles in names; metadata videos are named for trimming
+            if not sections:
+                template = WHOLE_VIDEO_TEMPLATE
+            elif sections == DOWNLOAD_SECTIONS:
+                template = "%(id)s_%(title).50s.%(ext)s"
+            else:
+                template = SECTION_TEMPLATE
+            futures[download_pool.submit(download_audio, url, output_dir, sections, retries, backoff, template)] = url
+
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                files = future.result()
+            except subprocess.CalledProcessError as e:
+                print(f"❌ Failed to download {url}: {e}")
+                failed.append(url)
+                continue
+            for wav_file in files:
+                normalize_futures.append(normalize_pool.submit(normalize_file, wav_file, processed_dir))
+
+        normalized = 0
+        for future in normalize_futures:
+            try:
+                normalized += future.result() is not None
+            except subprocess.CalledProcessError as e:
+                print(f"❌ Failed to normalize: {e}")
+
+    # Files downloaded by an earlier run that never got normalized
+    normalized += normalize_audio(output_dir, normalize_workers, processed_dir)
+
+    with open(output_dir / FAILED_NAME, "w", encoding="utf-8") as f:
+        f.writelines(u + "\n" for u in failed)
+
+    return {
+        "urls": len(jobs),
+        "skipped": skipped,
+        "failed": len(failed),
+        "normalized": normalized,
+    }
+
+
+def stream_segments(rows, workers: int = DOWNLOAD_WORKERS, retries: int = RETRIES,
+                    backoff: float = BACKOFF_SECONDS) -> dict[str, int]:
+    """
+    --stream mode: for each metadata row, fetch only its valid_times ranges
+    straight from the audio stream and cut them into the final segments
+    (trim_ni_segments.stream_video). Audio is decoded and resampled once
+    and never written whole, normalized or per section. Reruns skip
+    sections whose segments all exist.
+    """
+    os.makedirs(trim_ni_segments.OUT_DIR, exist_ok=True)
+    trim_ni_segments.ensure_log(overwrite=False)
+
+    def one(url, video_id, row):
+        try:
+            return trim_ni_segments.stream_video(row, video_id, media_url(url, retries, backoff))
+        except Exception as e:
+            trim_ni_segments.log(video_id, "", "", "", "", "fail", str(e))
+            raise
+
+    failed = 0
+    segments = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(one, url, video_id, row): url for url, video_id, row, _ in rows}
+        for future in as_completed(futures):
+            try:
+                written = future.result()
+            except Exception as e:
+                print(f"❌ Failed to stream {futures[future]}: {e}")
+                failed += 1
+                continue
+            segments += len(written)
+            print(f"✅ {futures[future]}: {len(written)} segments")
+
+    return {"videos": len(rows), "failed": failed, "segments": segments}
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Download YouTube audio and normalize it to mono 16 kHz WAV.")
+    ap.add_argument("--urls", default=URLS_FILE)
+    ap.add_argument("--metadata", nargs="?", const=trim_ni_segments.INPUT_CSV,
+                    help="Download only the valid_times ranges of the videos in this sheet "
+                         "(default: the NI dataset) instead of the URLs file")
+    ap.add_argument("--stream", action="store_true",
+                    help="With --metadata: cut segments straight from the audio stream "
+                         "(no WAV download or normalized copy)")
+    ap.add_argument("--out", type=Path,
+                    help=f"Download directory (default: {OUTPUT_DIR}, or {METADATA_OUTPUT_DIR} with --metadata)")
+    ap.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS)
+    ap.add_argument("--normalize-workers", type=int, default=NORMALIZE_WORKERS)
+    ap.add_argument("--retries", type=int, default=RETRIES)
+    return ap.parse_args()
+
 
 def main():
-    with open(URLS_FILE, "r") as f:
-        urls = [line.strip() for line in f if line.strip()]
+    args = parse_args()
+    if shutil.which(YTDLP_BIN) is None:
+        raise SystemExit(f"{YTDLP_BIN} not found on PATH")
+
+    if args.stream:
+        rows = metadata_rows(args.metadata or trim_ni_segments.INPUT_CSV)
+        print(f"📋 Streaming {len(rows)} videos into {trim_ni_segments.OUT_DIR}")
+        stats = stream_segments(rows, args.download_workers, args.retries)
+        print(f"\n🔪 Wrote {stats['segments']} segments; {stats['failed']} videos failed "
+              f"(see {trim_ni_segments.LOG_FILE})")
+        return
 
-    print(f"📋 Found {len(urls)} URLs in {URLS_FILE}")
+    if args.metadata:
+        jobs = jobs_from_metadata(args.metadata)
+        output_dir = args.out or METADATA_OUTPUT_DIR
+        processed_dir = Path(trim_ni_segments.AUDIO_DIR)
+        n_sections = sum(len(sections) for _, sections in jobs)
+        print(f"📋 Found {len(jobs)} videos ({n_sections} sections) in {args.metadata}")
+    else:
+        with open(args.urls, "r") as f:
+            jobs = [(line.strip(), DOWNLOAD_SECTIONS) for line in f if line.strip()]
+        output_dir = args.out or OUTPUT_DIR
+        processed_dir = None
+        print(f"📋 Found {len(jobs)} URLs in {args.urls}")
 
-    for url in urls:
-        download_audio(url)
+    stats = run_downloads(
+        jobs,
+        output_dir,
+        processed_dir,
+        download_workers=args.download_workers,
+        normalize_workers=args.normalize_workers,
+        retries=args.retries,
+    )
 
-    print("\n🔄 Normalizing all audio...")
-    normalize_audio()
-    print("\n🎉 All done! Files saved in Prototype/data/yt-data")
+    print(f"\n⏭️  Skipped {stats['skipped']} already-archived URLs")
+    print(f"🔄 Normalized {stats['normalized']} files")
+    if stats["failed"]:
+        print(f"❌ {stats['failed']} URLs failed; see {output_dir / FAILED_NAME}")
+    print(f"\n🎉 All done! Files saved in {args.out}")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,9 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+import argparse
 import csv
+import os
 import unicodedata
 import re
 
@@ -9,6 +13,18 @@ AUDIO_DIR = Path("/Users/cianan/Documents/GitHub/FYP/Prototype2/data/audio")
 OUTPUT_CSV = "dail_speakers.csv"
 FAILED_CSV = "dail_speakers_failed.csv"
 
+# Per-file parse results keyed by filename + mtime, so reruns only parse new/changed files
+STATE_CSV = "dail_speakers_state.csv"
+
+CATALOG_FIELDS = ["filename", "speaker_raw", "speaker_key"]
+FAILED_FIELDS = ["filename", "reason"]
+STATE_FIELDS = ["filename", "mtime_ns", "speaker_raw", "speaker_key", "reason"]
+
+FAILED_REASON = "Could not confidently extract speaker (underscore/dash pattern mismatch)"
+
+# Batches smaller than this are parsed in-process (a pool costs more than it saves)
+PARALLEL_MIN_FILES = 2000
+
 # Match a dash/en-dash/em-dash separator after a speaker name, with optional spaces.
 # Handles: " - ", "-", "--", " – ", "—", etc.
 AFTER_NAME_DASH_RE = re.compile(r"\s*[-–—]{1,2}\s*")
@@ -24,21 +40,26 @@ def fix_mojibake(s: str) -> str:
     Fix common UTF-8 text that was decoded as Latin-1 (e.g., Br√≠d -> Bríd).
     If it doesn't look like mojibake, this safely returns the original string.
     """
-    try:
-        repaired = s.encode("latin1").decode("utf-8")
-        # Only accept the repair if it actually changes something and reduces mojibake markers.
-        # This is conservative, but prevents unwanted transformations.
-        if repaired != s and ("√" in s or "‚Ä" in s or "Â" in s):
-            return repaired
-        return s
-    except Exception:
+    # Only accept a repair if it actually changes something and the input has mojibake markers.
+    # This is conservative, but prevents unwanted transformations.
+    if not ("√" in s or "‚Ä" in s or "Â" in s or "Ã" in s):
         return s
+    # '√' / '‚Ä' come from Mac Roman decoding, 'Ã' / 'Â' from Latin-1
+    for codec in ("latin1", "mac_roman"):
+        try:
+            repaired = s.encode(codec).decode("utf-8")
+        except UnicodeError:
+            continue
+        if repaired != s:
+            return repaired
+    return s
 
 def strip_diacritics(s: str) -> str:
     s = unicodedata.normalize("NFD", s)
     s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
     return unicodedata.normalize("NFC", s)
 
+@lru_cache(maxsize=None)
 def normalise_key(name: str) -> str:
     """
     Normalise for matching:
@@ -49,6 +70,7 @@ def normalise_key(name: str) -> str:
       - unify apostrophes
       - collapse whitespace
       - remove leading titles like 'Deputy'/'Senator' (optional; enabled)
+    Memoized: the same few hundred names recur across thousands of clips.
     """
     n = to_nfc(name).strip()
     n = fix_mojibake(n)
@@ -103,54 +125,144 @@ def extract_speaker_raw(filename: str) -> str | None:
 
     return None
 
-def main() -> None:
-    if not AUDIO_DIR.exists():
-        raise FileNotFoundError(f"Directory does not exist: {AUDIO_DIR}")
-    if not AUDIO_DIR.is_dir():
-        raise NotADirectoryError(f"Not a directory: {AUDIO_DIR}")
+def parse_filename(filename: str) -> dict[str, str]:
+    """
+    Catalog row for one audio filename:
+      filename, speaker_raw, speaker_key, reason (blank unless parsing failed)
+    """
+    speaker_raw = extract_speaker_raw(filename)
 
-    rows: list[dict[str, str]] = []
-    failed: list[dict[str, str]] = []
+    if speaker_raw is None:
+        return {
+            "filename": filename,
+            "speaker_raw": "UNKNOWN",
+            "speaker_key": "unknown",
+            "reason": FAILED_REASON,
+        }
 
-    for p in AUDIO_DIR.iterdir():
-        if not p.is_file() or p.suffix.lower() != ".wav":
-            continue
+    speaker_raw = to_nfc(fix_mojibake(speaker_raw))
+    return {
+        "filename": filename,
+        "speaker_raw": speaker_raw,
+        "speaker_key": normalise_key(speaker_raw),
+        "reason": "",
+    }
 
-        speaker_raw = extract_speaker_raw(p.name)
-
-        if speaker_raw is None:
-            failed.append({
-                "filename": p.name,
-                "reason": "Could not confidently extract speaker (underscore/dash pattern mismatch)"
-            })
-            rows.append({
-                "filename": p.name,
-                "speaker_raw": "UNKNOWN",
-                "speaker_key": "unknown"
-            })
-            continue
+def parse_filenames(filenames: list[str], workers: int = 0) -> list[dict[str, str]]:
+    """
+    parse_filename() over a batch, in a process pool once the batch is big
+    enough to pay for starting one. Results keep the input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(filenames) < PARALLEL_MIN_FILES:
+        return [parse_filename(name) for name in filenames]
 
-        speaker_raw = to_nfc(fix_mojibake(speaker_raw))
-        speaker_key = normalise_key(speaker_raw)
+    chunksize = max(1, len(filenames) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_filename, filenames, chunksize=chunksize))
 
-        rows.append({
-            "filename": p.name,
-            "speaker_raw": speaker_raw,
-            "speaker_key": speaker_key
-        })
+def scan_audio_dir(audio_dir: Path) -> dict[str, int]:
+    """filename -> mtime_ns for every .wav file directly in audio_dir."""
+    found: dict[str, int] = {}
+    with os.scandir(audio_dir) as it:
+        for entry in it:
+            if entry.name.lower().endswith(".wav") and entry.is_file():
+                found[entry.name] = entry.stat().st_mtime_ns
+    return found
 
-    with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["filename", "speaker_raw", "speaker_key"])
+def load_state(path: Path) -> dict[str, dict[str, str]]:
+    """Previous per-file results (filename -> row incl. mtime_ns); empty if none."""
+    if not path.exists():
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["filename"]: row for row in csv.DictReader(f)}
+
+def write_csv(path: Path, fieldnames: list[str], rows, append: bool = False) -> None:
+    """Append rows, or rewrite the file via a temp file so readers never see half of it."""
+    if append:
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore").writerows(rows)
+        return
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
         writer.writeheader()
         writer.writerows(rows)
+    os.replace(tmp, path)
 
-    with open(FAILED_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["filename", "reason"])
-        writer.writeheader()
-        writer.writerows(failed)
+def update_catalog(
+    audio_dir: Path = AUDIO_DIR,
+    output_csv: Path = Path(OUTPUT_CSV),
+    failed_csv: Path = Path(FAILED_CSV),
+    state_csv: Path = Path(STATE_CSV),
+    workers: int = 0,
+    full: bool = False,
+) -> dict[str, int]:
+    """
+    Bring the speaker catalog up to date with audio_dir.
+
+    Only files that are new, or whose mtime changed, since the last run are
+    parsed; results for unchanged files come from state_csv. When files were
+    only added, their rows are appended to the catalog and failure list;
+    changed or deleted files make both lists get rewritten from the state.
+    full=True ignores the state and reparses everything.
+    """
+    if not audio_dir.exists():
+        raise FileNotFoundError(f"Directory does not exist: {audio_dir}")
+    if not audio_dir.is_dir():
+        raise NotADirectoryError(f"Not a directory: {audio_dir}")
+
+    on_disk = scan_audio_dir(audio_dir)
+    state = {} if full else load_state(state_csv)
+
+    removed = [name for name in state if name not in on_disk]
+    changed = [name for name, mtime in on_disk.items() if name in state and state[name]["mtime_ns"] != str(mtime)]
+    added = sorted(name for name in on_disk if name not in state)
+
+    for name in removed:
+        del state[name]
+
+    parsed = parse_filenames(changed + added, workers)
+    for row in parsed:
+        row["mtime_ns"] = str(on_disk[row["filename"]])
+        state[row["filename"]] = row
+
+    outputs_exist = output_csv.exists() and failed_csv.exists() and state_csv.exists()
+    if not full and not changed and not removed and outputs_exist:
+        # Daily case: new clips only, so append and leave existing rows untouched
+        if parsed:
+            write_csv(output_csv, CATALOG_FIELDS, parsed, append=True)
+            write_csv(failed_csv, FAILED_FIELDS, [r for r in parsed if r["reason"]], append=True)
+            write_csv(state_csv, STATE_FIELDS, parsed, append=True)
+    else:
+        rows = list(state.values())
+        write_csv(output_csv, CATALOG_FIELDS, rows)
+        write_csv(failed_csv, FAILED_FIELDS, [r for r in rows if r["reason"]])
+        write_csv(state_csv, STATE_FIELDS, rows)
+
+    return {
+        "files": len(state),
+        "added": len(added),
+        "changed": len(changed),
+        "removed": len(removed),
+        "failed": sum(1 for r in state.values() if r["reason"]),
+    }
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Build/update the speaker catalog of DÁIL audio filenames.")
+    ap.add_argument("--audio-dir", type=Path, default=AUDIO_DIR)
+    ap.add_argument("--full", action="store_true", help="Ignore saved state and reparse every file")
+    ap.add_argument("--workers", type=int, default=0, help="Parser processes for large batches (0 = all cores)")
+    return ap.parse_args()
+
+def main() -> None:
+    args = parse_args()
+    stats = update_catalog(args.audio_dir, workers=args.workers, full=args.full)
 
-    print(f"Wrote {len(rows)} rows to {OUTPUT_CSV}")
-    print(f"Failed to parse {len(failed)} files; see {FAILED_CSV}")
+    print(f"Catalog: {stats['files']} files in {OUTPUT_CSV} "
+          f"({stats['added']} new, {stats['changed']} changed, {stats['removed']} removed)")
+    print(f"Failed to parse {stats['failed']} files; see {FAILED_CSV}")
 
 if __name__ == "__main__":
     main()
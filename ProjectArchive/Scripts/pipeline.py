@@ -1,10 +1,16 @@
 import os
+import sys
+from pathlib import Path
 import librosa            # audio processing library
 import soundfile as sf     # for writing audio files
 import numpy as np         # numerical operations
 import pandas as pd        # CSV/metadata handling
 from sklearn.model_selection import train_test_split
 
+# load_audio: reads clips that are already mono + 16 kHz directly, resamples the rest
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Prototype2" / "Scripts"))
+from audio_loader import load_audio  # noqa: E402
+
 # CONFIGURATION SECTION
 RAW_FOLDER = "~/Users/cianan/Documents/GitHub/FYP/Data/prototype_raw"
 PROCESSED_FOLDER = "~/Users/cianan/Documents/GitHub/FYP/Data/prototype_processed "
@@ -42,8 +48,8 @@ for row in df.itertuples():
 
     # Skip if already processed (saves time when rerunning)
     if not os.path.exists(outfile):
-        # librosa.load automatically converts to mono if mono=True
-        y, sr = librosa.load(infile, sr=SAMPLE_RATE, mono=True)
+        # load_audio converts to mono and resamples only if needed
+        y, sr = load_audio(infile, sr=SAMPLE_RATE)
 
         # Normalize audio amplitude to -1 to 1
         y = y / max(abs(y))
@@ -64,7 +70,7 @@ for filename in os.listdir(PROCESSED_FOLDER):
         filepath = os.path.join(PROCESSED_FOLDER, filename)
 
         # Load audio again (already mono + 16 kHz)
-        y, sr = librosa.load(filepath, sr=SAMPLE_RATE, mono=True)
+        y, sr = load_audio(filepath, sr=SAMPLE_RATE)
 
         # Compute MFCC features
         mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=N_MFCC)
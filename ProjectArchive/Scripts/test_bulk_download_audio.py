@@ -0,0 +1,213 @@
+import stat
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+import bulk_download_audio
+import trim_ni_segments
+from bulk_download_audio import (
+    DOWNLOAD_SECTIONS, extract_video_id, jobs_from_metadata, merge_ranges, metadata_rows, run_downloads, stream_segments,
+)
+
+
+# Stand-in yt-dlp: writes a WAV named after the video id, records it in the
+# download archive (skipping ids already there, like the real one), prints the
+# final path, and fails the first run for ids listed in FLAKY.
+FAKE_YTDLP = r'''#!{python}
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+url = args[-1]
+vid = url.split("v=")[-1]
+if "-g" in args:
+    print(Path(__file__).parent / f"{{vid}}.media.wav")
+    sys.exit(0)
+archive = Path(args[args.index("--download-archive") + 1])
+template = args[args.index("-o") + 1]
+calls = archive.with_name("calls.txt")
+with open(calls, "a") as f:
+    f.write(vid + "\n")
+# Sections must be exact cuts of the audio stream, not keyframe-aligned video copies
+if "--download-sections" in args:
+    assert "--force-keyframes-at-cuts" in args and args[args.index("-f") + 1].startswith("bestaudio"), args
+
+if vid.startswith("flaky") and open(calls).read().count(vid) == 1:
+    sys.exit(1)
+if vid.startswith("broken"):
+    sys.exit(1)
+if archive.exists() and f"youtube {{vid}}" in archive.read_text().split("\n"):
+    sys.exit(0)
+
+def seconds(hms):
+    total = 0
+    for part in hms.split(":"):
+        total = total * 60 + int(part)
+    return total
+
+sections = [b for a, b in zip(args, args[1:]) if a == "--download-sections"]
+starts = [seconds(sec[1:].split("-")[0]) for sec in sections] or [None]
+for start in starts:
+    name = template.replace("%(id)s", vid).replace("%(title).50s", "Title").replace("%(ext)s", "wav")
+    out = Path(name.replace("%(section_start)d", str(start)))
+    out.write_bytes(b"RIFF" + vid.encode())
+    print(out)
+with open(archive, "a") as f:
+    f.write(f"youtube {{vid}}\n")
+'''
+
+# Stand-in ffmpeg: copies the input to the output path (last argument), or
+# streams the -ss/-t range of a 16 kHz mono input as raw int16 to stdout
+FAKE_FFMPEG = r'''#!{python}
+import shutil, sys
+import soundfile as sf
+args = sys.argv[1:]
+src = args[args.index("-i") + 1]
+if "s16le" not in args:
+    shutil.copyfile(src, args[-1])
+    sys.exit(0)
+y, sr = sf.read(src, dtype="int16")
+start = int(args[args.index("-ss") + 1]) * sr
+end = start + int(args[args.index("-t") + 1]) * sr if "-t" in args else len(y)
+sys.stdout.buffer.write(y[start:end].astype("<i2").tobytes())
+'''
+
+
+def install(tmp_path: Path, monkeypatch):
+    for name, source, attr in (("yt-dlp", FAKE_YTDLP, "YTDLP_BIN"), ("ffmpeg", FAKE_FFMPEG, "FFMPEG_BIN")):
+        path = tmp_path / "bin" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(source.format(python=sys.executable))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setattr(bulk_download_audio, attr, str(path))
+    monkeypatch.setattr(trim_ni_segments, "FFMPEG_BIN", bulk_download_audio.FFMPEG_BIN)
+
+
+def calls(out: Path):
+    return sorted((out / "calls.txt").read_text().split())
+
+
+def test_extract_video_id():
+    assert extract_video_id("https://www.youtube.com/watch?v=abc123&t=5") == "abc123"
+    assert extract_video_id("https://youtu.be/xyz789") == "xyz789"
+    assert extract_video_id("https://www.youtube.com/playlist?list=PL123") == ""
+
+
+def test_merge_ranges():
+    assert merge_ranges([(100, 130), (0, 30), (33, 60), (20, 31)], gap=5) == [(0, 60), (100, 130)]
+    assert merge_ranges([]) == []
+
+
+def test_metadata_downloads_only_valid_times(tmp_path: Path, monkeypatch):
+    install(tmp_path, monkeypatch)
+    sheet = tmp_path / "ni_dataset.csv"
+    sheet.write_text(
+        "youtube_url,valid_times\n"
+        "https://www.youtube.com/watch?v=v1,\"1.00 - 1.30, 1.32 - 2.00, 10.00 - 10.20\"\n"
+        "https://www.youtube.com/watch?v=v1,0.00 - 5.00\n"
+        "https://www.youtube.com/watch?v=v2,\n"
+        "https://www.youtube.com/watch?v=v3,1.75 - 2.00\n",
+        encoding="utf-8",
+    )
+
+    jobs = jobs_from_metadata(str(sheet))
+    assert jobs == [
+        ("https://www.youtube.com/watch?v=v1", ["*00:01:00-00:02:00", "*00:10:00-00:10:20"]),
+        ("https://www.youtube.com/watch?v=v2", []),
+    ]
+
+    out, audio = tmp_path / "raw", tmp_path / "ni_audio_16k_mono"
+    stats = run_downloads(jobs, out, audio, retries=0, backoff=0)
+    assert stats["normalized"] == 3
+    assert sorted(p.name for p in audio.glob("*.wav")) == ["v1_60.wav", "v1_600.wav", "v2.wav"]
+
+
+def test_download_is_concurrent_retrying_and_resumable(tmp_path: Path, monkeypatch):
+    install(tmp_path, monkeypatch)
+    out = tmp_path / "out"
+    urls = [f"https://www.youtube.com/watch?v={vid}" for vid in ("a1", "b2", "flaky3", "broken4")]
+    jobs = [(url, DOWNLOAD_SECTIONS) for url in urls]
+
+    stats = run_downloads(jobs, out, download_workers=3, normalize_workers=2, retries=1, backoff=0)
+    assert stats == {"urls": 4, "skipped": 0, "failed": 1, "normalized": 3}
+    assert sorted(p.name for p in (out / "processed").glob("*.wav")) == ["a1_Title.wav", "b2_Title.wav", "flaky3_Title.wav"]
+    assert (out / "failed_urls.txt").read_text() == urls[3] + "\n"
+    assert calls(out) == ["a1", "b2", "broken4", "broken4", "flaky3", "flaky3"]
+
+    # Rerun: archived ids never reach yt-dlp, nothing is re-normalized
+    (out / "calls.txt").unlink()
+    stats = run_downloads(jobs, out, download_workers=3, normalize_workers=2, retries=0, backoff=0)
+    assert stats == {"urls": 4, "skipped": 3, "failed": 1, "normalized": 0}
+    assert calls(out) == ["broken4"]
+
+
+def test_rerun_normalizes_leftover_downloads(tmp_path: Path, monkeypatch):
+    install(tmp_path, monkeypatch)
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "old_Title.wav").write_bytes(b"RIFF")
+
+    written = []
+    real_run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda cmd, **kw: written.append(cmd[-1]) or real_run(cmd, **kw))
+
+    stats = run_downloads([], out, retries=0, backoff=0)
+    assert stats["normalized"] == 1
+    assert (out / "processed" / "old_Title.wav").exists()
+    # The temp output is not a .wav, so watchers and the sweep never pick it up
+    assert written == [str(out / "processed" / "old_Title.wav.part")]
+    assert [p.name for p in (out / "processed").iterdir()] == ["old_Title.wav"]
+
+
+def test_metadata_mode_leaves_playlist_downloads_alone(tmp_path: Path, monkeypatch):
+    install(tmp_path, monkeypatch)
+    playlists, sections, audio = tmp_path / "playlists", tmp_path / "sections", tmp_path / "ni_audio_16k_mono"
+    playlists.mkdir()
+    (playlists / "other_Title.wav").write_bytes(b"RIFF")
+    monkeypatch.setattr(bulk_download_audio, "OUTPUT_DIR", playlists)
+    monkeypatch.setattr(bulk_download_audio, "METADATA_OUTPUT_DIR", sections)
+    monkeypatch.setattr(trim_ni_segments, "AUDIO_DIR", str(audio))
+
+    sheet = tmp_path / "ni_dataset.csv"
+    sheet.write_text("youtube_url,valid_times\nhttps://www.youtube.com/watch?v=v1,1.00 - 1.30\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["bulk_download_audio.py", "--metadata", str(sheet), "--retries", "0"])
+    bulk_download_audio.main()
+
+    assert [p.name for p in audio.iterdir()] == ["v1_60.wav"]
+    assert (sections / "v1_60.wav").exists()
+    assert [p.name for p in playlists.iterdir()] == ["other_Title.wav"]
+
+
+def test_stream_cuts_segments_in_one_pass(tmp_path: Path, monkeypatch):
+    install(tmp_path, monkeypatch)
+    monkeypatch.setattr(trim_ni_segments, "OUT_DIR", str(tmp_path / "segments"))
+    monkeypatch.setattr(trim_ni_segments, "LOG_FILE", str(tmp_path / "trim_log.csv"))
+
+    # Each sample holds the second it belongs to, so cut points can be checked
+    for vid, seconds in (("v1", 60), ("v2", 70)):
+        y = np.repeat(np.arange(seconds, dtype=np.int16), 16000)
+        sf.write(tmp_path / "bin" / f"{vid}.media.wav", y, 16000, subtype="PCM_16")
+    sheet = tmp_path / "ni_dataset.csv"
+    sheet.write_text(
+        "youtube_url,speaker,party,constituency,valid_times\n"
+        "https://www.youtube.com/watch?v=v1,Ann,SF,Foyle,\"0.05 - 0.40, 0.42 - 0.50\"\n"
+        "https://www.youtube.com/watch?v=v2,Bob,DUP,Lagan Valley,\n",
+        encoding="utf-8",
+    )
+
+    stats = stream_segments(metadata_rows(str(sheet)), workers=2, retries=0, backoff=0)
+    assert stats == {"videos": 2, "failed": 0, "segments": 6}
+
+    segments = sorted((tmp_path / "segments").glob("*.wav"))
+    assert [p.name for p in segments[:3]] == ["Ann_SF_Foyle_v1_001.wav", "Ann_SF_Foyle_v1_002.wav", "Ann_SF_Foyle_v1_003.wav"]
+    cuts = [(int(y[0]), len(y) // 16000) for y in (sf.read(p, dtype="int16")[0] for p in segments)]
+    assert cuts == [(5, 30), (35, 5), (42, 8), (0, 30), (30, 30), (60, 10)]
+
+    # Rerun: v1's segments all exist, so its section is not fetched again
+    stats = stream_segments(metadata_rows(str(sheet)), workers=2, retries=0, backoff=0)
+    assert stats == {"videos": 2, "failed": 0, "segments": 0}
+    log = (tmp_path / "trim_log.csv").read_text().splitlines()
+    assert sum(",v1," in line and ",skip," in line for line in log) == 3
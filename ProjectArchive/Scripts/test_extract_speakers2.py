@@ -0,0 +1,78 @@
+import csv
+import os
+from pathlib import Path
+
+import extract_speakers2
+from extract_speakers2 import update_catalog
+
+
+def read(path: Path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def touch(path: Path, mtime_ns=None):
+    path.write_bytes(b"")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def run(tmp_path: Path, **kwargs):
+    return update_catalog(
+        tmp_path / "audio",
+        tmp_path / "speakers.csv",
+        tmp_path / "failed.csv",
+        tmp_path / "state.csv",
+        workers=1,
+        **kwargs,
+    )
+
+
+def test_incremental_catalog(tmp_path: Path, monkeypatch):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    touch(audio / "abcdefghijk_Micheál Martin - Budget.wav", 1_000)
+    touch(audio / "bcdefghijkl_no speaker here.wav", 1_000)
+    touch(audio / "notes.txt")
+
+    assert run(tmp_path) == {"files": 2, "added": 2, "changed": 0, "removed": 0, "failed": 1}
+    assert [r["speaker_key"] for r in read(tmp_path / "speakers.csv")] == ["micheal martin", "unknown"]
+
+    # Unchanged files are not parsed again
+    parsed = []
+    real = extract_speakers2.parse_filename
+    monkeypatch.setattr(extract_speakers2, "parse_filename", lambda name: parsed.append(name) or real(name))
+
+    touch(audio / "cdefghijklm_Bríd Smith - Housing.wav", 2_000)
+    assert run(tmp_path)["added"] == 1
+    assert parsed == ["cdefghijklm_Bríd Smith - Housing.wav"]
+    assert len(read(tmp_path / "speakers.csv")) == 3
+    assert len(read(tmp_path / "failed.csv")) == 1
+
+    # A renamed/fixed file drops out of the failure list, a changed mtime is reparsed
+    (audio / "bcdefghijkl_no speaker here.wav").unlink()
+    touch(audio / "cdefghijklm_Bríd Smith - Housing.wav", 3_000)
+    parsed.clear()
+    stats = run(tmp_path)
+
+    assert (stats["changed"], stats["removed"], stats["failed"]) == (1, 1, 0)
+    assert parsed == ["cdefghijklm_Bríd Smith - Housing.wav"]
+    assert read(tmp_path / "failed.csv") == []
+    assert [r["speaker_key"] for r in read(tmp_path / "speakers.csv")] == ["micheal martin", "brid smith"]
+
+    parsed.clear()
+    assert run(tmp_path)["added"] == 0
+    assert parsed == []
+
+
+def test_full_rebuild_rewrites_instead_of_appending(tmp_path: Path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    touch(audio / "abcdefghijk_Micheál Martin - Budget.wav", 1_000)
+    touch(audio / "bcdefghijkl_no speaker here.wav", 1_000)
+    run(tmp_path)
+
+    assert run(tmp_path, full=True)["added"] == 2
+    assert len(read(tmp_path / "speakers.csv")) == 2
+    assert len(read(tmp_path / "failed.csv")) == 1
+    assert len(read(tmp_path / "state.csv")) == 2
@@ -0,0 +1,200 @@
+"""
+Incrementally maintained aggregates of AccentPoints for the low-zoom map.
+
+Every saved point bumps one GridCell row per aggregated zoom level, one
+ProvinceCount row and (when it has a constituency) one ConstituencyCount row,
+so the map can draw a bounded number of cells instead of reading every point.
+"""
+
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import AccentPoint, ConstituencyCount, GridCell, ProvinceCount
+
+# Zoom levels with precomputed cells; at RAW_POINTS_MIN_ZOOM and above the map loads raw points
+AGGREGATE_ZOOMS = range(0, 13)
+RAW_POINTS_MIN_ZOOM = 13
+
+# Each Web Mercator tile is split into 2**CELL_SUBDIVISION cells per side (256px tiles -> 64px cells)
+CELL_SUBDIVISION = 2
+
+# Above this many distinct increments, _apply switches from F() UPDATEs to bulk_update
+MAX_INCREMENT_UPDATES = 8
+BULK_CHUNK_SIZE = 500
+
+# Web Mercator is undefined at the poles
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def cells_per_side(zoom):
+    return 2 ** (zoom + CELL_SUBDIVISION)
+
+
+def lon_to_cell_x(lon, zoom):
+    n = cells_per_side(zoom)
+    return min(max(int((lon + 180.0) / 360.0 * n), 0), n - 1)
+
+
+def lat_to_cell_y(lat, zoom):
+    n = cells_per_side(zoom)
+    lat = min(max(lat, -MAX_MERCATOR_LAT), MAX_MERCATOR_LAT)
+    rad = math.radians(lat)
+    y = (1.0 - math.asinh(math.tan(rad)) / math.pi) / 2.0 * n
+    return min(max(int(y), 0), n - 1)
+
+
+def cell_for(lon, lat, zoom):
+    return lon_to_cell_x(lon, zoom), lat_to_cell_y(lat, zoom)
+
+
+def _totals(points):
+    """
+    points: iterable of (lon, lat, province) or (lon, lat, province, constituency)
+    Returns ({(zoom, x, y, province): [count, lon_sum, lat_sum]}, {(province,): [...]},
+    {(constituency,): [...]}); points without a constituency are left out of the last.
+    """
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    provinces = defaultdict(lambda: [0, 0.0, 0.0])
+    constituencies = defaultdict(lambda: [0, 0.0, 0.0])
+
+    for lon, lat, province, *rest in points:
+        keys = [(cells, (z, *cell_for(lon, lat, z), province)) for z in AGGREGATE_ZOOMS]
+        keys.append((provinces, (province,)))
+        if rest and rest[0]:
+            keys.append((constituencies, (rest[0],)))
+        for target, key in keys:
+            total = target[key]
+            total[0] += 1
+            total[1] += lon
+            total[2] += lat
+
+    return cells, provinces, constituencies
+
+
+def _key_filter(key_fields, keys):
+    match = Q()
+    for key in keys:
+        match |= Q(**dict(zip(key_fields, key)))
+    return match
+
+
+def _apply(model, key_fields, totals, sign):
+    """
+    Add sign * totals to the matching rows, creating missing rows first.
+
+    Small updates (e.g. all cells of one point share one increment) become a
+    few F() UPDATEs. Large batches lock the affected rows, add in Python and
+    write back with bulk_update, a handful of queries per BULK_CHUNK_SIZE keys.
+    """
+    if not totals:
+        return
+
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key in totals],
+        ignore_conflicts=True,
+    )
+
+    by_increment = defaultdict(list)
+    for key, increment in totals.items():
+        by_increment[tuple(increment)].append(key)
+
+    if len(by_increment) <= MAX_INCREMENT_UPDATES:
+        for (count, lon_sum, lat_sum), keys in by_increment.items():
+            model.objects.filter(_key_filter(key_fields, keys)).update(
+                count=F("count") + sign * count,
+                lon_sum=F("lon_sum") + sign * lon_sum,
+                lat_sum=F("lat_sum") + sign * lat_sum,
+            )
+        return
+
+    keys = list(totals)
+    for i in range(0, len(keys), BULK_CHUNK_SIZE):
+        rows = list(model.objects.select_for_update().filter(_key_filter(key_fields, keys[i:i + BULK_CHUNK_SIZE])))
+        for row in rows:
+            count, lon_sum, lat_sum = totals[tuple(getattr(row, f) for f in key_fields)]
+            row.count += sign * count
+            row.lon_sum += sign * lon_sum
+            row.lat_sum += sign * lat_sum
+        model.objects.bulk_update(rows, ["count", "lon_sum", "lat_sum"], batch_size=BULK_CHUNK_SIZE)
+
+
+def record_points(points, sign=1):
+    """
+    Fold points (lon, lat, province[, constituency]) into the aggregates;
+    sign=-1 removes them. Used by the AccentPoint signals and by bulk loaders
+    that skip signals.
+    """
+    points = list(points)
+    if not points:
+        return
+
+    cells, provinces, constituencies = _totals(points)
+    with transaction.atomic():
+        _apply(GridCell, ("zoom", "x", "y", "province"), cells, sign)
+        _apply(ProvinceCount, ("province",), provinces, sign)
+        _apply(ConstituencyCount, ("constituency",), constituencies, sign)
+
+
+def rebuild_aggregates(batch_size=5000):
+    """Recompute every aggregate row from AccentPoint (after bulk edits or to repair drift)."""
+    with transaction.atomic():
+        GridCell.objects.all().delete()
+        ProvinceCount.objects.all().delete()
+        ConstituencyCount.objects.all().delete()
+
+        batch = []
+        rows = AccentPoint.objects.values_list("location", "province", "constituency")
+        for loc, province, constituency in rows.iterator(chunk_size=batch_size):
+            batch.append((loc.x, loc.y, province, constituency))
+            if len(batch) >= batch_size:
+                record_points(batch)
+                batch = []
+        record_points(batch)
+
+
+def cells_in_bbox(zoom, min_lon, min_lat, max_lon, max_lat):
+    """
+    Aggregated cells at `zoom` intersecting the bbox, one dict per cell:
+    x, y, count, lon, lat (mean point position), provinces {province: count}.
+    """
+    x0, x1 = lon_to_cell_x(min_lon, zoom), lon_to_cell_x(max_lon, zoom)
+    # Cell y grows southwards
+    y0, y1 = lat_to_cell_y(max_lat, zoom), lat_to_cell_y(min_lat, zoom)
+
+    rows = (
+        GridCell.objects
+        .filter(zoom=zoom, x__gte=x0, x__lte=x1, y__gte=y0, y__lte=y1, count__gt=0)
+        .values_list("x", "y", "province", "count", "lon_sum", "lat_sum")
+    )
+
+    cells = {}
+    for x, y, province, count, lon_sum, lat_sum in rows:
+        cell = cells.setdefault((x, y), [0, 0.0, 0.0, {}])
+        cell[0] += count
+        cell[1] += lon_sum
+        cell[2] += lat_sum
+        cell[3][province] = cell[3].get(province, 0) + count
+
+    return [
+        {"x": x, "y": y, "count": n, "lon": lon_sum / n, "lat": lat_sum / n, "provinces": provinces}
+        for (x, y), (n, lon_sum, lat_sum, provinces) in cells.items()
+    ]
+
+
+def province_totals():
+    """[{province, count, lon, lat}] from the ProvinceCount rows."""
+    return [
+        {"province": p.province, "count": p.count, "lon": p.lon_sum / p.count, "lat": p.lat_sum / p.count}
+        for p in ProvinceCount.objects.filter(count__gt=0).order_by("province")
+    ]
+
+
+def constituency_totals():
+    """[{constituency, count, lon, lat}] from the ConstituencyCount rows."""
+    return [
+        {"constituency": c.constituency, "count": c.count, "lon": c.lon_sum / c.count, "lat": c.lat_sum / c.count}
+        for c in ConstituencyCount.objects.filter(count__gt=0).order_by("constituency")
+    ]
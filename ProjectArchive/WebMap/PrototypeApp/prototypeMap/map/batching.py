@@ -0,0 +1,146 @@
+"""
+Micro-batching for model scoring in the async web predictor.
+
+Callers await submit(x) with one feature vector. A worker task per event loop
+gathers whatever arrives within max_wait_ms (up to max_batch_size rows), runs
+one batched score_fn call in the executor and resolves each caller's future.
+"""
+
+import asyncio
+import time
+import weakref
+from collections import Counter, deque
+
+import numpy as np
+
+# Recent request latencies kept for the percentile metrics
+LATENCY_WINDOW = 1000
+
+
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size=32, max_wait_ms=10.0, executor=None):
+        """
+        score_fn: (n, d) array -> (n, k) array, called from the executor
+        max_batch_size: rows per score_fn call
+        max_wait_ms: how long the first request of a batch waits for company
+        """
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+
+        self.pending = deque()
+        self.arrived = asyncio.Event()
+        self.worker = None
+
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def submit(self, x):
+        """Score one row; returns its row of score_fn output."""
+        loop = asyncio.get_running_loop()
+        if self.worker is None or self.worker.done():
+            self.worker = loop.create_task(self._run())
+
+        fut = loop.create_future()
+        self.pending.append((np.asarray(x), fut, time.perf_counter()))
+        self.arrived.set()
+        return await fut
+
+    async def _next_batch(self):
+        while not self.pending:
+            self.arrived.clear()
+            await self.arrived.wait()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        batch = []
+
+        while len(batch) < self.max_batch_size:
+            if self.pending:
+                batch.append(self.pending.popleft())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            # Callers that gave up (e.g. client disconnected) are not scored
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                continue
+
+            X = np.stack([x for x, _, _ in batch])
+            try:
+                out = await loop.run_in_executor(self.executor, self.score_fn, X)
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            now = time.perf_counter()
+            for row, (_, fut, submitted) in zip(out, batch):
+                if not fut.done():
+                    fut.set_result(row)
+                self.latencies.append(now - submitted)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] += 1
+
+    def metrics(self):
+        lat = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "queue_depth": len(self.pending),
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": max(self.batch_sizes) if self.batch_sizes else 0,
+            "batch_size_counts": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "latency_ms_p50": round(float(np.percentile(lat, 50)), 2),
+            "latency_ms_p99": round(float(np.percentile(lat, 99)), 2),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+_batchers = weakref.WeakKeyDictionary()
+
+
+def batcher_for_loop(factory):
+    """
+    One MicroBatcher per running event loop (the ASGI server has one; the
+    test client starts a fresh loop per request), created with factory().
+    """
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = factory()
+    return batcher
+
+
+def all_metrics():
+    """Metrics summed over every live batcher (normally just one)."""
+    batchers = list(_batchers.values())
+    if len(batchers) == 1:
+        return batchers[0].metrics()
+    return {
+        "queue_depth": sum(len(b.pending) for b in batchers),
+        "batches": sum(b.batches for b in batchers),
+        "items": sum(b.items for b in batchers),
+        "loops": len(batchers),
+    }
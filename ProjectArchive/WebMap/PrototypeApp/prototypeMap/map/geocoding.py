@@ -0,0 +1,33 @@
+"""
+Constituency labels for stored points, from local boundary polygons
+(Prototype2/Scripts/constituency_geocoder.py) - no database round-trip.
+Labelling is skipped when ACCENT_CONSTITUENCY_BOUNDARIES does not exist.
+"""
+
+import os
+
+from django.conf import settings
+
+from .predictor import scripts_on_path
+
+
+def get_geocoder():
+    """The process-wide ConstituencyGeocoder, or None without a boundary file."""
+    path = settings.ACCENT_CONSTITUENCY_BOUNDARIES
+    if not path or not os.path.exists(path):
+        return None
+
+    scripts_on_path()
+    from constituency_geocoder import load_geocoder
+
+    return load_geocoder(str(path))
+
+
+def constituencies_for(lons, lats):
+    """Constituency name per point ("" where unknown), in one vectorized lookup."""
+    geocoder = get_geocoder()
+    if geocoder is None or len(lons) == 0:
+        return [""] * len(lons)
+
+    names, _ = geocoder.label(lons, lats)
+    return [name or "" for name in names]
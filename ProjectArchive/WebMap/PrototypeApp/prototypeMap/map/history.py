@@ -0,0 +1,135 @@
+"""
+Prediction history: daily rollups, archiving and retention for AccentPoint.
+
+The hot AccentPoint table keeps ACCENT_POINT_RETENTION_DAYS of points.
+manage.py rotate_history (run daily, e.g. from cron) does three things:
+  1. refreshes DailyProvinceRollup for every day still in the hot table
+  2. moves whole days older than the retention window to AccentPointArchive
+     (and out of the map aggregates)
+  3. deletes archived points older than ACCENT_ARCHIVE_RETENTION_DAYS, if set
+Rollups are never purged, so long-range trends survive retention.
+"""
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .aggregates import record_points
+from .models import AccentPoint, AccentPointArchive, DailyProvinceRollup
+from .signals import suspended_aggregate_signals
+
+ARCHIVE_BATCH_SIZE = 10_000
+
+
+def day_cutoff(days, now=None):
+    """Midnight (UTC) `days` days ago, so rotation always moves whole days."""
+    now = now or timezone.now()
+    day = (now - timedelta(days=days)).date()
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def refresh_rollups(since_day=None):
+    """
+    Recompute the rollup rows for every day from since_day onwards from
+    AccentPoint. Idempotent. By default starts at the newest rolled-up day
+    (it may have been partial), or the oldest hot day on the first run, so
+    a daily run only rescans about a day of points.
+    Returns the number of rollup rows written.
+    """
+    if since_day is None:
+        since_day = DailyProvinceRollup.objects.aggregate(latest=Max("day"))["latest"]
+    if since_day is None:
+        oldest = AccentPoint.objects.aggregate(oldest=Min("created_at"))["oldest"]
+        if oldest is None:
+            return 0
+        since_day = oldest.astimezone(dt_timezone.utc).date()
+
+    start = datetime.combine(since_day, time.min, tzinfo=dt_timezone.utc)
+    rows = (
+        AccentPoint.objects
+        .filter(created_at__gte=start)
+        .annotate(day=TruncDate("created_at", tzinfo=dt_timezone.utc))
+        .values("day", "province")
+        .annotate(n=Count("id"), conf_sum=Sum("confidence"), conf_n=Count("confidence"))
+    )
+
+    rollups = [
+        DailyProvinceRollup(
+            day=r["day"],
+            province=r["province"],
+            count=r["n"],
+            confidence_sum=r["conf_sum"] or 0.0,
+            confidence_count=r["conf_n"],
+        )
+        for r in rows
+    ]
+
+    with transaction.atomic():
+        DailyProvinceRollup.objects.filter(day__gte=since_day).delete()
+        DailyProvinceRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def archive_points(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move AccentPoints created before `before` to AccentPointArchive, in
+    id-ordered batches, one transaction per batch. Returns the number moved.
+    """
+    moved = 0
+    while True:
+        batch = list(
+            AccentPoint.objects
+            .filter(created_at__lt=before)
+            .order_by("id")
+            .values("id", "location", "created_at", "province", "confidence", "clip_id", "constituency")[:batch_size]
+        )
+        if not batch:
+            return moved
+
+        with transaction.atomic():
+            AccentPointArchive.objects.bulk_create(
+                [
+                    AccentPointArchive(
+                        point_id=p["id"],
+                        location=p["location"],
+                        created_at=p["created_at"],
+                        province=p["province"],
+                        confidence=p["confidence"],
+                        clip_id=p["clip_id"],
+                        constituency=p["constituency"],
+                    )
+                    for p in batch
+                ],
+                ignore_conflicts=True,
+            )
+            # One bulk aggregate update per batch instead of one per deleted row
+            with suspended_aggregate_signals():
+                AccentPoint.objects.filter(id__in=[p["id"] for p in batch]).delete()
+            record_points(
+                ((p["location"].x, p["location"].y, p["province"], p["constituency"]) for p in batch), sign=-1
+            )
+
+        moved += len(batch)
+
+
+def purge_archive(before):
+    """Delete archived points created before `before`. Returns the number deleted."""
+    deleted, _ = AccentPointArchive.objects.filter(created_at__lt=before).delete()
+    return deleted
+
+
+def rotate_history(retention_days=None, archive_retention_days=None, now=None):
+    """Rollup, archive and purge in order. Returns counts for reporting."""
+    retention_days = retention_days if retention_days is not None else settings.ACCENT_POINT_RETENTION_DAYS
+    if archive_retention_days is None:
+        archive_retention_days = settings.ACCENT_ARCHIVE_RETENTION_DAYS
+
+    rollups = refresh_rollups()
+    archived = archive_points(day_cutoff(retention_days, now))
+    purged = purge_archive(day_cutoff(archive_retention_days, now)) if archive_retention_days else 0
+
+    return {"rollup_rows": rollups, "archived": archived, "purged": purged}
@@ -0,0 +1,123 @@
+"""
+Bulk ingestion of model predictions as AccentPoints.
+
+Records are validated, deduplicated by clip id (within the batch, against
+the table and against archived points), inserted with bulk_create in chunks inside one transaction, and
+folded into the map aggregates in the same transaction.
+"""
+
+from django.contrib.gis.geos import Point
+from django.db import transaction
+
+from .aggregates import record_points
+from .geocoding import constituencies_for
+from .models import AccentPoint, AccentPointArchive
+
+INGEST_CHUNK_SIZE = 2000
+
+# Where a prediction is drawn when the record has no coordinates of its own
+PROVINCE_CENTRES = {
+    "Connacht": (53.75, -9.0),
+    "Leinster": (53.2, -6.9),
+    "Munster": (52.3, -8.7),
+    "Ulster": (54.6, -7.0),
+}
+
+
+def clean_record(record):
+    """
+    One input record -> dict(lat, lon, province, confidence, clip_id).
+    Coordinates default to the province centre (placed=False). Raises ValueError if unusable.
+    """
+    province = str(record.get("province") or "").strip()
+    clip_id = str(record.get("clip_id") or "").strip() or None
+
+    lat, lon = record.get("lat"), record.get("lon")
+    placed = not (lat in (None, "") or lon in (None, ""))
+    if not placed:
+        if province not in PROVINCE_CENTRES:
+            raise ValueError(f"no coordinates and unknown province {province!r}")
+        lat, lon = PROVINCE_CENTRES[province]
+
+    lat, lon = float(lat), float(lon)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"coordinates out of range: {lat}, {lon}")
+
+    confidence = record.get("confidence")
+    confidence = float(confidence) if confidence not in (None, "") else None
+
+    return {
+        "lat": lat,
+        "lon": lon,
+        "province": province,
+        "confidence": confidence,
+        "clip_id": clip_id,
+        "placed": placed,
+    }
+
+
+def existing_clip_ids(clip_ids, chunk_size=INGEST_CHUNK_SIZE):
+    """Clip ids already ingested, whether still live or moved to the archive by rotate_history."""
+    clip_ids = list(clip_ids)
+    found = set()
+    for i in range(0, len(clip_ids), chunk_size):
+        chunk = clip_ids[i:i + chunk_size]
+        found.update(AccentPoint.objects.filter(clip_id__in=chunk).values_list("clip_id", flat=True))
+        found.update(AccentPointArchive.objects.filter(clip_id__in=chunk).values_list("clip_id", flat=True))
+    return found
+
+
+def ingest_predictions(records, chunk_size=INGEST_CHUNK_SIZE):
+    """
+    Insert prediction records as AccentPoints.
+
+    Returns counts:
+      created     rows inserted
+      duplicates  clip ids already stored or repeated in the batch (first one wins)
+      invalid     records that failed validation, as (index, reason)
+    """
+    cleaned = []
+    invalid = []
+    seen = set()
+    duplicates = 0
+
+    for i, record in enumerate(records):
+        try:
+            row = clean_record(record)
+        except (TypeError, ValueError) as e:
+            invalid.append((i, str(e)))
+            continue
+
+        if row["clip_id"] is not None:
+            if row["clip_id"] in seen:
+                duplicates += 1
+                continue
+            seen.add(row["clip_id"])
+        cleaned.append(row)
+
+    with transaction.atomic():
+        stored = existing_clip_ids(seen, chunk_size)
+        new_rows = [r for r in cleaned if r["clip_id"] is None or r["clip_id"] not in stored]
+        duplicates += len(cleaned) - len(new_rows)
+
+        # Only records with real coordinates get a constituency; province centres say nothing
+        placed = [r for r in new_rows if r["placed"]]
+        names = constituencies_for([r["lon"] for r in placed], [r["lat"] for r in placed])
+        for r, name in zip(placed, names):
+            r["constituency"] = name
+
+        objs = [
+            AccentPoint(
+                location=Point(r["lon"], r["lat"], srid=4326),
+                province=r["province"],
+                confidence=r["confidence"],
+                clip_id=r["clip_id"],
+                constituency=r.get("constituency", ""),
+            )
+            for r in new_rows
+        ]
+        # bulk_create skips the post_save signal, so the aggregates are updated here
+        AccentPoint.objects.bulk_create(objs, batch_size=chunk_size)
+        record_points((r["lon"], r["lat"], r["province"], r.get("constituency", "")) for r in new_rows)
+
+    return {"created": len(objs), "duplicates": duplicates, "invalid": invalid}
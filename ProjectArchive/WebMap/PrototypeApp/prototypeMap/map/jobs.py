@@ -0,0 +1,183 @@
+"""
+Database-backed queue of long prediction jobs.
+
+The web process only stores the upload and a PredictionJob row. Workers
+(manage.py run_prediction_worker) claim queued rows with row-level locking,
+score the recording with sliding windows and write the AccentPoint.
+"""
+
+import os
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .ingest import PROVINCE_CENTRES
+from .models import AccentPoint, PredictionJob
+from .predictor import get_model, scripts_on_path
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker):
+    """
+    Mark the oldest queued job as running for `worker` and return it, or None.
+    SKIP LOCKED lets concurrent workers pass over rows another worker is claiming.
+    """
+    with transaction.atomic():
+        job = (
+            PredictionJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PredictionJob.QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = PredictionJob.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.attempts += 1
+        job.worker = worker
+        job.save(update_fields=["status", "started_at", "heartbeat_at", "attempts", "worker"])
+        return job
+
+
+def owned(job):
+    """
+    The job's row, as long as this claim still holds it: a requeued or
+    reclaimed job has another status or attempt count, so writes through
+    this queryset become no-ops instead of overwriting the newer run.
+    """
+    return PredictionJob.objects.filter(id=job.id, status=PredictionJob.RUNNING, attempts=job.attempts)
+
+
+@contextmanager
+def heartbeat(job, interval=None):
+    """Refresh job.heartbeat_at every `interval` seconds from a background thread while the block runs."""
+    interval = interval if interval is not None else settings.ACCENT_JOB_HEARTBEAT_SECONDS
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                owned(job).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()  # this thread's own DB connection
+
+    thread = threading.Thread(target=beat, name=f"job-{job.id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def requeue_stale_jobs(stale_seconds=None, max_attempts=None):
+    """
+    Running jobs whose heartbeat has been silent for stale_seconds (the
+    worker died) go back to the queue, or fail once they have used
+    max_attempts. A long job that is still beating is left alone.
+    Returns (requeued, failed).
+    """
+    stale_seconds = stale_seconds if stale_seconds is not None else settings.ACCENT_JOB_STALE_SECONDS
+    max_attempts = max_attempts if max_attempts is not None else settings.ACCENT_JOB_MAX_ATTEMPTS
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    stale = PredictionJob.objects.filter(status=PredictionJob.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+    with transaction.atomic():
+        failed = stale.filter(attempts__gte=max_attempts).update(
+            status=PredictionJob.FAILED,
+            finished_at=timezone.now(),
+            error="worker stopped responding",
+        )
+        requeued = stale.update(status=PredictionJob.QUEUED, worker="")
+    return requeued, failed
+
+
+def score_recording(path):
+    """
+    Province distribution for a recording of any length (sliding windows,
+    see predict_long_recording.py). Returns the JSON-ready result.
+    """
+    scripts_on_path()
+    from predict_long_recording import score_long_recording
+
+    model, labels = get_model()
+    windows, distribution = score_long_recording(path, model, labels)
+    province = max(distribution, key=distribution.get)
+    return {
+        "province": province,
+        "confidence": distribution[province],
+        "probs": distribution,
+        "n_windows": len(windows),
+        "duration_sec": float(windows["end_sec"].max()) if len(windows) else 0.0,
+    }
+
+
+def run_job(job, delete_audio=True):
+    """
+    Score a claimed job and record the outcome on it. Never raises for
+    scoring errors. If the job was requeued meanwhile (this worker lost it),
+    nothing is written and the job is returned as it now stands.
+    """
+    try:
+        with heartbeat(job):
+            result = score_recording(job.audio.path)
+    except Exception as e:
+        # Decoding/model errors will not fix themselves; fail now rather than retry
+        owned(job).update(
+            status=PredictionJob.FAILED,
+            error=f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}",
+            finished_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        return job
+
+    centre = PROVINCE_CENTRES.get(result["province"])
+    with transaction.atomic():
+        if not owned(job).select_for_update().exists():
+            job.refresh_from_db()
+            return job
+        if centre is not None:
+            lat, lon = centre
+            job.point = AccentPoint.objects.create(
+                location=Point(lon, lat, srid=4326),
+                province=result["province"],
+                confidence=result["confidence"],
+            )
+        job.result = result
+        job.status = PredictionJob.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=["point", "result", "status", "finished_at"])
+
+    if delete_audio and job.audio:
+        job.audio.delete(save=True)
+    return job
+
+
+def job_status(job):
+    """JSON-ready status of a job, as served by the polling endpoint."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "attempts": job.attempts,
+        "result": job.result,
+        "point_id": job.point_id,
+        "error": job.error.splitlines()[0] if job.error else "",
+    }
@@ -0,0 +1,61 @@
+import csv
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from map.ingest import INGEST_CHUNK_SIZE, ingest_predictions
+
+
+def record_from_row(row):
+    """
+    A CSV row -> ingest record. Accepts the canonical columns
+    (lat, lon, province, confidence, clip_id) or predict.py's
+    segment_predictions.csv (predicted_province, confidence, segment_file).
+    """
+    clip_id = row.get("clip_id") or ""
+    if not clip_id and row.get("segment_file"):
+        clip_id = os.path.splitext(os.path.basename(row["segment_file"]))[0]
+
+    return {
+        "lat": row.get("lat"),
+        "lon": row.get("lon"),
+        "province": row.get("province") or row.get("predicted_province"),
+        "confidence": row.get("confidence"),
+        "clip_id": clip_id,
+    }
+
+
+class Command(BaseCommand):
+    help = "Bulk-insert prediction CSVs as AccentPoints (one transaction, deduplicated by clip id)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_files", nargs="+")
+        parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        records = []
+        skipped = 0
+        for path in options["csv_files"]:
+            if not os.path.exists(path):
+                raise CommandError(f"No such file: {path}")
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                for row in csv.DictReader(f):
+                    # predict.py marks failed segments with an error in status
+                    if row.get("status", "ok") != "ok":
+                        skipped += 1
+                        continue
+                    records.append(record_from_row(row))
+
+        t0 = time.perf_counter()
+        result = ingest_predictions(records, chunk_size=options["chunk_size"])
+        elapsed = time.perf_counter() - t0
+
+        for index, reason in result["invalid"][:10]:
+            self.stderr.write(f"record {index}: {reason}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']}, duplicates {result['duplicates']}, "
+            f"invalid {len(result['invalid'])}, failed segments skipped {skipped} "
+            f"in {elapsed:.2f}s"
+        ))
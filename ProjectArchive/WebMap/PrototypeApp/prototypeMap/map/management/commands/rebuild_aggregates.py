@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from map.aggregates import rebuild_aggregates
+from map.models import ConstituencyCount, GridCell, ProvinceCount
+
+
+class Command(BaseCommand):
+    help = "Recompute the map grid/province/constituency aggregates from every AccentPoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rebuild_aggregates(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {GridCell.objects.count()} grid cells, {ProvinceCount.objects.count()} provinces, "
+            f"{ConstituencyCount.objects.count()} constituencies"
+        ))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from map.history import rotate_history
+
+
+class Command(BaseCommand):
+    help = "Refresh daily rollups, archive AccentPoints past retention and purge old archive rows. Run daily."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retention-days", type=int, default=settings.ACCENT_POINT_RETENTION_DAYS)
+        parser.add_argument("--archive-retention-days", type=int, default=settings.ACCENT_ARCHIVE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        result = rotate_history(options["retention_days"], options["archive_retention_days"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollup rows refreshed {result['rollup_rows']}, archived {result['archived']}, purged {result['purged']}"
+        ))
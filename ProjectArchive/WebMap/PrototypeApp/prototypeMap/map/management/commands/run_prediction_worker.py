@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from map.jobs import claim_next_job, default_worker_name, requeue_stale_jobs, run_job
+
+# Seconds between polls when the queue is empty
+POLL_SECONDS = 2.0
+
+# Seconds between checks for jobs orphaned by a crashed worker
+STALE_CHECK_SECONDS = 60.0
+
+
+class Command(BaseCommand):
+    help = "Score queued prediction jobs. Run several for more throughput; jobs are claimed with row locks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default=default_worker_name(), help="Worker name recorded on claimed jobs")
+        parser.add_argument("--poll", type=float, default=POLL_SECONDS, help="Idle poll interval in seconds")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--keep-audio", action="store_true", help="Keep uploaded audio after scoring")
+
+    def handle(self, *args, **options):
+        name = options["name"]
+        last_stale_check = 0.0
+        done = 0
+
+        self.stdout.write(f"Prediction worker {name} started")
+        while True:
+            if time.monotonic() - last_stale_check > STALE_CHECK_SECONDS:
+                requeued, failed = requeue_stale_jobs()
+                if requeued or failed:
+                    self.stdout.write(f"Stale jobs: requeued {requeued}, failed {failed}")
+                last_stale_check = time.monotonic()
+
+            job = claim_next_job(name)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll"])
+                continue
+
+            t0 = time.perf_counter()
+            job = run_job(job, delete_audio=not options["keep_audio"])
+            done += 1
+            summary = job.result["province"] if job.result else job.error.splitlines()[0]
+            self.stdout.write(f"job {job.id}: {job.status} ({summary}) in {time.perf_counter() - t0:.2f}s")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} jobs"))
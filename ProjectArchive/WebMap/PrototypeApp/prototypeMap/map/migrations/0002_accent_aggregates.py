@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:56
+
+import math
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# Frozen copy of the map.aggregates cell math as of this migration, so later
+# changes to that module cannot alter or break the migration history
+AGGREGATE_ZOOMS = range(0, 13)
+CELL_SUBDIVISION = 2
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def cell_for(lon, lat, zoom):
+    n = 2 ** (zoom + CELL_SUBDIVISION)
+    x = min(max(int((lon + 180.0) / 360.0 * n), 0), n - 1)
+    rad = math.radians(min(max(lat, -MAX_MERCATOR_LAT), MAX_MERCATOR_LAT))
+    y = min(max(int((1.0 - math.asinh(math.tan(rad)) / math.pi) / 2.0 * n), 0), n - 1)
+    return x, y
+
+
+def backfill_aggregates(apps, schema_editor):
+    AccentPoint = apps.get_model("map", "AccentPoint")
+    GridCell = apps.get_model("map", "GridCell")
+    ProvinceCount = apps.get_model("map", "ProvinceCount")
+
+    # Existing points have no province yet; the tables are new, so plain inserts suffice
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    provinces = defaultdict(lambda: [0, 0.0, 0.0])
+    for loc in AccentPoint.objects.values_list("location", flat=True).iterator():
+        lon, lat = loc.x, loc.y
+        for target, key in [(cells, (z, *cell_for(lon, lat, z))) for z in AGGREGATE_ZOOMS] + [(provinces, "")]:
+            total = target[key]
+            total[0] += 1
+            total[1] += lon
+            total[2] += lat
+
+    GridCell.objects.bulk_create(
+        [GridCell(zoom=z, x=x, y=y, province="", count=c, lon_sum=lo, lat_sum=la)
+         for (z, x, y), (c, lo, la) in cells.items()],
+        batch_size=500,
+    )
+    ProvinceCount.objects.bulk_create(
+        [ProvinceCount(province=p, count=c, lon_sum=lo, lat_sum=la)
+         for p, (c, lo, la) in provinces.items()],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProvinceCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('province', models.CharField(max_length=32, unique=True)),
+                ('count', models.IntegerField(default=0)),
+                ('lon_sum', models.FloatField(default=0.0)),
+                ('lat_sum', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='accentpoint',
+            name='province',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.CreateModel(
+            name='GridCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('province', models.CharField(blank=True, default='', max_length=32)),
+                ('count', models.IntegerField(default=0)),
+                ('lon_sum', models.FloatField(default=0.0)),
+                ('lat_sum', models.FloatField(default=0.0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('zoom', 'x', 'y', 'province'), name='map_gridcell_unique_cell')],
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0002_accent_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accentpoint',
+            name='clip_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='accentpoint',
+            name='confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:06
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0004_predictionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccentPointArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('point_id', models.BigIntegerField(unique=True)),
+                ('location', django.contrib.gis.db.models.fields.PointField(geography=True, srid=4326)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('province', models.CharField(blank=True, default='', max_length=32)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('clip_id', models.CharField(blank=True, db_index=True, max_length=255, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyProvinceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('province', models.CharField(blank=True, default='', max_length=32)),
+                ('count', models.IntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0.0)),
+                ('confidence_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='accentpoint',
+            index=models.Index(fields=['-created_at'], name='map_point_created_desc'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyprovincerollup',
+            constraint=models.UniqueConstraint(fields=('day', 'province'), name='map_rollup_unique_day_province'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0005_prediction_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accentpoint',
+            name='constituency',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='accentpointarchive',
+            name='constituency',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
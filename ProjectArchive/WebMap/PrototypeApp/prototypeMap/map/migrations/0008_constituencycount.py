@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:40
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_constituencies(apps, schema_editor):
+    AccentPoint = apps.get_model("map", "AccentPoint")
+    ConstituencyCount = apps.get_model("map", "ConstituencyCount")
+
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    rows = AccentPoint.objects.exclude(constituency="").values_list("location", "constituency")
+    for loc, constituency in rows.iterator():
+        total = totals[constituency]
+        total[0] += 1
+        total[1] += loc.x
+        total[2] += loc.y
+
+    ConstituencyCount.objects.bulk_create(
+        [ConstituencyCount(constituency=c, count=n, lon_sum=lo, lat_sum=la) for c, (n, lo, la) in totals.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map', '0007_predictionjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConstituencyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('constituency', models.CharField(max_length=64, unique=True)),
+                ('count', models.IntegerField(default=0)),
+                ('lon_sum', models.FloatField(default=0.0)),
+                ('lat_sum', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.RunPython(backfill_constituencies, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,135 @@ from django.contrib.gis.db import models
 class AccentPoint(models.Model):
     location = models.PointField(geography=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Predicted province label ("" for points added by hand on the map page)
+    province = models.CharField(max_length=32, blank=True, default="")
+    confidence = models.FloatField(null=True, blank=True)
+    # Source clip of an ingested prediction; re-ingesting the same clip is skipped
+    clip_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    # Constituency containing the point, from the boundary files (map/geocoding.py)
+    constituency = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        # location has its own spatial index (PointField default); this one serves
+        # "latest N" and since/until windows. Rows older than the retention window
+        # move to AccentPointArchive (see map/history.py), keeping this table bounded.
+        indexes = [
+            models.Index(fields=["-created_at"], name="map_point_created_desc"),
+        ]
 
     def __str__(self):
         return f"{self.location.x}, {self.location.y}"
+
+
+class AccentPointArchive(models.Model):
+    """AccentPoints past the retention window, moved out of the hot table by manage.py rotate_history."""
+    point_id = models.BigIntegerField(unique=True)
+    location = models.PointField(geography=True)
+    created_at = models.DateTimeField(db_index=True)
+    province = models.CharField(max_length=32, blank=True, default="")
+    confidence = models.FloatField(null=True, blank=True)
+    clip_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    constituency = models.CharField(max_length=64, blank=True, default="")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"archived point {self.point_id}"
+
+
+class DailyProvinceRollup(models.Model):
+    """Predictions per day and province, kept after the raw points are archived or purged."""
+    day = models.DateField()
+    province = models.CharField(max_length=32, blank=True, default="")
+    count = models.IntegerField(default=0)
+    confidence_sum = models.FloatField(default=0.0)
+    # Points with a confidence (hand-placed points have none)
+    confidence_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "province"], name="map_rollup_unique_day_province"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.province or '-'}: {self.count}"
+
+
+class GridCell(models.Model):
+    """
+    Running totals of AccentPoints per map grid cell and province.
+
+    Cells are a quarter of a Web Mercator tile at each aggregated zoom level
+    (see map/aggregates.py). The sums let the map draw each cell at the mean
+    position of its points without reading them.
+    """
+    zoom = models.PositiveSmallIntegerField()
+    x = models.IntegerField()
+    y = models.IntegerField()
+    province = models.CharField(max_length=32, blank=True, default="")
+    count = models.IntegerField(default=0)
+    lon_sum = models.FloatField(default=0.0)
+    lat_sum = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["zoom", "x", "y", "province"], name="map_gridcell_unique_cell"),
+        ]
+
+    def __str__(self):
+        return f"z{self.zoom} ({self.x}, {self.y}) {self.province or '-'}: {self.count}"
+
+
+class ProvinceCount(models.Model):
+    """Running totals of AccentPoints per predicted province."""
+    province = models.CharField(max_length=32, unique=True)
+    count = models.IntegerField(default=0)
+    lon_sum = models.FloatField(default=0.0)
+    lat_sum = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.province or '-'}: {self.count}"
+
+
+class ConstituencyCount(models.Model):
+    """Running totals of AccentPoints per constituency (points without one are not counted)."""
+    constituency = models.CharField(max_length=64, unique=True)
+    count = models.IntegerField(default=0)
+    lon_sum = models.FloatField(default=0.0)
+    lat_sum = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.constituency}: {self.count}"
+
+
+class PredictionJob(models.Model):
+    """
+    A recording waiting to be scored by a background worker
+    (manage.py run_prediction_worker). Workers claim queued jobs with
+    SELECT ... FOR UPDATE SKIP LOCKED, so several can run side by side.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(s, s) for s in (QUEUED, RUNNING, DONE, FAILED)]
+
+    audio = models.FileField(upload_to="prediction_jobs/%Y/%m/%d", blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker while it scores; a job whose heartbeat stops is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=64, blank=True, default="")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    point = models.ForeignKey(AccentPoint, null=True, blank=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="map_job_status_created"),
+        ]
+
+    def __str__(self):
+        return f"job {self.id} ({self.status})"
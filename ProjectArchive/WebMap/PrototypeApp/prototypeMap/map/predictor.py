@@ -0,0 +1,259 @@
+"""
+Province prediction for uploaded audio (POST /map/predict/).
+
+The multipart upload is decoded while Django parses it: WAV chunks go straight
+through an incremental PCM decoder into the streaming MFCC extractor from
+Prototype2/Scripts/stream_classifier.py, so no copy of the file is written.
+Anything that is not 16 kHz PCM WAV is kept in memory (up to a limit) and
+decoded with librosa instead. Feature vectors from concurrent uploads are
+scored together by a MicroBatcher (map/batching.py) in a shared thread pool.
+"""
+
+import io
+import struct
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from .batching import MicroBatcher, batcher_for_loop
+
+# Multipart field holding the audio
+UPLOAD_FIELD = "audio"
+
+# Feature stats cover the whole clip up to this length (the most recent part beyond it)
+MAX_UPLOAD_SECONDS = 120
+
+# Bytes kept while waiting for a complete WAV header
+MAX_HEADER_BYTES = 64 * 1024
+
+# Non-WAV uploads are decoded from memory; larger ones are refused
+MAX_BUFFERED_BYTES = 20 * 1024 * 1024
+
+_lock = threading.Lock()
+_model = None
+_executor = None
+
+
+def scripts_on_path():
+    """Make the Prototype2/Scripts modules importable (they import each other as siblings)."""
+    if settings.ACCENT_SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, settings.ACCENT_SCRIPTS_DIR)
+
+
+def get_model():
+    """(model, labels), loaded once per process from ACCENT_MODEL_DIR."""
+    global _model
+    with _lock:
+        if _model is None:
+            scripts_on_path()
+            from province_model_store import load_province_model
+            from train_province_mfcc_baseline import feature_config
+
+            model, meta = load_province_model(settings.ACCENT_MODEL_DIR, expected_config=feature_config())
+            _model = (model, list(meta["labels"]))
+        return _model
+
+
+def predictor_executor():
+    """Shared pool for decoding and scoring, so the event loop never runs model code."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ACCENT_PREDICT_WORKERS,
+                thread_name_prefix="accent-predict",
+            )
+        return _executor
+
+
+class UnsupportedStream(ValueError):
+    pass
+
+
+class StreamingWavDecoder:
+    """
+    Incremental 16 kHz PCM WAV decoder: feed() bytes as they arrive and get
+    mono float32 samples back. Raises UnsupportedStream while still in the
+    header if the data is not a WAV it can decode; `head` then holds every
+    byte fed so far.
+    """
+
+    def __init__(self):
+        scripts_on_path()
+        from stream_classifier import read_wav_header
+        from train_province_mfcc_baseline import TARGET_SR
+
+        self._read_header = read_wav_header
+        self.target_sr = TARGET_SR
+        self.head = b""
+        self.header = None
+        self.frame_bytes = 0
+        self.carry = b""
+
+    def _parse_header(self):
+        f = io.BytesIO(self.head)
+        try:
+            header = self._read_header(f)
+        except (ValueError, struct.error) as e:
+            # Wait for more bytes only if this still looks like the start of a WAV
+            incomplete = self.head[:4] == b"RIFF" and "incomplete" in str(e)
+            if incomplete and len(self.head) < MAX_HEADER_BYTES:
+                return b""
+            raise UnsupportedStream(str(e))
+
+        if header["sr"] != self.target_sr:
+            raise UnsupportedStream(f"WAV is {header['sr']} Hz, not {self.target_sr} Hz")
+
+        self.header = header
+        self.frame_bytes = header["channels"] * (2 if header["sample_format"] == "int16" else 4)
+        return self.head[f.tell():]
+
+    def feed(self, raw: bytes) -> np.ndarray:
+        from stream_classifier import _pcm_to_float
+
+        if self.header is None:
+            self.head += raw
+            raw = self._parse_header()
+
+        data = self.carry + raw
+        usable = len(data) - len(data) % self.frame_bytes if self.frame_bytes else 0
+        self.carry = data[usable:]
+        if not usable:
+            return np.zeros(0, dtype=np.float32)
+        return _pcm_to_float(data[:usable], self.header["sample_format"], self.header["channels"])
+
+
+class DecodedUpload:
+    """
+    One uploaded clip, decoded as it streams in.
+    Streams through StreamingMfccExtractor when possible, else buffers bytes for librosa.
+    """
+
+    def __init__(self, name: str):
+        scripts_on_path()
+        from stream_classifier import StreamingMfccExtractor
+        from train_province_mfcc_baseline import HOP_LENGTH, TARGET_SR
+
+        self.name = name
+        self.size = 0
+        self.n_samples = 0
+        self.decoder = StreamingWavDecoder()
+        self.extractor = StreamingMfccExtractor(window_frames=1 + (MAX_UPLOAD_SECONDS * TARGET_SR) // HOP_LENGTH)
+        self.buffer = None
+
+    @property
+    def streamed(self) -> bool:
+        return self.buffer is None
+
+    def feed(self, raw: bytes):
+        self.size += len(raw)
+
+        if self.buffer is None:
+            try:
+                samples = self.decoder.feed(raw)
+            except UnsupportedStream:
+                self.buffer = io.BytesIO()
+                self.buffer.write(self.decoder.head)
+                self.decoder = None
+            else:
+                self.n_samples += samples.size
+                self.extractor.push(samples)
+                return
+        else:
+            self.buffer.write(raw)
+
+        if self.buffer.tell() > MAX_BUFFERED_BYTES:
+            raise StopUpload(connection_reset=False)
+
+    def features(self):
+        """
+        (52-dim feature vector, duration in seconds).
+        For buffered uploads this decodes the clip, so call it from the pool.
+        """
+        from train_province_mfcc_baseline import TARGET_SR
+
+        if self.streamed:
+            if self.extractor.delta_stats.count == 0:
+                raise ValueError("audio too short to score")
+            return self.extractor.features(), self.n_samples / TARGET_SR
+
+        from audio_loader import load_audio
+        from predict_long_recording import frame_features, window_features
+
+        try:
+            y, sr = load_audio(self.buffer, sr=TARGET_SR)
+        except Exception as e:
+            raise ValueError(f"could not decode audio: {e}")
+        if y.size == 0:
+            raise ValueError("audio is empty")
+
+        mfcc, delta = frame_features(y, sr)
+        x = window_features(mfcc, delta, np.array([0]), mfcc.shape[1])[0]
+        return x, y.size / sr
+
+
+class PredictionUploadHandler(FileUploadHandler):
+    """
+    Upload handler that decodes the audio field chunk by chunk instead of
+    writing it to memory or a temporary file. Other file fields are dropped.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.upload = None
+        self.too_large = False
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.upload = DecodedUpload(self.file_name) if field_name == UPLOAD_FIELD else None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload is not None:
+            try:
+                self.upload.feed(raw_data)
+            except StopUpload:
+                self.too_large = True
+                raise
+        return None
+
+    def file_complete(self, file_size):
+        return self.upload
+
+
+def prepare_upload(upload: DecodedUpload):
+    """
+    (feature vector, duration, labels) for one upload; also makes sure the
+    model is loaded. Runs in the predictor pool.
+    """
+    x, duration = upload.features()
+    _, labels = get_model()
+    return x, duration, labels
+
+
+def score_batch(X: np.ndarray) -> np.ndarray:
+    model, _ = get_model()
+    return model.predict_proba(X)
+
+
+def get_batcher() -> MicroBatcher:
+    return batcher_for_loop(lambda: MicroBatcher(
+        score_batch,
+        max_batch_size=settings.ACCENT_BATCH_MAX_SIZE,
+        max_wait_ms=settings.ACCENT_BATCH_MAX_WAIT_MS,
+        executor=predictor_executor(),
+    ))
+
+
+def prediction_result(probs, labels, duration: float, streamed: bool):
+    best = int(np.argmax(probs))
+    return {
+        "province": labels[best],
+        "confidence": float(probs[best]),
+        "probs": dict(zip(labels, map(float, probs))),
+        "duration_sec": duration,
+        "streamed": streamed,
+    }
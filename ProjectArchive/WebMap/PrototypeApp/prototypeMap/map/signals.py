@@ -0,0 +1,42 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .aggregates import record_points
+from .models import AccentPoint
+
+
+# Keep the map aggregates in step with AccentPoint inserts and deletes.
+# bulk_create bypasses post_save, so bulk loaders call record_points themselves;
+# bulk deletes run inside suspended_aggregate_signals() and do the same.
+# Edits to an existing point's location/province need rebuild_aggregates.
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended_aggregate_signals():
+    """Skip the per-row aggregate updates; the caller applies record_points in bulk."""
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = False
+
+
+def _suspended():
+    return getattr(_state, "suspended", False)
+
+
+@receiver(post_save, sender=AccentPoint)
+def add_point_to_aggregates(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and not _suspended():
+        record_points([(instance.location.x, instance.location.y, instance.province, instance.constituency)])
+
+
+@receiver(post_delete, sender=AccentPoint)
+def remove_point_from_aggregates(sender, instance, **kwargs):
+    if not _suspended():
+        record_points([(instance.location.x, instance.location.y, instance.province, instance.constituency)], sign=-1)
@@ -1,3 +1,657 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+import numpy as np
+import soundfile as sf
+
+from django.contrib.gis.geos import Point
+from django.db.models import Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .aggregates import AGGREGATE_ZOOMS, cell_for, rebuild_aggregates
+from .batching import MicroBatcher
+from .geocoding import constituencies_for
+from .history import refresh_rollups, rotate_history
+from .jobs import claim_next_job, requeue_stale_jobs, run_job
+from .ingest import PROVINCE_CENTRES, clean_record, ingest_predictions
+from .management.commands.ingest_predictions import record_from_row
+from .predictor import DecodedUpload, scripts_on_path
+from .middleware import BrotliMiddleware, brotli
+from .models import (
+    AccentPoint,
+    AccentPointArchive,
+    ConstituencyCount,
+    DailyProvinceRollup,
+    GridCell,
+    PredictionJob,
+    ProvinceCount,
+)
+from .views import DELTA_SCALE, MAX_POINT_PAGES, delta_decode, delta_encode
+
+# Roughly the island of Ireland
+IRELAND_BBOX = "-10.7,51.3,-5.3,55.5"
+
+
+def make_point(lon, lat, **kwargs):
+    return AccentPoint.objects.create(location=Point(lon, lat, srid=4326), **kwargs)
+
+
+class PointsGeoJSONTests(TestCase):
+    def get_points(self, **params):
+        return self.client.get(reverse("map-points"), params)
+
+    def test_returns_only_points_inside_bbox(self):
+        dublin = make_point(-6.26, 53.35)
+        make_point(2.35, 48.86)  # Paris
+
+        response = self.get_points(bbox=IRELAND_BBOX)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["type"], "FeatureCollection")
+        self.assertEqual([f["id"] for f in data["features"]], [dublin.id])
+        self.assertEqual(data["features"][0]["geometry"]["coordinates"], [-6.26, 53.35])
+        self.assertIsNone(data["next"])
+
+    def test_keyset_pagination_walks_all_points_newest_first(self):
+        ids = [make_point(-8.0 + i * 0.01, 53.0).id for i in range(5)]
+
+        first = self.get_points(bbox=IRELAND_BBOX, limit=2).json()
+        second = self.get_points(bbox=IRELAND_BBOX, limit=2, before=first["next"]).json()
+        third = self.get_points(bbox=IRELAND_BBOX, limit=2, before=second["next"]).json()
+
+        seen = [f["id"] for page in (first, second, third) for f in page["features"]]
+        self.assertEqual(seen, sorted(ids, reverse=True))
+        self.assertIsNone(third["next"])
+
+    def test_time_window(self):
+        old = make_point(-8.0, 53.0)
+        AccentPoint.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=2))
+        recent = make_point(-8.1, 53.1)
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        data = self.get_points(bbox=IRELAND_BBOX, since=since).json()
+
+        self.assertEqual([f["id"] for f in data["features"]], [recent.id])
+
+    def test_bad_parameters_are_rejected(self):
+        self.assertEqual(self.get_points().status_code, 400)
+        self.assertEqual(self.get_points(bbox="1,2,3").status_code, 400)
+        self.assertEqual(self.get_points(bbox="-5,54,-6,55").status_code, 400)
+        self.assertEqual(self.get_points(bbox=IRELAND_BBOX, since="yesterday").status_code, 400)
+
+    def test_map_page_does_not_inline_points(self):
+        make_point(-6.26, 53.35)
+
+        response = self.client.get(reverse("map-page"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("points", response.context)
+        self.assertContains(response, f"var maxPointPages = {MAX_POINT_PAGES};")
+
+
+class GridCellMathTests(SimpleTestCase):
+    def test_whole_world_at_zoom_zero_is_four_by_four(self):
+        self.assertEqual(cell_for(-180, 85, 0), (0, 0))
+        self.assertEqual(cell_for(180, -85, 0), (3, 3))
+
+    def test_cells_nest_across_zooms(self):
+        for zoom in AGGREGATE_ZOOMS[:-1]:
+            x, y = cell_for(-6.26, 53.35, zoom + 1)
+            self.assertEqual(cell_for(-6.26, 53.35, zoom), (x // 2, y // 2))
+
+
+class AggregateTests(TestCase):
+    def get_cells(self, **params):
+        return self.client.get(reverse("map-aggregates"), params)
+
+    def test_insert_updates_every_zoom_and_province(self):
+        make_point(-6.26, 53.35, province="Leinster")
+        make_point(-6.27, 53.34, province="Leinster")
+        make_point(-8.47, 51.90, province="Munster")
+
+        self.assertEqual(GridCell.objects.filter(zoom=0).count(), 2)
+        for zoom in AGGREGATE_ZOOMS:
+            total = sum(GridCell.objects.filter(zoom=zoom).values_list("count", flat=True))
+            self.assertEqual(total, 3)
+
+        leinster = ProvinceCount.objects.get(province="Leinster")
+        self.assertEqual(leinster.count, 2)
+        self.assertAlmostEqual(leinster.lon_sum / leinster.count, -6.265)
+
+    def test_delete_decrements(self):
+        point = make_point(-6.26, 53.35, province="Leinster")
+        make_point(-6.26, 53.35, province="Leinster")
+        point.delete()
+
+        self.assertEqual(ProvinceCount.objects.get(province="Leinster").count, 1)
+        self.assertEqual(set(GridCell.objects.values_list("count", flat=True)), {1})
+
+    def test_rebuild_matches_incremental(self):
+        for i in range(4):
+            make_point(-8.0 + i, 53.0, province="Connacht" if i % 2 else "Ulster")
+        before = sorted(GridCell.objects.values_list("zoom", "x", "y", "province", "count"))
+
+        rebuild_aggregates(batch_size=3)
+
+        after = sorted(GridCell.objects.values_list("zoom", "x", "y", "province", "count"))
+        self.assertEqual(before, after)
+
+    def test_grid_endpoint_merges_provinces_per_cell(self):
+        make_point(-6.26, 53.35, province="Leinster")
+        make_point(-6.25, 53.36, province="Ulster")
+        make_point(2.35, 48.86, province="Leinster")  # outside the bbox
+
+        data = self.get_cells(bbox=IRELAND_BBOX, zoom=5).json()
+
+        self.assertEqual(len(data["features"]), 1)
+        props = data["features"][0]["properties"]
+        self.assertEqual(props["count"], 2)
+        self.assertEqual(props["provinces"], {"Leinster": 1, "Ulster": 1})
+
+    def test_province_endpoint(self):
+        make_point(-6.26, 53.35, province="Leinster")
+
+        data = self.get_cells(level="province").json()
+
+        self.assertEqual([f["properties"] for f in data["features"]], [{"province": "Leinster", "count": 1}])
+
+    def test_constituency_counts_follow_inserts_deletes_and_rebuilds(self):
+        make_point(-6.26, 53.35, province="Leinster", constituency="Dublin Bay South")
+        point = make_point(-6.24, 53.33, province="Leinster", constituency="Dublin Bay South")
+        make_point(-8.47, 51.90, province="Munster", constituency="Cork South-Central")
+        make_point(-8.7, 52.3, province="Munster")  # province centre, no constituency
+        point.delete()
+
+        data = self.get_cells(level="constituency").json()
+        self.assertEqual(
+            [f["properties"] for f in data["features"]],
+            [{"constituency": "Cork South-Central", "count": 1}, {"constituency": "Dublin Bay South", "count": 1}],
+        )
+
+        before = sorted(ConstituencyCount.objects.filter(count__gt=0).values_list("constituency", "count"))
+        rebuild_aggregates(batch_size=2)
+        self.assertEqual(sorted(ConstituencyCount.objects.values_list("constituency", "count")), before)
+
+    def test_grid_endpoint_rejects_bad_params(self):
+        self.assertEqual(self.get_cells(bbox=IRELAND_BBOX).status_code, 400)
+        self.assertEqual(self.get_cells(level="county").status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def test_unchanged_points_give_304_until_a_point_is_added(self):
+        make_point(-6.26, 53.35)
+        url = reverse("map-points")
+
+        first = self.client.get(url, {"bbox": IRELAND_BBOX})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        again = self.client.get(url, {"bbox": IRELAND_BBOX}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        make_point(-6.27, 53.36)
+        changed = self.client.get(url, {"bbox": IRELAND_BBOX}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_delete_changes_etag(self):
+        point = make_point(-6.26, 53.35)
+        make_point(-6.27, 53.36)
+        first = self.client.get(reverse("map-aggregates"), {"level": "province"})
+
+        point.delete()
+        after = self.client.get(reverse("map-aggregates"), {"level": "province"}, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(after.status_code, 200)
+
+    def test_delta_format_round_trips(self):
+        ids = [make_point(-6.26 + i * 0.001, 53.35 - i * 0.002).id for i in range(3)]
+
+        data = self.client.get(reverse("map-points"), {"bbox": IRELAND_BBOX, "format": "delta"}).json()
+
+        self.assertEqual(delta_decode(data["ids"]), sorted(ids, reverse=True))
+        lons = [v / DELTA_SCALE for v in delta_decode(data["lon"])]
+        self.assertAlmostEqual(lons[0], -6.26 + 2 * 0.001, places=5)
+
+
+class CompactPayloadTests(SimpleTestCase):
+    def test_delta_encoding(self):
+        values = [905, 903, 880, 10]
+        self.assertEqual(delta_encode(values), [905, -2, -23, -870])
+        self.assertEqual(delta_decode(delta_encode(values)), values)
+
+    def test_brotli_only_when_accepted(self):
+        if brotli is None:
+            self.skipTest("brotli not installed")
+
+        body = b'{"features": []}' * 100
+        middleware = BrotliMiddleware(lambda request: HttpResponse(body, content_type="application/json"))
+        factory = RequestFactory()
+
+        plain = middleware(factory.get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        compressed = middleware(factory.get("/", HTTP_ACCEPT_ENCODING="gzip, deflate, br"))
+        self.assertEqual(compressed["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(compressed.content), body)
+
+    def test_brotli_runs_in_async_chains(self):
+        if brotli is None:
+            self.skipTest("brotli not installed")
+
+        body = b'{"features": []}' * 100
+
+        async def view(request):
+            return HttpResponse(body, content_type="application/json")
+
+        middleware = BrotliMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        response = asyncio.run(middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="br")))
+        self.assertEqual(brotli.decompress(response.content), body)
+
+    def test_brotli_skips_html(self):
+        if brotli is None:
+            self.skipTest("brotli not installed")
+
+        body = b"<html>csrfmiddlewaretoken</html>" * 100
+        middleware = BrotliMiddleware(lambda request: HttpResponse(body, content_type="text/html; charset=utf-8"))
+        response = middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="br"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, body)
+
+
+class CleanRecordTests(SimpleTestCase):
+    def test_missing_coordinates_use_province_centre(self):
+        row = clean_record({"province": "Munster", "confidence": "0.8", "clip_id": "a"})
+        self.assertEqual((row["lat"], row["lon"]), PROVINCE_CENTRES["Munster"])
+        self.assertEqual(row["confidence"], 0.8)
+
+    def test_unusable_records_raise(self):
+        with self.assertRaises(ValueError):
+            clean_record({"province": "Atlantis"})
+        with self.assertRaises(ValueError):
+            clean_record({"lat": 95, "lon": 0})
+
+    def test_predict_csv_row(self):
+        record = record_from_row({
+            "segment_file": "/data/segments/vid1_seg003.wav",
+            "predicted_province": "Ulster",
+            "confidence": "0.61",
+            "status": "ok",
+        })
+        self.assertEqual(record["clip_id"], "vid1_seg003")
+        self.assertEqual(record["province"], "Ulster")
+
+
+class IngestTests(TestCase):
+    def test_bulk_ingest_dedupes_by_clip_id(self):
+        make_point(-6.26, 53.35, clip_id="seen")
+        records = [
+            {"lat": 53.3, "lon": -6.2, "province": "Leinster", "confidence": 0.9, "clip_id": "a"},
+            {"lat": 53.3, "lon": -6.2, "province": "Leinster", "confidence": 0.9, "clip_id": "a"},
+            {"province": "Ulster", "clip_id": "b"},
+            {"province": "Leinster", "clip_id": "seen"},
+            {"province": "Atlantis", "clip_id": "c"},
+        ]
+
+        result = ingest_predictions(records, chunk_size=1)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(result["duplicates"], 2)
+        self.assertEqual([i for i, _ in result["invalid"]], [4])
+        self.assertEqual(AccentPoint.objects.get(clip_id="b").province, "Ulster")
+
+    def test_bulk_ingest_updates_aggregates(self):
+        records = [{"province": "Connacht", "clip_id": str(i), "lat": 53.0 + i * 0.01, "lon": -9.0} for i in range(50)]
+
+        ingest_predictions(records)
+
+        self.assertEqual(ProvinceCount.objects.get(province="Connacht").count, 50)
+        counts = GridCell.objects.filter(zoom=12, province="Connacht").values_list("count", flat=True)
+        self.assertEqual(sum(counts), 50)
+
+    @override_settings(MAP_INGEST_TOKEN="secret")
+    def test_api_requires_token(self):
+        body = json.dumps({"records": [{"province": "Leinster", "clip_id": "x"}]})
+        url = reverse("map-ingest")
+
+        denied = self.client.post(url, body, content_type="application/json", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(denied.status_code, 403)
+
+        ok = self.client.post(url, body, content_type="application/json", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(ok.json(), {"created": 1, "duplicates": 0, "invalid": []})
+
+
+def tone_wav(seconds=3.0, sr=16000, fmt="WAV", subtype="PCM_16"):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(t.size)).astype(np.float32)
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format=fmt, subtype=subtype)
+    return buf.getvalue()
+
+
+class DecodedUploadTests(SimpleTestCase):
+    def offline_features(self, data):
+        scripts_on_path()
+        from train_province_mfcc_baseline import mfcc_features
+
+        with tempfile.NamedTemporaryFile(suffix=".wav") as f:
+            f.write(data)
+            f.flush()
+            return mfcc_features(f.name)
+
+    def feed(self, data, chunk=1000):
+        upload = DecodedUpload("clip")
+        for i in range(0, len(data), chunk):
+            upload.feed(data[i:i + chunk])
+        return upload
+
+    def test_wav_streams_without_buffering(self):
+        data = tone_wav()
+        upload = self.feed(data, chunk=777)
+
+        x, duration = upload.features()
+
+        self.assertTrue(upload.streamed)
+        self.assertAlmostEqual(duration, 3.0)
+        ref = self.offline_features(data)
+        # Streaming dB floor follows the running max; everything else matches
+        self.assertLess(np.abs(x - ref).max(), 0.01 * np.abs(ref).max())
+
+    def test_other_formats_fall_back_to_librosa(self):
+        wav = tone_wav()
+        for data in (tone_wav(fmt="FLAC", subtype="PCM_16"), tone_wav(sr=22050)):
+            upload = self.feed(data)
+            x, _ = upload.features()
+            self.assertFalse(upload.streamed)
+            self.assertEqual(x.shape, (52,))
+        self.assertTrue(self.feed(wav).streamed)
+
+    def test_garbage_is_rejected(self):
+        upload = self.feed(b"not audio at all" * 100)
+        with self.assertRaises(ValueError):
+            upload.features()
+
+
+def save_tiny_model(model_root):
+    """A small two-province forest saved like train_province_mfcc_baseline.py does."""
+    scripts_on_path()
+    from sklearn.ensemble import RandomForestClassifier
+    from province_model_store import save_province_model
+    from train_province_mfcc_baseline import feature_config
+
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((40, 52))
+    y = np.array(["Munster", "Ulster"] * 20)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    save_province_model(model, list(model.classes_), feature_config(), model_root)
+
+
+class TinyModelTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model_root = tempfile.TemporaryDirectory()
+        save_tiny_model(cls.model_root.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model_root.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        import map.predictor
+
+        map.predictor._model = None
+        override = override_settings(ACCENT_MODEL_DIR=self.model_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(setattr, map.predictor, "_model", None)
+
+
+class PredictUploadTests(TinyModelTestCase):
+    def test_upload_creates_point_at_province_centre(self):
+        response = self.client.post(reverse("map-predict"), {"audio": SimpleUploadedFile("clip.wav", tone_wav())})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn(data["province"], ("Munster", "Ulster"))
+        self.assertTrue(data["streamed"])
+        point = AccentPoint.objects.get(id=data["id"])
+        self.assertEqual((point.location.y, point.location.x), PROVINCE_CENTRES[data["province"]])
+
+    def test_missing_file(self):
+        response = self.client.post(reverse("map-predict"), {"other": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_requests_share_batches(self):
+        calls = []
+
+        def score(X):
+            calls.append(len(X))
+            return X * 2
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=50)
+            results = await asyncio.gather(*[batcher.submit(np.array([i, i])) for i in range(10)])
+            return batcher, results
+
+        batcher, results = asyncio.run(run())
+
+        self.assertEqual(calls, [4, 4, 2])
+        self.assertEqual([r.tolist() for r in results], [[2 * i, 2 * i] for i in range(10)])
+        self.assertEqual(batcher.metrics()["mean_batch_size"], round(10 / 3, 2))
+        self.assertEqual(batcher.metrics()["queue_depth"], 0)
+
+    def test_lone_request_waits_at_most_max_wait(self):
+        async def run():
+            batcher = MicroBatcher(lambda X: X, max_batch_size=32, max_wait_ms=20)
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            await batcher.submit(np.zeros(3))
+            return loop.time() - t0
+
+        self.assertLess(asyncio.run(run()), 0.5)
+
+    def test_errors_reach_every_caller(self):
+        def score(X):
+            raise RuntimeError("model failed")
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=5)
+            return await asyncio.gather(*[batcher.submit(np.zeros(2)) for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+
+class PredictionJobTests(TinyModelTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def submit(self, seconds=40.0):
+        response = self.client.post(reverse("map-jobs"), {"audio": SimpleUploadedFile("long.wav", tone_wav(seconds))})
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def test_submit_claim_score_poll(self):
+        submitted = self.submit()
+        self.assertEqual(self.client.get(submitted["status_url"]).json()["status"], "queued")
+
+        job = claim_next_job("worker-1")
+        self.assertEqual((job.id, job.status, job.attempts), (submitted["id"], "running", 1))
+        self.assertIsNone(claim_next_job("worker-2"))
+
+        run_job(job)
+
+        status = self.client.get(submitted["status_url"]).json()
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["result"]["n_windows"], 2)
+        self.assertEqual(AccentPoint.objects.get(id=status["point_id"]).province, status["result"]["province"])
+        self.assertFalse(PredictionJob.objects.get(id=job.id).audio)
+
+    def test_jobs_are_claimed_oldest_first(self):
+        first, second = self.submit(2.0), self.submit(2.0)
+        self.assertEqual(claim_next_job("w").id, first["id"])
+        self.assertEqual(claim_next_job("w").id, second["id"])
+
+    def test_bad_audio_fails_job(self):
+        job = PredictionJob.objects.create(audio=SimpleUploadedFile("bad.wav", b"not audio"))
+        run_job(claim_next_job("w"))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertTrue(job.error)
+
+    def test_stale_running_jobs_are_requeued_then_failed(self):
+        self.submit(2.0)
+        job = claim_next_job("crashed")
+        hour_ago = timezone.now() - timedelta(hours=1)
+        PredictionJob.objects.filter(id=job.id).update(started_at=hour_ago, heartbeat_at=hour_ago)
+
+        self.assertEqual(requeue_stale_jobs(stale_seconds=60, max_attempts=2), (1, 0))
+        claim_next_job("crashed-again")
+        PredictionJob.objects.filter(id=job.id).update(started_at=hour_ago, heartbeat_at=hour_ago)
+        self.assertEqual(requeue_stale_jobs(stale_seconds=60, max_attempts=2), (0, 1))
+
+    def test_long_job_with_live_heartbeat_is_not_requeued(self):
+        self.submit(2.0)
+        job = claim_next_job("slow")
+        PredictionJob.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(stale_seconds=60, max_attempts=2), (0, 0))
+        self.assertEqual(PredictionJob.objects.get(id=job.id).status, "running")
+
+    def test_requeued_job_is_not_overwritten_by_its_old_worker(self):
+        self.submit(2.0)
+        lost = claim_next_job("slow")
+        PredictionJob.objects.filter(id=lost.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        requeue_stale_jobs(stale_seconds=60, max_attempts=3)
+        current = claim_next_job("fresh")
+
+        run_job(lost)
+
+        current.refresh_from_db()
+        self.assertEqual((current.status, current.worker, current.attempts), ("running", "fresh", 2))
+        self.assertIsNone(current.point)
+        self.assertFalse(AccentPoint.objects.exists())
+        self.assertTrue(current.audio)
+
+
+class HistoryTests(TestCase):
+    def make_aged_point(self, days_old, province="Leinster", confidence=0.5, **kwargs):
+        point = make_point(-6.26, 53.35, province=province, confidence=confidence, **kwargs)
+        AccentPoint.objects.filter(id=point.id).update(created_at=timezone.now() - timedelta(days=days_old))
+        return point
+
+    def test_rotation_archives_old_points_and_keeps_rollups(self):
+        old = self.make_aged_point(400, confidence=0.9, constituency="Dublin Bay South")
+        self.make_aged_point(400, province="Munster")
+        recent = self.make_aged_point(1, constituency="Dublin Bay South")
+
+        result = rotate_history(retention_days=365, archive_retention_days=None)
+
+        self.assertEqual(result["archived"], 2)
+        self.assertEqual(list(AccentPoint.objects.values_list("id", flat=True)), [recent.id])
+        self.assertEqual(AccentPointArchive.objects.get(point_id=old.id).confidence, 0.9)
+        # Archived points leave the map aggregates
+        self.assertEqual(ProvinceCount.objects.get(province="Leinster").count, 1)
+        self.assertEqual(ProvinceCount.objects.get(province="Munster").count, 0)
+        self.assertEqual(ConstituencyCount.objects.get(constituency="Dublin Bay South").count, 1)
+
+        old_day = (timezone.now() - timedelta(days=400)).date()
+        rollups = DailyProvinceRollup.objects.filter(day=old_day)
+        self.assertEqual(sorted(rollups.values_list("province", "count")), [("Leinster", 1), ("Munster", 1)])
+
+    def test_archive_retention_purges(self):
+        self.make_aged_point(800)
+        self.make_aged_point(400)
+
+        result = rotate_history(retention_days=365, archive_retention_days=730)
+
+        self.assertEqual((result["archived"], result["purged"]), (2, 1))
+        self.assertEqual(AccentPointArchive.objects.count(), 1)
+        self.assertEqual(DailyProvinceRollup.objects.aggregate(n=Sum("count"))["n"], 2)
+
+    def test_archived_clip_is_not_ingested_again(self):
+        self.make_aged_point(400, clip_id="clip-1")
+        rotate_history(retention_days=365, archive_retention_days=None)
+
+        result = ingest_predictions([{"clip_id": "clip-1", "province": "Leinster", "lat": 53.35, "lon": -6.26}])
+
+        self.assertEqual((result["created"], result["duplicates"]), (0, 1))
+        self.assertFalse(AccentPoint.objects.exists())
+        self.assertEqual(ProvinceCount.objects.get(province="Leinster").count, 0)
+
+    def test_refresh_is_idempotent_and_incremental(self):
+        self.make_aged_point(3, confidence=0.4)
+        self.make_aged_point(0, confidence=0.6)
+
+        refresh_rollups()
+        refresh_rollups()
+        make_point(-6.26, 53.35, province="Leinster", confidence=0.8)
+        refresh_rollups()
+
+        today = DailyProvinceRollup.objects.get(day=timezone.now().date())
+        self.assertEqual(today.count, 2)
+        self.assertAlmostEqual(today.confidence_sum, 1.4)
+        self.assertEqual(DailyProvinceRollup.objects.count(), 2)
+
+
+def write_boundaries(path):
+    """Two square 'constituencies' side by side over Dublin."""
+    def square(x0):
+        return [[[x0, 53.0], [x0 + 0.5, 53.0], [x0 + 0.5, 53.5], [x0, 53.5], [x0, 53.0]]]
+
+    features = [
+        {"type": "Feature", "properties": {"constituency": name}, "geometry": {"type": "Polygon", "coordinates": square(x0)}}
+        for name, x0 in (("Dublin West", -6.7), ("Dublin Bay South", -6.2))
+    ]
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    return path
+
+
+class GeocodingTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.boundaries = write_boundaries(f"{tmp.name}/constituencies.geojson")
+
+    def test_lookup_without_boundary_file_is_blank(self):
+        with override_settings(ACCENT_CONSTITUENCY_BOUNDARIES="/nonexistent.geojson"):
+            self.assertEqual(constituencies_for([-6.26], [53.35]), [""])
+
+    def test_ingest_labels_only_placed_points(self):
+        records = [
+            {"lat": 53.35, "lon": -6.1, "province": "Leinster", "clip_id": "placed"},
+            {"lat": 53.35, "lon": -6.6, "province": "Leinster", "clip_id": "west"},
+            {"province": "Leinster", "clip_id": "centre"},
+        ]
+        with override_settings(ACCENT_CONSTITUENCY_BOUNDARIES=self.boundaries):
+            ingest_predictions(records)
+
+        labels = dict(AccentPoint.objects.values_list("clip_id", "constituency"))
+        self.assertEqual(labels, {"placed": "Dublin Bay South", "west": "Dublin West", "centre": ""})
+
+    def test_map_form_labels_point(self):
+        with override_settings(ACCENT_CONSTITUENCY_BOUNDARIES=self.boundaries):
+            self.client.post(reverse("map-page"), {"latitude": 53.35, "longitude": -6.1})
+
+        self.assertEqual(AccentPoint.objects.get().constituency, "Dublin Bay South")
@@ -1,6 +1,22 @@
 from django.urls import path
-from .views import map_view
+from .views import (
+    aggregates_geojson,
+    ingest_view,
+    job_detail,
+    map_view,
+    points_geojson,
+    predict_metrics,
+    predict_upload,
+    submit_job,
+)
 
 urlpatterns = [
     path("", map_view, name="map-page"),
+    path("points/", points_geojson, name="map-points"),
+    path("aggregates/", aggregates_geojson, name="map-aggregates"),
+    path("ingest/", ingest_view, name="map-ingest"),
+    path("predict/", predict_upload, name="map-predict"),
+    path("predict/metrics/", predict_metrics, name="map-predict-metrics"),
+    path("jobs/", submit_job, name="map-jobs"),
+    path("jobs/<int:job_id>/", job_detail, name="map-job"),
 ]
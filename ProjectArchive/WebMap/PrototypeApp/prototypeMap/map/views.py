@@ -1,7 +1,75 @@
+import asyncio
+import hmac
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.contrib.gis.geos import Point
-from .models import AccentPoint
+from django.urls import reverse
+from django.contrib.gis.geos import Point, Polygon
+from django.db.models import Max, Sum
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from .models import AccentPoint, PredictionJob, ProvinceCount
 from .forms import CoordinateForm
+from .aggregates import AGGREGATE_ZOOMS, RAW_POINTS_MIN_ZOOM, cells_in_bbox, constituency_totals, province_totals
+from .geocoding import constituencies_for
+from .ingest import PROVINCE_CENTRES, ingest_predictions
+from .batching import all_metrics
+from .jobs import job_status
+from .predictor import (
+    UPLOAD_FIELD,
+    PredictionUploadHandler,
+    get_batcher,
+    prediction_result,
+    predictor_executor,
+    prepare_upload,
+)
+
+# Page size for the points endpoint (the client follows "next" for more)
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Pages the map page follows per viewport at raw-point zoom (at most
+# MAX_POINT_PAGES * DEFAULT_PAGE_SIZE markers, the newest points first)
+MAX_POINT_PAGES = 4
+
+# Compact point format: coordinates as integers in units of 1e-5 degrees (~1 m)
+DELTA_SCALE = 100_000
+
+
+def point_state(request):
+    """
+    (latest created_at, max id, count) of AccentPoint, computed once per request.
+    Any insert moves the first two; a delete changes the count.
+    All three are index lookups; the count comes from the maintained province totals.
+    """
+    if not hasattr(request, "_accent_point_state"):
+        state = AccentPoint.objects.aggregate(latest=Max("created_at"), max_id=Max("id"))
+        state["n"] = ProvinceCount.objects.aggregate(n=Sum("count"))["n"] or 0
+        request._accent_point_state = state
+    return request._accent_point_state
+
+
+def points_etag(request, *args, **kwargs):
+    state = point_state(request)
+    latest = state["latest"].isoformat() if state["latest"] else ""
+    return f"{latest}|{state['max_id'] or 0}|{state['n']}"
+
+
+def points_last_modified(request, *args, **kwargs):
+    return point_state(request)["latest"]
+
+
+# Data endpoints answer repeat requests with 304 until a point is added or removed;
+# no-cache makes browsers and pollers revalidate rather than reuse stale data
+points_conditional = condition(etag_func=points_etag, last_modified_func=points_last_modified)
+
 
 def map_view(request):
     form = CoordinateForm()
@@ -13,14 +81,318 @@ def map_view(request):
             lon = form.cleaned_data["longitude"]
 
             AccentPoint.objects.create(
-                location=Point(lon, lat)
+                location=Point(lon, lat),
+                constituency=constituencies_for([lon], [lat])[0],
             )
             return redirect("map-page")
 
-    last_points = AccentPoint.objects.order_by("-created_at")[:5]
-
+    # Points are no longer inlined; the page fetches them per viewport from points_geojson
     return render(request, "map/map.html", {
         "form": form,
-        "points": last_points,
+        "raw_points_min_zoom": RAW_POINTS_MIN_ZOOM,
+        "max_point_pages": MAX_POINT_PAGES,
+    })
+
+
+def parse_bbox(value):
+    """
+    "min_lon,min_lat,max_lon,max_lat" -> Polygon (SRID 4326), clamped to valid lon/lat.
+    Raises ValueError on anything malformed.
+    """
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox needs 4 numbers: min_lon,min_lat,max_lon,max_lat")
+
+    # Leaflet reports longitudes past +-180 when zoomed out over a wrapped world
+    min_lon, max_lon = max(parts[0], -180.0), min(parts[2], 180.0)
+    min_lat, max_lat = max(parts[1], -90.0), min(parts[3], 90.0)
+    if not (min_lon < max_lon and min_lat < max_lat):
+        raise ValueError("bbox min must be below max")
+
+    bbox = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+    bbox.srid = 4326
+    return bbox
+
+
+def delta_encode(values):
+    """[a, b, c] -> [a, b - a, c - b]: small numbers that compress well."""
+    out, prev = [], 0
+    for v in values:
+        out.append(v - prev)
+        prev = v
+    return out
+
+
+def delta_decode(deltas):
+    out, total = [], 0
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+def compact_points(rows):
+    """
+    Delta-encoded columns for a page of (id, location, created_at) rows:
+      ids: delta-encoded ids
+      lon, lat: delta-encoded integers in 1/DELTA_SCALE degrees
+    created_at is left out; use the GeoJSON format when it is needed.
+    """
+    return {
+        "ids": delta_encode([pk for pk, _, _ in rows]),
+        "lon": delta_encode([round(loc.x * DELTA_SCALE) for _, loc, _ in rows]),
+        "lat": delta_encode([round(loc.y * DELTA_SCALE) for _, loc, _ in rows]),
+    }
+
+
+@cache_control(no_cache=True)
+@points_conditional
+def points_geojson(request):
+    """
+    GeoJSON FeatureCollection of AccentPoints in a viewport.
+
+    Query params:
+      bbox   min_lon,min_lat,max_lon,max_lat (required)
+      since  ISO datetime, only points created at/after this (optional)
+      until  ISO datetime, only points created before this (optional)
+      limit  page size (default 500, max 5000)
+      before keyset cursor: only ids below this (use "next" from the previous page)
+      format "geojson" (default) or "delta" (see compact_points)
+
+    Newest first. The bbox filter uses the spatial index on location;
+    paging by id keeps every page an index range scan, however deep.
+    """
+    fmt = request.GET.get("format", "geojson")
+    if fmt not in ("geojson", "delta"):
+        return JsonResponse({"error": "format must be geojson or delta"}, status=400)
+
+    try:
+        bbox = parse_bbox(request.GET.get("bbox", ""))
+        limit = min(int(request.GET.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        before = request.GET.get("before")
+        before = int(before) if before else None
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if limit < 1:
+        return JsonResponse({"error": "limit must be positive"}, status=400)
+
+    qs = AccentPoint.objects.filter(location__intersects=bbox)
+
+    for param, lookup in (("since", "created_at__gte"), ("until", "created_at__lt")):
+        raw = request.GET.get(param)
+        if not raw:
+            continue
+        when = parse_datetime(raw)
+        if when is None:
+            return JsonResponse({"error": f"{param} must be an ISO datetime"}, status=400)
+        qs = qs.filter(**{lookup: when})
+
+    if before is not None:
+        qs = qs.filter(id__lt=before)
+
+    rows = list(qs.order_by("-id").values_list("id", "location", "created_at")[:limit])
+    next_cursor = rows[-1][0] if len(rows) == limit else None
+
+    if fmt == "delta":
+        return JsonResponse({"format": "delta", "scale": DELTA_SCALE, **compact_points(rows), "next": next_cursor})
+
+    features = [
+        {
+            "type": "Feature",
+            "id": pk,
+            "geometry": {"type": "Point", "coordinates": [loc.x, loc.y]},
+            "properties": {"created_at": created.isoformat()},
+        }
+        for pk, loc, created in rows
+    ]
+
+    return JsonResponse({
+        "type": "FeatureCollection",
+        "features": features,
+        "next": next_cursor,
+    })
+
+
+@cache_control(no_cache=True)
+@points_conditional
+def aggregates_geojson(request):
+    """
+    GeoJSON FeatureCollection of precomputed aggregates for low zoom levels.
+
+    Query params:
+      level  "grid" (default), "province" or "constituency"
+      bbox   min_lon,min_lat,max_lon,max_lat (required for grid)
+      zoom   map zoom level (required for grid; clamped to the aggregated levels)
+
+    Each feature sits at the mean position of its points and carries
+    count and a per-province breakdown. The number of grid features is bounded
+    by the viewport size in cells, not by how many points are stored.
+    """
+    level = request.GET.get("level", "grid")
+
+    if level == "province":
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [row["lon"], row["lat"]]},
+                "properties": {"province": row["province"], "count": row["count"]},
+            }
+            for row in province_totals()
+        ]
+        return JsonResponse({"type": "FeatureCollection", "features": features})
+
+    if level == "constituency":
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [row["lon"], row["lat"]]},
+                "properties": {"constituency": row["constituency"], "count": row["count"]},
+            }
+            for row in constituency_totals()
+        ]
+        return JsonResponse({"type": "FeatureCollection", "features": features})
+
+    if level != "grid":
+        return JsonResponse({"error": "level must be grid, province or constituency"}, status=400)
+
+    try:
+        bbox = parse_bbox(request.GET.get("bbox", ""))
+        zoom = int(request.GET.get("zoom", ""))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    zoom = min(max(zoom, AGGREGATE_ZOOMS[0]), AGGREGATE_ZOOMS[-1])
+
+    features = [
+        {
+            "type": "Feature",
+            "id": f"{zoom}/{cell['x']}/{cell['y']}",
+            "geometry": {"type": "Point", "coordinates": [cell["lon"], cell["lat"]]},
+            "properties": {"count": cell["count"], "provinces": cell["provinces"]},
+        }
+        for cell in cells_in_bbox(zoom, *bbox.extent)
+    ]
+
+    return JsonResponse({
+        "type": "FeatureCollection",
+        "zoom": zoom,
+        "raw_points_min_zoom": RAW_POINTS_MIN_ZOOM,
+        "features": features,
+    })
+
+
+# Cap on records per ingest request; larger backfills go through the ingest_predictions command
+MAX_INGEST_RECORDS = 50_000
+
+
+@csrf_exempt
+@require_POST
+def ingest_view(request):
+    """
+    Bulk prediction upload for batch jobs.
+
+    POST JSON {"records": [{lat, lon, province, confidence, clip_id}, ...]}
+    with "Authorization: Bearer <MAP_INGEST_TOKEN>". lat/lon may be omitted to
+    place the point at the province centre. Returns created/duplicates/invalid.
+    """
+    token = settings.MAP_INGEST_TOKEN
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not token or not hmac.compare_digest(supplied, token):
+        return JsonResponse({"error": "ingest not authorised"}, status=403)
+
+    try:
+        records = json.loads(request.body)["records"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "body must be JSON with a records list"}, status=400)
+
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        return JsonResponse({"error": "records must be a list of objects"}, status=400)
+    if len(records) > MAX_INGEST_RECORDS:
+        return JsonResponse({"error": f"at most {MAX_INGEST_RECORDS} records per request"}, status=413)
+
+    result = ingest_predictions(records)
+    return JsonResponse({
+        "created": result["created"],
+        "duplicates": result["duplicates"],
+        "invalid": [{"index": i, "error": reason} for i, reason in result["invalid"]],
     })
 
+
+@csrf_exempt
+@require_POST
+async def predict_upload(request):
+    """
+    Predict the province of an uploaded clip and add it to the map.
+
+    POST multipart/form-data with the clip in the "audio" field. The upload is
+    decoded while it is parsed (see map/predictor.py); parsing and scoring run
+    off the event loop, so concurrent uploads proceed in parallel. Creates an
+    AccentPoint at the predicted province's centre and returns the prediction.
+    Model scoring is micro-batched across concurrent uploads.
+    """
+    handler = PredictionUploadHandler(request)
+    request.upload_handlers = [handler]
+
+    # Multipart parsing feeds the decoder, which does real work; keep it in a worker thread
+    files = await sync_to_async(lambda: request.FILES, thread_sensitive=False)()
+
+    if handler.too_large:
+        return JsonResponse({"error": "upload too large"}, status=413)
+    upload = files.get(UPLOAD_FIELD)
+    if upload is None:
+        return JsonResponse({"error": f"no {UPLOAD_FIELD!r} file in upload"}, status=400)
+
+    loop = asyncio.get_running_loop()
+    try:
+        x, duration, labels = await loop.run_in_executor(predictor_executor(), prepare_upload, upload)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # Scored together with any other uploads that arrive within the batching window
+    probs = await get_batcher().submit(x)
+    result = prediction_result(probs, labels, duration, upload.streamed)
+
+    centre = PROVINCE_CENTRES.get(result["province"])
+    if centre is None:
+        # A label with no map position (e.g. a model trained on other classes) is returned unplotted
+        return JsonResponse({"id": None, **result})
+
+    lat, lon = centre
+    point = await AccentPoint.objects.acreate(
+        location=Point(lon, lat, srid=4326),
+        province=result["province"],
+        confidence=result["confidence"],
+    )
+
+    return JsonResponse({"id": point.id, "lat": lat, "lon": lon, **result})
+
+
+def predict_metrics(request):
+    """Micro-batching queue metrics for the upload predictor (queue depth, batch sizes, latency)."""
+    return JsonResponse(all_metrics())
+
+
+@csrf_exempt
+@require_POST
+def submit_job(request):
+    """
+    Queue a recording for background scoring (for long recordings that would
+    tie up a web worker). POST multipart with the clip in the "audio" field;
+    returns 202 with the job id and the URL to poll.
+    """
+    audio = request.FILES.get(UPLOAD_FIELD)
+    if audio is None:
+        return JsonResponse({"error": f"no {UPLOAD_FIELD!r} file in upload"}, status=400)
+
+    job = PredictionJob.objects.create(audio=audio)
+    return JsonResponse(
+        {"id": job.id, "status": job.status, "status_url": reverse("map-job", args=[job.id])},
+        status=202,
+    )
+
+
+def job_detail(request, job_id):
+    """Status of a prediction job; result and point_id are filled in once it is done."""
+    job = get_object_or_404(PredictionJob, id=job_id)
+    return JsonResponse(job_status(job))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compression: brotli for JSON map data when the client accepts it, otherwise gzip
+    'django.middleware.gzip.GZipMiddleware',
+    'map.middleware.BrotliMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -123,7 +127,38 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (audio waiting in the prediction job queue)
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Bearer token for POST /map/ingest/ (bulk prediction upload); the endpoint is disabled when empty
+MAP_INGEST_TOKEN = os.environ.get('MAP_INGEST_TOKEN', '')
+
+# Province model used by the upload prediction endpoint (POST /map/predict/).
+# The feature/model code lives with the training scripts in Prototype2/Scripts.
+ACCENT_SCRIPTS_DIR = os.environ.get('ACCENT_SCRIPTS_DIR', str(BASE_DIR.parents[3] / 'Prototype2' / 'Scripts'))
+ACCENT_MODEL_DIR = os.environ.get('ACCENT_MODEL_DIR', str(BASE_DIR.parents[3] / 'Prototype2' / 'models' / 'province_rf'))
+# Constituency boundary GeoJSON used to label stored points (skipped if the file is missing)
+ACCENT_CONSTITUENCY_BOUNDARIES = os.environ.get(
+    'ACCENT_CONSTITUENCY_BOUNDARIES',
+    str(BASE_DIR.parents[3] / 'Prototype2' / 'MetaData' / 'constituency_boundaries.geojson'),
+)
+ACCENT_PREDICT_WORKERS = int(os.environ.get('ACCENT_PREDICT_WORKERS', '4'))
+
+# Micro-batching of upload scoring: rows per predict_proba call, and how long a request waits for others
+ACCENT_BATCH_MAX_SIZE = int(os.environ.get('ACCENT_BATCH_MAX_SIZE', '32'))
+ACCENT_BATCH_MAX_WAIT_MS = float(os.environ.get('ACCENT_BATCH_MAX_WAIT_MS', '10'))
+
+# Background prediction jobs (POST /map/jobs/, manage.py run_prediction_worker)
+ACCENT_JOB_MAX_ATTEMPTS = 3
+ACCENT_JOB_STALE_SECONDS = 600  # a running job with no heartbeat for this long is assumed orphaned and requeued
+ACCENT_JOB_HEARTBEAT_SECONDS = 30  # how often a worker refreshes the heartbeat of the job it is scoring
+
+# Prediction history (manage.py rotate_history): days kept in the hot AccentPoint table,
+# then in AccentPointArchive (None = keep archived points forever). Daily rollups are kept forever.
+ACCENT_POINT_RETENTION_DAYS = 365
+ACCENT_ARCHIVE_RETENTION_DAYS = None
@@ -0,0 +1,22 @@
+"""
+Settings for running the test suite on a local SpatiaLite database instead of PostGIS.
+
+    python manage.py test map --settings=prototypeMap.settings_test
+
+Needs the mod_spatialite SQLite extension (e.g. `brew install spatialite-tools`
+or `apt install libsqlite3-mod-spatialite`). Set SPATIALITE_LIBRARY_PATH if it
+is not on the default library path.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.contrib.gis.db.backends.spatialite',
+        'NAME': BASE_DIR / 'test_db.sqlite3',
+    }
+}
+
+SPATIALITE_LIBRARY_PATH = os.environ.get('SPATIALITE_LIBRARY_PATH', 'mod_spatialite')
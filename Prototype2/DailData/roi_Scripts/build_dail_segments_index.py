@@ -1,6 +1,13 @@
 import os
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+# Shared gazetteer lives with the other pipeline modules in Prototype2/Scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
+from gazetteer import provinces_for  # noqa: E402
+
 DAIL_META = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/DailSpeakers_CSV/final_dataset_all_copy.csv"
 DAIL_AUDIO_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/audio"   # CHANGE if needed
 OUT = "dail_segments_index.csv"
@@ -10,28 +17,51 @@ def extract_video_id_from_filename(name: str) -> str:
         return ""
     return name[:11]  # YouTube IDs are always 11 chars
 
-def find_real_file(video_id: str) -> str:
+def find_real_file(video_id: str, audio_dir: str = DAIL_AUDIO_DIR) -> str:
     if not video_id:
         return ""
 
-    for f in os.listdir(DAIL_AUDIO_DIR):
+    for f in os.listdir(audio_dir):
         if f.startswith(video_id):
-            return os.path.join(DAIL_AUDIO_DIR, f)
+            return os.path.join(audio_dir, f)
 
     return ""  # not found
 
-def main():
-    df = pd.read_csv(DAIL_META)
+def blank_to_na(s: pd.Series) -> pd.Series:
+    s = s.astype("string").str.strip()
+    return s.mask(s == "")
+
+
+def resolve_provinces(df: pd.DataFrame, columns=("native_province", "province")) -> pd.Series:
+    """
+    Province per row from the first non-blank of `columns`, else the
+    gazetteer province of the row's constituency (looked up once per name).
+    """
+    province = pd.Series(pd.NA, index=df.index, dtype="string")
+    for col in columns:
+        if col in df.columns:
+            province = province.fillna(blank_to_na(df[col]))
+    if "constituency" in df.columns:
+        province = province.fillna(provinces_for(df["constituency"]).astype("string"))
+    return province.fillna("")
+
+
+def main(meta_csv: str = DAIL_META, audio_dir: str = DAIL_AUDIO_DIR, out_path: str = OUT):
+    df = pd.read_csv(meta_csv)
 
     if "filename" not in df.columns:
         raise SystemExit("Missing 'filename' column")
 
     df["video_id"] = df["filename"].apply(extract_video_id_from_filename)
-    df["segment_file"] = df["video_id"].apply(find_real_file)
+    df["segment_file"] = df["video_id"].apply(find_real_file, audio_dir=audio_dir)
 
     missing = (df["segment_file"] == "").sum()
     print("Missing audio files:", int(missing))
 
+    native_province = resolve_provinces(df, ("native_province", "province"))
+    province = resolve_provinces(df, ("province", "native_province"))
+    print("Rows without a province:", int((province == "").sum()))
+
     out = pd.DataFrame({
         "segment_file": df["segment_file"],
         "video_id": df["video_id"],
@@ -45,7 +75,7 @@ def main():
 
         "native_city": df.get("native_city", ""),
         "native_county": df.get("native_county", ""),
-        "native_province": df.get("native_province", df.get("province", "")),
+        "native_province": native_province,
 
         "clip_name": df.get("filename_raw", ""),
         "clip_type": "",
@@ -53,14 +83,14 @@ def main():
         "valid_times": "0.30-1.00",
 
         "source": "DAIL",
-        "province": df.get("province", df.get("native_province", "")),
+        "province": province,
         "province_source": "native_province"
     })
 
     out = out[out["segment_file"] != ""]  # drop unresolved rows
-    out.to_csv(OUT, index=False)
+    out.to_csv(out_path, index=False)
 
-    print("Wrote", OUT, "rows:", len(out))
+    print("Wrote", out_path, "rows:", len(out))
 
 if __name__ == "__main__":
     main()
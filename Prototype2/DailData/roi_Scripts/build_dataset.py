@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 import pandas as pd
 
+# Shared gazetteer lives with the other pipeline modules in Prototype2/Scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
+from gazetteer import centroids_for, provinces_for  # noqa: E402
+from speaker_resolution import SpeakerIndex, apply_matches, resolve_speakers  # noqa: E402
+
 
 DATA_DIR = Path(".")
 FILES_CSV = DATA_DIR / "dail_speaker_files.csv"
 SPEAKERS_CSV = DATA_DIR / "speaker_master.csv"
 COORDS_CSV = DATA_DIR / "constituency_coordinates.csv"
+MATCHES_CSV = DATA_DIR / "speaker_matches.csv"
 
 OUT_ALL = DATA_DIR / "final_dataset_all.csv"
 OUT_MODEL = DATA_DIR / "final_dataset_model.csv"
@@ -25,116 +32,34 @@ def clean_text(s: pd.Series) -> pd.Series:
     return s
 
 
-def province_from_constituency_2022(constituency: str) -> str | None:
+def main(data_dir: Path = DATA_DIR) -> None:
     """
-    2022 constituency -> province mapping.
-    ASCII, hyphen '-' style (matches your master sheet choices).
+    Build final_dataset_all.csv / final_dataset_model.csv from the CSVs in
+    data_dir (the ingest daemon passes the DÁIL metadata directory).
     """
-    if constituency is None:
-        return None
-    c = str(constituency).strip()
-    if not c:
-        return None
-
-    leinster = {
-        "Carlow-Kilkenny",
-        "Dublin Bay North",
-        "Dublin Bay South",
-        "Dublin Central",
-        "Dublin Fingal",
-        "Dublin Mid-West",
-        "Dublin North-West",
-        "Dublin Rathdown",
-        "Dublin South-Central",
-        "Dublin South-West",
-        "Dublin West",
-        "Dun Laoghaire",
-        "Kildare North",
-        "Kildare South",
-        "Laois",
-        "Longford-Westmeath",
-        "Louth",
-        "Meath East",
-        "Meath West",
-        "Offaly",
-        "Wexford",
-        "Wicklow",
-    }
-
-    munster = {
-        "Clare",
-        "Cork East",
-        "Cork North-Central",
-        "Cork North-West",
-        "Cork South-Central",
-        "Cork South-West",
-        "Kerry",
-        "Limerick City",
-        "Limerick County",
-        "Tipperary",
-        "Waterford",
-    }
-
-    connacht = {
-        "Galway East",
-        "Galway West",
-        "Mayo",
-        "Roscommon-Galway",
-        "Sligo-Leitrim",
-    }
-
-    ulster = {
-        "Donegal",
-        "Cavan-Monaghan",
-    }
-
-    if c in leinster:
-        return "Leinster"
-    if c in munster:
-        return "Munster"
-    if c in connacht:
-        return "Connacht"
-    if c in ulster:
-        return "Ulster"
-    return None
-
-
-def main() -> None:
+    files_csv, speakers_csv, coords_csv, matches_csv, out_all, out_model = (
+        data_dir / p.name for p in (FILES_CSV, SPEAKERS_CSV, COORDS_CSV, MATCHES_CSV, OUT_ALL, OUT_MODEL)
+    )
+
     # -----------------------
     # Load CSVs
     # -----------------------
-    files = pd.read_csv(FILES_CSV)
-    speakers = pd.read_csv(SPEAKERS_CSV)
-    coords = pd.read_csv(COORDS_CSV)
+    files = pd.read_csv(files_csv)
+    speakers = pd.read_csv(speakers_csv)
 
     # -----------------------
     # Validate required columns
     # -----------------------
     req_files = {"filename", "speaker_raw", "speaker_key"}
     req_speakers = {"speaker_key", "constituency", "non_td_role", "gender"}
-    req_coords = {"constituencies", "x_coordinates", "y_coordinates"}
 
     missing_files = req_files - set(files.columns)
     missing_speakers = req_speakers - set(speakers.columns)
-    missing_coords = req_coords - set(coords.columns)
 
     if missing_files:
-        raise KeyError(f"{FILES_CSV} missing columns: {sorted(missing_files)}")
+        raise KeyError(f"{files_csv} missing columns: {sorted(missing_files)}")
     if missing_speakers:
-        raise KeyError(f"{SPEAKERS_CSV} missing columns: {sorted(missing_speakers)}")
-    if missing_coords:
-        raise KeyError(f"{COORDS_CSV} missing columns: {sorted(missing_coords)}")
-
-    # -----------------------
-    # Standardise column names for joining
-    # -----------------------
-    coords = coords.rename(
-        columns={
-            "constituencies": "constituency",
-            "x_coordinates": "lon",
-            "y_coordinates": "lat",
-        }
-    )
+        raise KeyError(f"{speakers_csv} missing columns: {sorted(missing_speakers)}")
 
     # -----------------------
     # Clean join keys
@@ -145,16 +70,29 @@ def main() -> None:
 
     # constituency: trimmed; keep original case formatting as in your master
     speakers["constituency"] = clean_text(speakers["constituency"])
-    coords["constituency"] = clean_text(coords["constituency"])
 
     # Also trim filename/speaker_raw for cleanliness
     files["filename_raw"] = files["filename"]
     files["filename"] = clean_text(files["filename"])
     files["speaker_raw"] = clean_text(files["speaker_raw"])
 
-    # Convert lon/lat to numeric (coerce errors to NaN)
-    coords["lon"] = pd.to_numeric(coords["lon"], errors="coerce")
-    coords["lat"] = pd.to_numeric(coords["lat"], errors="coerce")
+    # -----------------------
+    # Resolve file speaker keys to speaker_master keys
+    # (fadas, titles, mojibake, small spelling differences)
+    # -----------------------
+    matches = resolve_speakers(files["speaker_key"], SpeakerIndex(speakers["speaker_key"]))
+    matches.to_csv(matches_csv, index=False)
+    print("Wrote:", matches_csv)
+
+    files["speaker_key_file"] = files["speaker_key"]
+    files["speaker_key"] = apply_matches(files["speaker_key"], matches)
+    files = files.merge(
+        matches[["query_key", "score", "method"]].rename(
+            columns={"query_key": "speaker_key_file", "score": "speaker_match_score", "method": "speaker_match"}
+        ),
+        on="speaker_key_file",
+        how="left",
+    )
 
     # -----------------------
     # Join 1: files -> speakers (many files to one speaker)
@@ -168,22 +106,16 @@ def main() -> None:
     )
 
     # -----------------------
-    # Join 2: add coordinates (many speakers/files to one constituency row)
+    # Add coordinates: constituency centroids from the gazetteer, matched on
+    # the normalised name (fadas, dashes, case) like the province lookup
     # -----------------------
-    merged = merged.merge(
-        coords,
-        on="constituency",
-        how="left",
-        validate="many_to_one",
-        suffixes=("", "_coords"),
-    )
+    merged[["lon", "lat"]] = centroids_for(merged["constituency"], coords_csv=str(coords_csv))
 
     # -----------------------
     # Add province (2022)
     # -----------------------
-    merged["province"] = merged["constituency"].apply(
-        lambda x: province_from_constituency_2022(x) if pd.notna(x) else None
-    )
+    # One lookup per distinct constituency rather than per clip
+    merged["province"] = provinces_for(merged["constituency"], edition="2022")
 
     # -----------------------
     # Diagnostics
@@ -192,6 +124,8 @@ def main() -> None:
     print("Rows (audio files):", len(merged))
     print("Unique speakers in files:", merged["speaker_key"].nunique(dropna=True))
 
+    print("Speaker matches by method:", merged["speaker_match"].value_counts().to_dict())
+
     missing_speaker_meta = merged["native_place"].isna().sum()
     print("Rows missing speaker_master match (native_place is NaN):", missing_speaker_meta)
 
@@ -218,8 +152,8 @@ def main() -> None:
     # -----------------------
     # Save ALL rows
     # -----------------------
-    merged.to_csv(OUT_ALL, index=False)
-    print("\nWrote:", OUT_ALL)
+    merged.to_csv(out_all, index=False)
+    print("\nWrote:", out_all)
 
     # -----------------------
     # Build MODEL dataset:
@@ -235,8 +169,8 @@ def main() -> None:
     model = model[is_td]
     model = model.dropna(subset=["constituency", "province"])
 
-    model.to_csv(OUT_MODEL, index=False)
-    print("Wrote:", OUT_MODEL)
+    model.to_csv(out_model, index=False)
+    print("Wrote:", out_model)
 
     print("\n=== MODEL DATASET SUMMARY ===")
     print("Rows (TD clips):", len(model))
@@ -1,3 +1,6 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 
 speakers = pd.read_csv("speaker_master.csv")
@@ -13,4 +16,15 @@ print(dupes["speaker_key"].value_counts())
 
 # Save a review file so you can open it easily
 dupes.to_csv("speaker_master_DUPLICATES.csv", index=False)
-print("\nWrote: speaker_master_DUPLICATES.csv")
\ No newline at end of file
+print("\nWrote: speaker_master_DUPLICATES.csv")
+
+# Near duplicates: different spellings of the same speaker (fadas, titles, typos)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
+from speaker_resolution import near_duplicates  # noqa: E402
+
+near = near_duplicates(speakers["speaker_key"].dropna())
+print("\nNear-duplicate speaker_key pairs:", len(near))
+print(near.head(20).to_string(index=False))
+
+near.to_csv("speaker_master_NEAR_DUPLICATES.csv", index=False)
+print("\nWrote: speaker_master_NEAR_DUPLICATES.csv")
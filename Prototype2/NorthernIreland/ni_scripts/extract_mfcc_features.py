@@ -1,9 +1,16 @@
 import os
 import csv
+import sys
+from pathlib import Path
+
 import librosa
 import numpy as np
 import pandas as pd
 
+# Header-checked loader shared with the Prototype2/Scripts pipeline
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
+from audio_loader import load_audio  # noqa: E402
+
 INDEX_CSV = "ni_segments_index.csv"
 SEGMENTS_DIR = "segments"
 OUTPUT_CSV = "ni_mfcc_features.csv"
@@ -13,7 +20,7 @@ TARGET_SR = 16000
 
 
 def extract_mfcc_stats(wav_path):
-    y, sr = librosa.load(wav_path, sr=TARGET_SR, mono=True)
+    y, sr = load_audio(wav_path, sr=TARGET_SR)
 
     mfcc = librosa.feature.mfcc(
         y=y,
@@ -1,6 +1,12 @@
 import csv
+import sys
+from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
+# Shared gazetteer lives with the other pipeline modules in Prototype2/Scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Scripts"))
+from gazetteer import province_of  # noqa: E402
+
 NI_INDEX_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland/ni_metadata/ni_segments_index.csv"
 NI_META_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland/ni_metadata/Unimportant/Copies/ni_dataset copy.csv"
 OUT_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland/ni_metadata/ni_segments_index_with_native.csv"
@@ -90,6 +96,7 @@ def main():
     ]
 
     missing = 0
+    from_constituency = 0
     for r in ni_rows:
         vid = (r.get("video_id") or "").strip()
         meta = meta_by_vid.get(vid)
@@ -104,6 +111,11 @@ def main():
             r["native_province"] = r.get("native_province", "") or ""
             missing += 1
 
+        if not r["native_province"]:
+            # Same fallback as the Dáil index: the province of the constituency
+            r["native_province"] = province_of(r.get("constituency"), edition="ni") or ""
+            from_constituency += bool(r["native_province"])
+
         if (r.get("dataset") or "").strip() == "":
             r["dataset"] = "NI"
 
@@ -112,6 +124,7 @@ def main():
     print(f"Wrote: {OUT_PATH}")
     print(f"Rows: {len(ni_rows)}")
     print(f"Rows missing native fields (no metadata match by video_id): {missing}")
+    print(f"Rows with native_province taken from constituency: {from_constituency}")
 
 
 if __name__ == "__main__":
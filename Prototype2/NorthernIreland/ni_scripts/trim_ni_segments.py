@@ -2,9 +2,13 @@ import csv
 import os
 import re
 import subprocess
+import threading
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
 
+import numpy as np
+import soundfile as sf
+
 INPUT_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland/ni_metadata/ni_dataset.csv"
 URL_COL = "youtube_url"
 TIMES_COL = "valid_times"
@@ -25,6 +29,18 @@ BOUNDARY_GAP_SECONDS = 0  # keep 0 for no gaps; set 1 for a 1-second gap
 
 SKIP_IF_OUTPUT_EXISTS = True
 
+# log() may be called from several trimming threads (ingest_daemon.py); one row at a time
+LOG_LOCK = threading.Lock()
+
+FFMPEG_BIN = "ffmpeg"
+
+# Raw PCM read from ffmpeg per call when streaming (1 s of 16 kHz int16 mono)
+STREAM_READ_BYTES = TARGET_SR * 2
+
+# valid_times ranges closer than this are downloaded as one section
+# (bulk_download_audio.py --metadata); trimming maps segments onto the same sections
+SECTION_MERGE_GAP_SECONDS = 5
+
 
 def slug(text):
     if text is None:
@@ -99,6 +115,17 @@ def parse_valid_times(cell) -> list[tuple[int, int]]:
     return segments
 
 
+def merge_ranges(ranges, gap: int = SECTION_MERGE_GAP_SECONDS) -> list[tuple[int, int]]:
+    """Sort (start, end) ranges and merge those overlapping or less than gap seconds apart."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
 def split_interval(start_sec: int, end_sec: int, max_len: int = MAX_SEG_SECONDS, gap: int = BOUNDARY_GAP_SECONDS):
     chunks = []
     cur = start_sec
@@ -123,20 +150,92 @@ def ffprobe_duration_seconds(wav_path: str) -> int:
 
 
 def ffmpeg_trim(src: str, start_sec: int, end_sec: int, out: str):
+    # src is already TARGET_SR mono (AUDIO_DIR), so no -ar/-ac resampling here
     duration = end_sec - start_sec
     cmd = [
-        "ffmpeg", "-y",
+        FFMPEG_BIN, "-y",
         "-hide_banner", "-loglevel", "error",
         "-ss", str(start_sec),
         "-i", src,
         "-t", str(duration),
-        "-ar", str(TARGET_SR),
-        "-ac", str(TARGET_CH),
         out
     ]
     subprocess.run(cmd, check=True)
 
 
+def ffmpeg_pcm(src: str, start_sec: int, end_sec: int | None) -> list[str]:
+    """
+    ffmpeg command decoding src (a file or a media URL; ffmpeg seeks over
+    HTTP, so only the range is fetched) from start_sec to end_sec, or to the
+    end, and resampling it once to TARGET_SR mono int16 PCM on stdout.
+    """
+    cmd = [
+        FFMPEG_BIN,
+        "-hide_banner", "-loglevel", "error",
+        "-ss", str(start_sec),
+        "-i", src,
+    ]
+    if end_sec is not None:
+        cmd += ["-t", str(end_sec - start_sec)]
+    cmd += [
+        "-ac", str(TARGET_CH),
+        "-ar", str(TARGET_SR),
+        "-f", "s16le", "pipe:1",
+    ]
+    return cmd
+
+
+def read_exact(stream, n_bytes: int) -> bytes:
+    """Up to n_bytes from a pipe (fewer only at end of stream)."""
+    parts = []
+    while n_bytes > 0:
+        part = stream.read(min(n_bytes, STREAM_READ_BYTES))
+        if not part:
+            break
+        parts.append(part)
+        n_bytes -= len(part)
+    return b"".join(parts)
+
+
+def write_segment(out: str, pcm: bytes):
+    """Write int16 mono PCM as a WAV via a temp name, so a partial file never looks finished."""
+    tmp = out + ".part"
+    sf.write(tmp, np.frombuffer(pcm, dtype="<i2"), TARGET_SR, subtype="PCM_16", format="WAV")
+    os.replace(tmp, out)
+
+
+def cut_stream(stream, stream_start: int, chunks) -> list[tuple[int, int, int, str, bool]]:
+    """
+    Cut consecutive (index, start, end, out) chunks out of a PCM stream that
+    begins at stream_start seconds, reading it once front to back. end=None
+    means up to the next MAX_SEG_SECONDS. Existing outputs are read past but
+    not rewritten. Stops at end of stream; the last segment may be short.
+    Returns (index, start, end, out, written) for each chunk reached.
+    """
+    done = []
+    pos = stream_start
+    for index, s, e, out in chunks:
+        if s > pos:
+            skipped = read_exact(stream, (s - pos) * TARGET_SR * 2)
+            if len(skipped) < (s - pos) * TARGET_SR * 2:
+                break
+        pcm = read_exact(stream, (e - s) * TARGET_SR * 2)
+        pos = e
+        if not pcm:
+            break
+
+        actual_end = s + len(pcm) // (TARGET_SR * 2)
+        if SKIP_IF_OUTPUT_EXISTS and os.path.exists(out):
+            done.append((index, s, actual_end, out, False))
+        else:
+            write_segment(out, pcm)
+            done.append((index, s, actual_end, out, True))
+
+        if len(pcm) < (e - s) * TARGET_SR * 2:
+            break
+    return done
+
+
 def ensure_log(overwrite: bool = True):
     os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
     if overwrite or not os.path.exists(LOG_FILE):
@@ -146,7 +245,7 @@ def ensure_log(overwrite: bool = True):
 
 
 def log(video_id, segment, start, end, output, status, error=""):
-    with open(LOG_FILE, "a", newline="", encoding="utf-8") as f:
+    with LOG_LOCK, open(LOG_FILE, "a", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow([
             datetime.now().isoformat(timespec="seconds"),
@@ -160,6 +259,150 @@ def log(video_id, segment, start, end, output, status, error=""):
         ])
 
 
+def section_path(video_id: str, section_start: int) -> str:
+    """File bulk_download_audio.py --metadata writes for the valid_times section starting at section_start."""
+    return os.path.join(AUDIO_DIR, f"{video_id}_{section_start}.wav")
+
+
+def trim_video(row: dict, video_id: str) -> list[str]:
+    """
+    Cut one dataset row's recording into MAX_SEG_SECONDS segments over its
+    valid_times (or the whole file). The source is the whole video or just
+    its downloaded valid_times sections ({video_id}_{start}.wav). Logs every
+    segment; returns the paths of segments written this call. Raises if the
+    source audio is missing.
+    """
+    src = os.path.join(AUDIO_DIR, f"{video_id}.wav")
+    whole = os.path.exists(src)
+    good_ranges = parse_valid_times(row.get(TIMES_COL, ""))
+    sections = merge_ranges(good_ranges)
+    if not whole and not any(os.path.exists(section_path(video_id, a)) for a, _ in sections):
+        raise FileNotFoundError(f"Audio file not found: {src}")
+
+    base = "_".join([
+        slug(row.get(SPEAKER_COL)),
+        slug(row.get(PARTY_COL)),
+        slug(row.get(CONSTITUENCY_COL)),
+        video_id
+    ])
+
+    if not good_ranges:
+        total_sec = ffprobe_duration_seconds(src)
+        good_ranges = [(0, total_sec)]
+
+    written = []
+    chunk_index = 1
+    for (start, end) in good_ranges:
+        chunks = split_interval(start, end)
+
+        for (s, e) in chunks:
+            out = os.path.join(OUT_DIR, f"{base}_{chunk_index:03d}.wav")
+
+            if SKIP_IF_OUTPUT_EXISTS and os.path.exists(out):
+                log(video_id, chunk_index, s, e, out, "skip", "Output already exists")
+                chunk_index += 1
+                continue
+
+            if whole:
+                path, offset = src, s
+            else:
+                section_start = next(a for a, b in sections if a <= s < b)
+                path, offset = section_path(video_id, section_start), s - section_start
+                if not os.path.exists(path):
+                    # Section still downloading; a rerun fills this segment in
+                    log(video_id, chunk_index, s, e, out, "fail", f"Section not downloaded: {path}")
+                    chunk_index += 1
+                    continue
+
+            ffmpeg_trim(path, offset, offset + (e - s), out)
+            log(video_id, chunk_index, s, e, out, "ok")
+            written.append(out)
+            chunk_index += 1
+
+    return written
+
+
+def stream_video(row: dict, video_id: str, src: str) -> list[str]:
+    """
+    Single-pass alternative to downloading, normalizing and trim_video():
+    each merged valid_times section of src (a media URL or any audio file)
+    is decoded and resampled once by one ffmpeg process, and its
+    MAX_SEG_SECONDS segments are written straight from the PCM stream.
+    No full-length or per-section intermediate files. Segment names and
+    numbering match trim_video(). Sections whose segments all exist are not
+    fetched at all. Logs every segment; returns the paths written this call.
+    """
+    base = "_".join([
+        slug(row.get(SPEAKER_COL)),
+        slug(row.get(PARTY_COL)),
+        slug(row.get(CONSTITUENCY_COL)),
+        video_id
+    ])
+
+    good_ranges = parse_valid_times(row.get(TIMES_COL, ""))
+
+    # (section start, section end or None = to end of video, [(index, s, e, out)])
+    plan = []
+    if good_ranges:
+        chunks = []
+        for (start, end) in good_ranges:
+            chunks += split_interval(start, end)
+        indexed = [(i, s, e, os.path.join(OUT_DIR, f"{base}_{i:03d}.wav")) for i, (s, e) in enumerate(chunks, start=1)]
+        ordered = sorted(good_ranges)
+        if any(b[0] < a[1] for a, b in zip(ordered, ordered[1:])):
+            # The stream is read once front to back, so no range can be cut twice
+            raise ValueError("Overlapping valid_times ranges")
+        for a, b in merge_ranges(good_ranges):
+            plan.append((a, b, sorted((c for c in indexed if a <= c[1] < b), key=lambda c: c[1])))
+    else:
+        def whole_video():
+            i, cur = 1, 0
+            while True:
+                yield i, cur, cur + MAX_SEG_SECONDS, os.path.join(OUT_DIR, f"{base}_{i:03d}.wav")
+                i, cur = i + 1, cur + MAX_SEG_SECONDS + BOUNDARY_GAP_SECONDS
+        plan.append((0, None, whole_video()))
+
+    written = []
+    for section_start, section_end, chunks in plan:
+        if section_end is not None and SKIP_IF_OUTPUT_EXISTS and all(os.path.exists(c[3]) for c in chunks):
+            for index, s, e, out in chunks:
+                log(video_id, index, s, e, out, "skip", "Output already exists")
+            continue
+
+        proc = subprocess.Popen(ffmpeg_pcm(src, section_start, section_end), stdout=subprocess.PIPE)
+        try:
+            done = cut_stream(proc.stdout, section_start, chunks)
+            # Drain the few trailing bytes so ffmpeg exits cleanly rather than on a broken pipe
+            while proc.stdout.read(STREAM_READ_BYTES):
+                pass
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, proc.args)
+
+        for index, s, e, out, was_written in done:
+            if was_written:
+                log(video_id, index, s, e, out, "ok")
+                written.append(out)
+            else:
+                log(video_id, index, s, e, out, "skip", "Output already exists")
+
+    return written
+
+
+def find_dataset_row(video_id: str) -> dict | None:
+    """The INPUT_CSV row for a video ID (first one, as main() does), or None."""
+    with open(INPUT_CSV, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            try:
+                if extract_video_id(row.get(URL_COL, "")) == video_id:
+                    return row
+            except ValueError:
+                continue
+    return None
+
+
 def main():
     ensure_log(overwrite=True)
     os.makedirs(OUT_DIR, exist_ok=True)
@@ -178,38 +421,7 @@ def main():
                     continue
                 seen_video_ids.add(video_id)
 
-                src = os.path.join(AUDIO_DIR, f"{video_id}.wav")
-                if not os.path.exists(src):
-                    raise FileNotFoundError(f"Audio file not found: {src}")
-
-                base = "_".join([
-                    slug(row.get(SPEAKER_COL)),
-                    slug(row.get(PARTY_COL)),
-                    slug(row.get(CONSTITUENCY_COL)),
-                    video_id
-                ])
-
-                good_ranges = parse_valid_times(row.get(TIMES_COL, ""))
-
-                if not good_ranges:
-                    total_sec = ffprobe_duration_seconds(src)
-                    good_ranges = [(0, total_sec)]
-
-                chunk_index = 1
-                for (start, end) in good_ranges:
-                    chunks = split_interval(start, end)
-
-                    for (s, e) in chunks:
-                        out = os.path.join(OUT_DIR, f"{base}_{chunk_index:03d}.wav")
-
-                        if SKIP_IF_OUTPUT_EXISTS and os.path.exists(out):
-                            log(video_id, chunk_index, s, e, out, "skip", "Output already exists")
-                            chunk_index += 1
-                            continue
-
-                        ffmpeg_trim(src, s, e, out)
-                        log(video_id, chunk_index, s, e, out, "ok")
-                        chunk_index += 1
+                trim_video(row, video_id)
 
             except Exception as e:
                 log(video_id, "", "", "", "", "fail", str(e))
@@ -0,0 +1,290 @@
+import argparse
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import librosa
+
+from audio_loader import load_audio
+from merge_ni_and_dail_datasets import MASTER_FIELDS, dedupe, ensure_fields, read_rows
+from train_province_mfcc_baseline import TARGET_SR
+
+
+NI_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland/ni_metadata/ni_segments_index_with_native.csv"
+DAIL_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData/dail_segments_index.csv"
+OUT_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/duplicate_segments.csv"
+
+# Spectral fingerprint (Haitsma & Kalker style): one 32-bit word per frame from
+# the signs of energy differences across 33 mel bands and consecutive frames.
+# Long frames with a small hop keep words stable when two copies are offset.
+FP_N_FFT = 4096        # 256 ms at 16 kHz
+FP_HOP = 128           # 8 ms
+FP_BANDS = 33
+FP_FMIN = 300.0
+FP_FMAX = 2000.0
+
+# Frames quieter than this (dB below the loudest) have unstable bits; skip them
+FP_TOP_DB = 40.0
+
+# MinHash signature = LSH_BANDS bands of LSH_ROWS hashes. Two segments become
+# candidates if any band matches; P(candidate) = 1 - (1 - J**ROWS)**BANDS,
+# about 0.95 at Jaccard 0.15 (offset/re-encoded copies) and about 0.01 at
+# 0.01 (unrelated speech is typically below 0.005).
+LSH_BANDS = 128
+LSH_ROWS = 2
+
+# Candidate pairs are confirmed on the exact Jaccard of their fingerprint words
+DUPLICATE_JACCARD = 0.1
+
+# Buckets bigger than this (e.g. many near-silent clips) are too unspecific to use
+MAX_BUCKET_SIZE = 200
+
+REPORT_COLUMNS = [
+    "cluster_id",
+    "dataset",
+    "video_id",
+    "start_sec",
+    "end_sec",
+    "segment_file",
+    "is_representative",
+    "jaccard_to_representative",
+]
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def fingerprint_signal(y: np.ndarray, sr: int = TARGET_SR) -> np.ndarray:
+    """
+    Sorted unique 32-bit fingerprint words for a mono signal.
+    Bit b of frame t is set when the band energy difference E[t,b] - E[t,b+1]
+    grew since frame t-1.
+    """
+    if y.size < FP_N_FFT:
+        return np.zeros(0, dtype=np.uint32)
+
+    mel = librosa.feature.melspectrogram(
+        y=y, sr=sr, n_fft=FP_N_FFT, hop_length=FP_HOP, n_mels=FP_BANDS, fmin=FP_FMIN, fmax=FP_FMAX, power=2.0
+    )
+    energy = mel.sum(axis=0)
+    loud = librosa.power_to_db(energy, ref=np.max) > -FP_TOP_DB
+
+    band_diff = mel[:-1, :] - mel[1:, :]               # (32, T)
+    bits = (band_diff[:, 1:] - band_diff[:, :-1]) > 0   # (32, T-1)
+    bits = bits[:, loud[1:]]
+    if bits.shape[1] == 0:
+        return np.zeros(0, dtype=np.uint32)
+
+    weights = (np.uint32(1) << np.arange(32, dtype=np.uint32))
+    words = (bits.T.astype(np.uint32) * weights).sum(axis=1, dtype=np.uint64).astype(np.uint32)
+    return np.unique(words)
+
+
+def fingerprint_file(path: str) -> np.ndarray:
+    y, sr = load_audio(path, sr=TARGET_SR)
+    return fingerprint_signal(y, sr)
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser (uint64 arithmetic wraps)."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def minhash(words: np.ndarray, n_hashes: int = LSH_BANDS * LSH_ROWS, seed: int = 0) -> np.ndarray:
+    """
+    MinHash signature (n_hashes,) uint64 of a set of fingerprint words, by
+    one-permutation hashing: each word is hashed once and only competes for
+    the minimum of its own bin, so the cost is O(words) rather than
+    O(words * n_hashes). Empty bins borrow the next non-empty bin's value
+    (tagged with the distance) so small sets still give full signatures.
+    All-max for an empty set.
+    """
+    empty = np.full(n_hashes, _MASK64, dtype=np.uint64)
+    if words.size == 0:
+        return empty
+
+    with np.errstate(over="ignore"):
+        h = _mix64(words.astype(np.uint64) ^ _mix64(np.uint64(seed + 1)))
+        bins = (h % np.uint64(n_hashes)).astype(np.intp)
+        sig = empty.copy()
+        np.minimum.at(sig, bins, h)
+
+        # Distance from each bin to the next filled bin (0 for filled bins), wrapping around
+        filled = np.flatnonzero(sig != _MASK64)
+        pos = np.arange(n_hashes)
+        nxt = filled[np.searchsorted(filled, pos) % filled.size]
+        dist = (nxt - pos) % n_hashes
+        return _mix64(sig[nxt] + dist.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sorted unique word arrays."""
+    if a.size == 0 or b.size == 0:
+        return 0.0
+    inter = np.intersect1d(a, b, assume_unique=True).size
+    return inter / (a.size + b.size - inter)
+
+
+class FingerprintLSH:
+    """
+    Banded MinHash index. Each segment lands in LSH_BANDS buckets; segments
+    sharing any bucket are candidate duplicates, so only those pairs are ever
+    compared instead of all n^2.
+    """
+
+    def __init__(self, bands: int = LSH_BANDS, rows: int = LSH_ROWS):
+        self.bands = bands
+        self.rows = rows
+        self.buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+
+    def add(self, item: int, signature: np.ndarray):
+        for band, chunk in enumerate(signature.reshape(self.bands, self.rows)):
+            self.buckets[(band, chunk.tobytes())].append(item)
+
+    def candidate_pairs(self, max_bucket_size: int = MAX_BUCKET_SIZE) -> set:
+        pairs = set()
+        for members in self.buckets.values():
+            if len(members) < 2 or len(members) > max_bucket_size:
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pairs.add((a, b) if a < b else (b, a))
+        return pairs
+
+
+def duplicate_clusters(
+    fingerprints: List[np.ndarray],
+    threshold: float = DUPLICATE_JACCARD,
+) -> Tuple[np.ndarray, Dict[Tuple[int, int], float]]:
+    """
+    Cluster id per fingerprint (connected components of confirmed pairs;
+    singletons get -1) and the Jaccard of every confirmed pair.
+    """
+    index = FingerprintLSH()
+    for i, words in enumerate(fingerprints):
+        if words.size:
+            index.add(i, minhash(words))
+
+    confirmed = {}
+    for a, b in index.candidate_pairs():
+        score = jaccard(fingerprints[a], fingerprints[b])
+        if score >= threshold:
+            confirmed[(a, b)] = score
+
+    parent = list(range(len(fingerprints)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in confirmed:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    roots = np.array([find(i) for i in range(len(fingerprints))])
+    sizes = np.bincount(roots, minlength=len(fingerprints))
+    cluster = np.where(sizes[roots] > 1, roots, -1)
+    return cluster, confirmed
+
+
+def cluster_report(rows: pd.DataFrame, fingerprints: List[np.ndarray], threshold: float = DUPLICATE_JACCARD) -> pd.DataFrame:
+    """
+    One report row per segment in a duplicate cluster. The representative is
+    the earliest row of its cluster (so NI rows win when NI comes first, as in
+    the merge); the others are the ones the merge drops.
+    """
+    cluster, _ = duplicate_clusters(fingerprints, threshold)
+
+    out = []
+    for root in np.unique(cluster[cluster >= 0]):
+        members = np.flatnonzero(cluster == root)
+        rep = members[0]
+        for i in members:
+            r = rows.iloc[i]
+            out.append({
+                "cluster_id": int(rep),
+                "dataset": r.get("dataset", ""),
+                "video_id": r.get("video_id", ""),
+                "start_sec": r.get("start_sec", ""),
+                "end_sec": r.get("end_sec", ""),
+                "segment_file": r.get("segment_file", ""),
+                "is_representative": bool(i == rep),
+                "jaccard_to_representative": 1.0 if i == rep else round(jaccard(fingerprints[rep], fingerprints[i]), 4),
+            })
+    return pd.DataFrame(out, columns=REPORT_COLUMNS)
+
+
+def _safe_fingerprint(path: str) -> np.ndarray:
+    try:
+        return fingerprint_file(path)
+    except Exception:
+        return np.zeros(0, dtype=np.uint32)
+
+
+def fingerprint_paths(paths: Iterable[str], workers: int = 0) -> List[np.ndarray]:
+    """Fingerprints for many files in parallel; unreadable/missing files get an empty one."""
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return [_safe_fingerprint(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_safe_fingerprint, paths, chunksize=8))
+
+
+def load_segments(paths: Iterable[str]) -> pd.DataFrame:
+    """
+    The rows merge_ni_and_dail_datasets keeps before near-duplicate removal:
+    the indexes in order (NI then DAIL), fields filled by ensure_fields and
+    exact duplicates removed by dedupe. Report rows then carry the same
+    segment keys the merge matches on, and no key appears twice.
+    """
+    rows = []
+    for path in paths:
+        rows += ensure_fields(read_rows(path))
+    rows, _ = dedupe(rows)
+    return pd.DataFrame(rows, columns=MASTER_FIELDS)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Find near-duplicate audio segments across the NI and DAIL indexes.")
+    ap.add_argument("--ni", default=NI_PATH)
+    ap.add_argument("--dail", default=DAIL_PATH)
+    ap.add_argument("--out", default=OUT_PATH)
+    ap.add_argument("--threshold", type=float, default=DUPLICATE_JACCARD, help="Min Jaccard of fingerprint words")
+    ap.add_argument("--workers", type=int, default=0)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    rows = load_segments([args.ni, args.dail])
+
+    t0 = time.perf_counter()
+    fingerprints = fingerprint_paths(rows["segment_file"], args.workers)
+    t_fp = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    report = cluster_report(rows, fingerprints, args.threshold)
+    t_cluster = time.perf_counter() - t1
+
+    report.to_csv(args.out, index=False)
+
+    n_empty = sum(1 for f in fingerprints if f.size == 0)
+    print(f"Segments: {len(rows)}  (no fingerprint: {n_empty})")
+    print(f"Fingerprinting: {t_fp:.1f}s  LSH + clustering: {t_cluster:.2f}s")
+    print(f"Duplicate clusters: {report['cluster_id'].nunique()}  "
+          f"segments to drop: {int((~report['is_representative']).sum())}")
+    print("Wrote:", args.out)
+
+
+if __name__ == "__main__":
+    main()
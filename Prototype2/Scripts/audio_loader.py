@@ -0,0 +1,65 @@
+from collections import Counter
+from typing import Dict, Tuple
+
+import numpy as np
+import soundfile as sf
+
+import librosa
+
+TARGET_SR = 16000
+
+# How often each load path was taken in this process:
+#   direct     - header already matched; read straight into a float32 buffer
+#   downmixed  - right rate but multichannel; read directly, then averaged to mono
+#   resampled  - wrong rate; librosa.load resampled it
+#   fallback   - libsndfile could not open it (e.g. mp3/m4a); librosa.load decoded it
+LOAD_COUNTS: Counter = Counter()
+
+
+def _rewound(path):
+    """File-like sources (e.g. upload buffers) are read again from the start."""
+    if hasattr(path, "seek"):
+        path.seek(0)
+    return path
+
+
+def load_audio(path, sr: int | None = TARGET_SR, mono: bool = True) -> Tuple[np.ndarray, int]:
+    """
+    Drop-in for librosa.load(path, sr=sr, mono=mono) that skips the
+    resampling/mono machinery when the file already has the wanted format.
+
+    The header (sf.info) is checked first; a matching file is read with
+    soundfile into a preallocated float32 buffer, which gives the same
+    samples librosa would. Only files at another rate (or that libsndfile
+    cannot read) go through librosa.load. sr=None keeps the native rate.
+    File-like sources are read from the start whatever their position.
+    """
+    try:
+        info = sf.info(_rewound(path))
+    except sf.LibsndfileError:
+        LOAD_COUNTS["fallback"] += 1
+        return librosa.load(_rewound(path), sr=sr, mono=mono)
+
+    if sr is not None and info.samplerate != sr:
+        LOAD_COUNTS["resampled"] += 1
+        return librosa.load(_rewound(path), sr=sr, mono=mono)
+
+    with sf.SoundFile(_rewound(path)) as f:
+        if f.channels == 1:
+            buf = np.empty(f.frames, dtype=np.float32)
+            y = f.read(out=buf)
+            LOAD_COUNTS["direct"] += 1
+        else:
+            buf = np.empty((f.frames, f.channels), dtype=np.float32)
+            y = f.read(out=buf)
+            if mono:
+                y = y.mean(axis=1, dtype=np.float32)
+                LOAD_COUNTS["downmixed"] += 1
+            else:
+                y = np.ascontiguousarray(y.T)
+                LOAD_COUNTS["direct"] += 1
+    return y, info.samplerate
+
+
+def load_counts() -> Dict[str, int]:
+    return {k: LOAD_COUNTS.get(k, 0) for k in ("direct", "downmixed", "resampled", "fallback")}
@@ -0,0 +1,218 @@
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+
+from train_province_mfcc_baseline import DATA_CSV, TARGET_SR, pick_audio_path
+
+
+OUT_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/audio_audit.csv"
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg")
+
+# Expected segment format (trim_ni_segments.py / normalize_audio output)
+EXPECTED_CHANNELS = 1
+MIN_SECONDS = 0.5
+MAX_SECONDS = 31.0   # MAX_SEG_SECONDS (30) plus rounding slack
+
+# Quality checks read SAMPLE_BLOCKS short blocks spread over each file instead
+# of decoding all of it, so the cost per file is constant
+SAMPLE_BLOCKS = 8
+SAMPLE_BLOCK_SECONDS = 0.25
+
+CLIP_LEVEL = 0.999        # |sample| at or above this counts as clipped
+CLIP_FRACTION = 0.001     # flag when more than this share of samples is clipped
+SILENCE_DB = -60.0        # flag when the sampled RMS is below this (dBFS)
+DC_OFFSET = 0.01          # flag when |mean| is above this
+
+AUDIT_COLUMNS = [
+    "path",
+    "format",
+    "subtype",
+    "samplerate",
+    "channels",
+    "frames",
+    "duration_sec",
+    "peak",
+    "rms_db",
+    "dc_offset",
+    "clipped_fraction",
+    "has_nan",
+    "flags",
+    "error",
+]
+
+
+def sample_blocks(f: sf.SoundFile, blocks: int = SAMPLE_BLOCKS, block_seconds: float = SAMPLE_BLOCK_SECONDS) -> np.ndarray:
+    """Mono float32 samples from evenly spaced blocks of an open file (all of it if short)."""
+    block = max(1, int(block_seconds * f.samplerate))
+    if f.frames <= blocks * block:
+        starts = [0]
+        block = f.frames
+    else:
+        starts = np.linspace(0, f.frames - block, blocks).astype(int)
+
+    parts = []
+    for start in starts:
+        f.seek(int(start))
+        parts.append(f.read(block, dtype="float32", always_2d=True))
+    y = np.concatenate(parts) if parts else np.zeros((0, f.channels), dtype=np.float32)
+    return y.mean(axis=1)
+
+
+def audit_file(path: str) -> Dict[str, object]:
+    """
+    One report row: header fields from sf.info plus level statistics of a
+    sampled read, and the flags raised (semicolon-separated).
+    """
+    row: Dict[str, object] = {c: None for c in AUDIT_COLUMNS}
+    row.update(path=path, flags="", error="")
+
+    if not os.path.exists(path):
+        row.update(flags="missing", error="File not found")
+        return row
+
+    try:
+        with sf.SoundFile(path) as f:
+            row.update(
+                format=f.format,
+                subtype=f.subtype,
+                samplerate=f.samplerate,
+                channels=f.channels,
+                frames=f.frames,
+                duration_sec=round(f.frames / f.samplerate, 3) if f.samplerate else 0.0,
+            )
+            y = sample_blocks(f)
+    except Exception as e:
+        row.update(flags="unreadable", error=str(e))
+        return row
+
+    flags = []
+    if row["samplerate"] != TARGET_SR:
+        flags.append("samplerate")
+    if row["channels"] != EXPECTED_CHANNELS:
+        flags.append("channels")
+    if row["duration_sec"] < MIN_SECONDS:
+        flags.append("short")
+    if row["duration_sec"] > MAX_SECONDS:
+        flags.append("long")
+
+    finite = np.isfinite(y)
+    row["has_nan"] = bool(not finite.all())
+    if row["has_nan"]:
+        flags.append("nan")
+        y = y[finite]
+
+    if y.size:
+        a = np.abs(y)
+        rms = float(np.sqrt(np.mean(np.square(y, dtype=np.float64))))
+        row.update(
+            peak=round(float(a.max()), 4),
+            rms_db=round(20 * np.log10(rms), 2) if rms > 0 else -np.inf,
+            dc_offset=round(float(y.mean(dtype=np.float64)), 5),
+            clipped_fraction=round(float(np.mean(a >= CLIP_LEVEL)), 5),
+        )
+        if row["clipped_fraction"] > CLIP_FRACTION:
+            flags.append("clipping")
+        if row["rms_db"] < SILENCE_DB:
+            flags.append("silent")
+        if abs(row["dc_offset"]) > DC_OFFSET:
+            flags.append("dc_offset")
+    else:
+        flags.append("empty")
+
+    row["flags"] = ";".join(flags)
+    return row
+
+
+def audit_paths(paths: Iterable[str], workers: int = 0) -> pd.DataFrame:
+    """Audit many files in parallel; rows keep the input order."""
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < 2 * workers:
+        rows = [audit_file(p) for p in paths]
+    else:
+        chunksize = max(1, len(paths) // (workers * 16))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(audit_file, paths, chunksize=chunksize))
+    return pd.DataFrame(rows, columns=AUDIT_COLUMNS)
+
+
+def scan_dirs(dirs: Iterable[str]) -> List[str]:
+    """Audio files under each directory (recursive), sorted."""
+    found = []
+    stack = list(dirs)
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                    found.append(entry.path)
+    return sorted(found)
+
+
+def paths_from_index(index_csv: str) -> List[str]:
+    """Segment paths from an index CSV, picked per row by train's pick_audio_path (the files training reads)."""
+    df = pd.read_csv(index_csv, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    if df.empty:
+        return []
+    paths = df.apply(pick_audio_path, axis=1)
+    return list(pd.unique(paths[paths != ""]))
+
+
+def write_report(report: pd.DataFrame, out_path: str):
+    """CSV, or Parquet when out_path ends in .parquet (needs pyarrow or fastparquet)."""
+    if out_path.lower().endswith(".parquet"):
+        try:
+            report.to_parquet(out_path, index=False)
+        except ImportError as e:
+            raise SystemExit(f"Parquet output needs pyarrow or fastparquet ({e}); use a .csv path instead")
+    else:
+        report.to_csv(out_path, index=False)
+
+
+def summarize(report: pd.DataFrame) -> Counter:
+    counts = Counter()
+    for flags in report["flags"]:
+        counts.update(f for f in flags.split(";") if f)
+    return counts
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(
+        description="Audit audio files: header fields plus sampled clipping/silence/NaN/DC checks, one row per file."
+    )
+    ap.add_argument("--index", default=DATA_CSV, help="Segment index CSV to audit (ignored when --dir is given)")
+    ap.add_argument("--dir", action="append", help="Audit every audio file under this directory (repeatable)")
+    ap.add_argument("--out", default=OUT_PATH, help="Report path (.csv or .parquet)")
+    ap.add_argument("--workers", type=int, default=0)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    t0 = time.perf_counter()
+    paths = scan_dirs(args.dir) if args.dir else paths_from_index(args.index)
+    report = audit_paths(paths, args.workers)
+    elapsed = time.perf_counter() - t0
+
+    write_report(report, args.out)
+
+    flagged = int((report["flags"] != "").sum())
+    print(f"Audited {len(report)} files in {elapsed:.1f}s ({len(report) / elapsed if elapsed > 0 else 0.0:.0f} files/sec)")
+    print(f"Flagged: {flagged}")
+    for flag, n in summarize(report).most_common():
+        print(f"  {flag}: {n}")
+    print("Wrote:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from feature_cache import FeatureCache
+from province_model_store import PackedForest, save_province_model
+from train_province_mfcc_baseline import (
+    DATA_CSV,
+    FEATURE_CACHE_DIR,
+    build_feature_matrix,
+    feature_config,
+    load_training_frame,
+    make_forest,
+)
+
+
+CASCADE_MODEL_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/models/province_cascade"
+
+# Thresholds on the cheap model's top-class probability to evaluate
+THRESHOLDS = [0.0, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.01]
+
+# Largest accuracy loss (absolute) accepted when picking the production threshold
+MAX_ACCURACY_DROP = 0.01
+
+# Rows timed one at a time to estimate per-clip latency of each stage
+N_TIMING_ROWS = 50
+
+
+def make_cheap_model() -> Pipeline:
+    """
+    Same baseline as train_province_mfcc_baseline.ipynb: standardized MFCC stats + logistic regression.
+    """
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", LogisticRegression(max_iter=2000, class_weight="balanced")),
+    ])
+
+
+def _aligned_proba(model, X: np.ndarray, classes: np.ndarray) -> np.ndarray:
+    """predict_proba with columns reordered to `classes`."""
+    proba = model.predict_proba(X)
+    order = [list(map(str, model.classes_)).index(str(c)) for c in classes]
+    return proba[:, order]
+
+
+class CascadeClassifier:
+    """
+    Two-stage classifier with early exit.
+
+    Every clip is scored by the cheap model. Clips whose top-class probability
+    is below `threshold` are re-scored by the expensive model, whose
+    probabilities replace the cheap ones. threshold=0 never escalates;
+    threshold>1 always does.
+    """
+
+    def __init__(self, cheap, expensive, threshold: float):
+        self.cheap = cheap
+        self.expensive = expensive
+        self.threshold = float(threshold)
+        self.classes_ = np.array([str(c) for c in cheap.classes_], dtype=object)
+        self.n_seen = 0
+        self.n_escalated = 0
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(X)
+        proba = _aligned_proba(self.cheap, X, self.classes_)
+
+        escalate = proba.max(axis=1) < self.threshold
+        if escalate.any():
+            proba[escalate] = _aligned_proba(self.expensive, X[escalate], self.classes_)
+
+        self.n_seen += len(X)
+        self.n_escalated += int(escalate.sum())
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def per_row_latency(model, X: np.ndarray, n_rows: int = N_TIMING_ROWS) -> float:
+    """
+    Mean seconds to score one clip, timing single-row calls as in production.
+    """
+    rows = X[:n_rows]
+    if len(rows) == 0:
+        return 0.0
+
+    t0 = time.perf_counter()
+    for i in range(len(rows)):
+        model.predict_proba(rows[i:i + 1])
+    return (time.perf_counter() - t0) / len(rows)
+
+
+def threshold_report(
+    cheap_proba: np.ndarray,
+    expensive_proba: np.ndarray,
+    y_true: np.ndarray,
+    classes: np.ndarray,
+    cheap_latency: float,
+    expensive_latency: float,
+    thresholds: List[float] = THRESHOLDS,
+) -> pd.DataFrame:
+    """
+    Accuracy versus average per-clip latency for each threshold.
+
+    Probabilities are evaluated once for both stages, and each threshold is
+    simulated from them. Average latency = cheap + escalated_fraction * expensive.
+    """
+    classes = np.asarray(classes, dtype=object)
+    y_true = np.asarray(y_true).astype(str)
+    conf = cheap_proba.max(axis=1)
+    cheap_pred = classes[np.argmax(cheap_proba, axis=1)]
+    exp_pred = classes[np.argmax(expensive_proba, axis=1)]
+
+    rows = []
+    for t in thresholds:
+        escalate = conf < t
+        pred = np.where(escalate, exp_pred, cheap_pred)
+        frac = float(escalate.mean()) if len(escalate) else 0.0
+        avg_latency = cheap_latency + frac * expensive_latency
+
+        rows.append({
+            "threshold": t,
+            "accuracy": float((pred == y_true).mean()) if len(y_true) else 0.0,
+            "escalated_fraction": frac,
+            "avg_latency_ms": avg_latency * 1000,
+            "speedup_vs_forest": expensive_latency / avg_latency if avg_latency > 0 else float("inf"),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def choose_threshold(report: pd.DataFrame, max_accuracy_drop: float = MAX_ACCURACY_DROP) -> float:
+    """
+    Fastest threshold whose accuracy is within max_accuracy_drop of the forest alone.
+    """
+    forest_acc = float(report.loc[report["escalated_fraction"].idxmax(), "accuracy"])
+    ok = report[report["accuracy"] >= forest_acc - max_accuracy_drop]
+    return float(ok.sort_values(["avg_latency_ms", "threshold"]).iloc[0]["threshold"])
+
+
+def out_of_fold_proba(X: np.ndarray, y: np.ndarray, groups: np.ndarray, n_splits: int = 5):
+    """
+    Speaker-grouped out-of-fold probabilities from both stages, so the threshold
+    is calibrated on clips neither model was trained on.
+    """
+    classes = np.array(sorted(set(map(str, y))), dtype=object)
+    cheap_oof = np.zeros((len(y), len(classes)))
+    exp_oof = np.zeros((len(y), len(classes)))
+
+    gkf = GroupKFold(n_splits=min(n_splits, np.unique(groups).size))
+    for train_idx, test_idx in gkf.split(X, y, groups):
+        cheap = clone(make_cheap_model()).fit(X[train_idx], y[train_idx])
+        forest = make_forest().fit(X[train_idx], y[train_idx])
+        cheap_oof[test_idx] = _aligned_proba(cheap, X[test_idx], classes)
+        exp_oof[test_idx] = _aligned_proba(forest, X[test_idx], classes)
+
+    return cheap_oof, exp_oof, classes
+
+
+def save_cascade(cheap, forest: PackedForest, threshold: float, model_root: str = CASCADE_MODEL_DIR) -> str:
+    """
+    Save a cascade as a province model artifact. The packed forest's arrays
+    are stored next to the pickle (see save_province_model) so they load
+    memory-mapped.
+    """
+    # Built from the importable module: run as a script, this file's own class
+    # is __main__.CascadeClassifier, which predict.py / the web app cannot unpickle
+    from cascade_classifier import CascadeClassifier as Cascade
+
+    cascade = Cascade(cheap, forest, threshold)
+    return save_province_model(
+        cascade,
+        labels=list(cascade.classes_),
+        feature_config=feature_config(),
+        model_root=model_root,
+    )
+
+
+def main():
+    df = load_training_frame(DATA_CSV)
+    # Same feature cache as training/prediction, so recalibrating does not decode the corpus again
+    cache = FeatureCache(FEATURE_CACHE_DIR, feature_config())
+    X, y, groups, bad = build_feature_matrix(df, cache=cache)
+    print("Feature matrix shape:", X.shape, "bad rows:", len(bad))
+    print(f"Feature cache: {cache.hits} hits, {cache.misses} misses")
+
+    if np.unique(groups).size < 5:
+        raise SystemExit(f"Not enough unique speakers for GroupKFold: {np.unique(groups).size}")
+
+    cheap_oof, exp_oof, classes = out_of_fold_proba(X, y, groups)
+
+    # Final models on all rows; the forest is packed for fast single-clip scoring
+    cheap = make_cheap_model().fit(X, y)
+    forest = PackedForest.from_forest(make_forest().fit(X, y))
+
+    cheap_latency = per_row_latency(cheap, X)
+    forest_latency = per_row_latency(forest, X)
+
+    report = threshold_report(cheap_oof, exp_oof, y, classes, cheap_latency, forest_latency)
+    threshold = choose_threshold(report)
+
+    print("\n=== Cascade threshold report (out-of-fold) ===")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f"\nChosen threshold: {threshold} (max accuracy drop {MAX_ACCURACY_DROP})")
+
+    model_dir = save_cascade(cheap, forest, threshold, CASCADE_MODEL_DIR)
+    print("Saved cascade model:", model_dir)
+
+
+if __name__ == "__main__":
+    main()
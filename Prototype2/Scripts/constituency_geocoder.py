@@ -0,0 +1,202 @@
+import argparse
+import json
+import time
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import shapely
+from shapely.geometry import shape
+
+import gazetteer
+
+
+# Constituency boundaries as WGS84 GeoJSON (lon/lat), e.g. the Electoral Commission /
+# Tailte Éireann constituency boundary download converted with
+#   ogr2ogr -f GeoJSON -t_srs EPSG:4326 constituencies.geojson <shapefile>
+BOUNDARIES_GEOJSON = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/MetaData/constituency_boundaries.geojson"
+
+# Feature properties holding the constituency name and (optionally) its province
+NAME_FIELD = "constituency"
+PROVINCE_FIELD = "province"
+
+# Points outside every polygon (coastline simplification, offshore islands) snap to the
+# nearest constituency within this many degrees (~5 km); None disables snapping
+NEAREST_MAX_DEGREES = 0.05
+
+
+class ConstituencyGeocoder:
+    """
+    Point -> constituency -> province lookups against boundary polygons held
+    in a shapely STRtree. Polygons are prepared once, so each point test is a
+    bounding-box probe plus an exact check against one or two candidates.
+
+    lookup() answers one point; label() takes arrays and runs the whole batch
+    through a single vectorized tree query.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        polygons: List,
+        provinces: List[str] | None = None,
+        nearest_max_degrees: float | None = NEAREST_MAX_DEGREES,
+    ):
+        if len(names) != len(polygons):
+            raise ValueError("names and polygons must have the same length")
+
+        self.names = np.array(names, dtype=object)
+        self.provinces = np.array(provinces if provinces is not None else [None] * len(names), dtype=object)
+        self.polygons = np.array(polygons, dtype=object)
+        self.nearest_max_degrees = nearest_max_degrees
+
+        shapely.prepare(self.polygons)
+        self.tree = shapely.STRtree(self.polygons)
+
+    @classmethod
+    def from_geojson(
+        cls,
+        path: str,
+        name_field: str = NAME_FIELD,
+        province_field: str | None = PROVINCE_FIELD,
+        province_of: Dict[str, str] | None = None,
+        **kwargs,
+    ) -> "ConstituencyGeocoder":
+        """
+        Load a FeatureCollection. Provinces come from province_field when the
+        features carry it, else from the province_of mapping (name -> province),
+        else from the shared gazetteer (gazetteer.py).
+        """
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+
+        names, polygons, provinces = [], [], []
+        for feature in collection["features"]:
+            props = feature.get("properties") or {}
+            name = str(props.get(name_field, "")).strip()
+            if not name or not feature.get("geometry"):
+                continue
+
+            province = props.get(province_field) if province_field else None
+            if not province:
+                province = province_of.get(name) if province_of is not None else gazetteer.province_of(name)
+
+            names.append(name)
+            polygons.append(shape(feature["geometry"]))
+            provinces.append(province or None)
+
+        if not names:
+            raise ValueError(f"No named features with geometry in {path} (name field {name_field!r})")
+        return cls(names, polygons, provinces, **kwargs)
+
+    def lookup_indices(self, lon, lat) -> np.ndarray:
+        """
+        Index of the containing polygon for each point, or -1.
+        A point on a shared border gets the first polygon in file order.
+        """
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        out = np.full(lon.shape, -1, dtype=np.int64)
+
+        ok = np.isfinite(lon) & np.isfinite(lat)
+        if not ok.any():
+            return out
+
+        idx = np.flatnonzero(ok)
+        points = shapely.points(lon[idx], lat[idx])
+
+        point_i, poly_i = self.tree.query(points, predicate="intersects")
+        # Sorted by (point, polygon), the first pair per point holds its lowest polygon index
+        order = np.lexsort((poly_i, point_i))
+        first_points, first = np.unique(point_i[order], return_index=True)
+        out[idx[first_points]] = poly_i[order][first]
+
+        if self.nearest_max_degrees is not None:
+            missing = np.flatnonzero(out[idx] < 0)
+            if missing.size:
+                near_point_i, near_poly_i = self.tree.query_nearest(
+                    points[missing], max_distance=self.nearest_max_degrees, all_matches=False
+                )
+                out[idx[missing[near_point_i]]] = near_poly_i
+
+        return out
+
+    def label(self, lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+        """(constituency, province) object arrays for arrays of points; None where no match."""
+        i = self.lookup_indices(lon, lat)
+        hit = i >= 0
+        constituency = np.full(i.shape, None, dtype=object)
+        province = np.full(i.shape, None, dtype=object)
+        constituency[hit] = self.names[i[hit]]
+        province[hit] = self.provinces[i[hit]]
+        return constituency, province
+
+    def lookup(self, lon: float, lat: float) -> Tuple[str | None, str | None]:
+        """(constituency, province) for one point, skipping the array bookkeeping of label()."""
+        if not (np.isfinite(lon) and np.isfinite(lat)):
+            return None, None
+
+        point = shapely.Point(lon, lat)
+        hits = self.tree.query(point, predicate="intersects")
+        if hits.size:
+            i = int(hits.min())
+        elif self.nearest_max_degrees is not None:
+            near = self.tree.query_nearest(point, max_distance=self.nearest_max_degrees, all_matches=False)
+            if not near.size:
+                return None, None
+            i = int(near[0])
+        else:
+            return None, None
+        return self.names[i], self.provinces[i]
+
+    def label_frame(self, df: pd.DataFrame, lon_col: str = "lon", lat_col: str = "lat") -> pd.DataFrame:
+        """Copy of df with constituency and province columns from its lon/lat columns."""
+        out = df.copy()
+        lon = pd.to_numeric(out[lon_col], errors="coerce").to_numpy()
+        lat = pd.to_numeric(out[lat_col], errors="coerce").to_numpy()
+        out["constituency"], out["province"] = self.label(lon, lat)
+        return out
+
+
+@lru_cache(maxsize=4)
+def load_geocoder(path: str = BOUNDARIES_GEOJSON, **kwargs) -> ConstituencyGeocoder:
+    """Geocoder for a boundary file, built once per process."""
+    return ConstituencyGeocoder.from_geojson(path, **kwargs)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Label a CSV of lon/lat points with constituency and province.")
+    ap.add_argument("csv_in")
+    ap.add_argument("csv_out")
+    ap.add_argument("--boundaries", default=BOUNDARIES_GEOJSON, help="Constituency boundary GeoJSON (WGS84)")
+    ap.add_argument("--lon-col", default="lon")
+    ap.add_argument("--lat-col", default="lat")
+    ap.add_argument("--name-field", default=NAME_FIELD, help="GeoJSON property with the constituency name")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    t0 = time.perf_counter()
+    geocoder = load_geocoder(args.boundaries, name_field=args.name_field)
+    t_load = time.perf_counter() - t0
+
+    df = pd.read_csv(args.csv_in, encoding="utf-8-sig")
+    t1 = time.perf_counter()
+    out = geocoder.label_frame(df, args.lon_col, args.lat_col)
+    t_label = time.perf_counter() - t1
+
+    out.to_csv(args.csv_out, index=False)
+
+    n_hit = int(out["constituency"].notna().sum())
+    print(f"Boundaries: {len(geocoder.names)} constituencies, loaded in {t_load * 1000:.0f} ms")
+    print(f"Labelled {n_hit}/{len(out)} points in {t_label * 1000:.1f} ms "
+          f"({t_label / max(len(out), 1) * 1e6:.2f} us/point)")
+    print("Wrote:", args.csv_out)
+
+
+if __name__ == "__main__":
+    main()
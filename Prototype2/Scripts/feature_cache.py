@@ -0,0 +1,51 @@
+import hashlib
+import json
+import os
+from typing import Dict
+
+import numpy as np
+
+
+class FeatureCache:
+    """
+    On-disk cache of per-file feature vectors.
+
+    Entries are keyed by (absolute path, file size, mtime, feature config), so a
+    file that is rewritten or a change to the MFCC settings never serves stale
+    features. Each entry is a small .npy file under a two-character shard dir.
+    """
+
+    def __init__(self, cache_dir: str, config: Dict[str, object]):
+        self.cache_dir = cache_dir
+        self.config_json = json.dumps(config, sort_keys=True)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, path: str) -> str:
+        st = os.stat(path)
+        raw = "|".join([os.path.abspath(path), str(st.st_size), str(st.st_mtime_ns), self.config_json])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def get(self, path: str) -> np.ndarray | None:
+        try:
+            entry = self._entry_path(self.key(path))
+            x = np.load(entry)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return x
+
+    def put(self, path: str, feats: np.ndarray):
+        entry = self._entry_path(self.key(path))
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        # Write to a temp name then rename, so a crashed run never leaves a torn entry
+        tmp = entry + f".{os.getpid()}.tmp.npy"
+        np.save(tmp, np.asarray(feats, dtype=np.float32))
+        os.replace(tmp, entry)
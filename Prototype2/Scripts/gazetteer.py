@@ -0,0 +1,198 @@
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Constituency centroids: constituencies, x_coordinates (lon), y_coordinates (lat)
+COORDS_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData/constituency_coordinates.csv"
+
+DEFAULT_EDITION = "2022"
+
+# Dáil constituencies by province, ASCII hyphen style as in speaker_master.csv
+PROVINCE_CONSTITUENCIES_2022 = {
+    "Leinster": (
+        "Carlow-Kilkenny",
+        "Dublin Bay North",
+        "Dublin Bay South",
+        "Dublin Central",
+        "Dublin Fingal",
+        "Dublin Mid-West",
+        "Dublin North-West",
+        "Dublin Rathdown",
+        "Dublin South-Central",
+        "Dublin South-West",
+        "Dublin West",
+        "Dun Laoghaire",
+        "Kildare North",
+        "Kildare South",
+        "Laois",
+        "Longford-Westmeath",
+        "Louth",
+        "Meath East",
+        "Meath West",
+        "Offaly",
+        "Wexford",
+        "Wicklow",
+    ),
+    "Munster": (
+        "Clare",
+        "Cork East",
+        "Cork North-Central",
+        "Cork North-West",
+        "Cork South-Central",
+        "Cork South-West",
+        "Kerry",
+        "Limerick City",
+        "Limerick County",
+        "Tipperary",
+        "Waterford",
+    ),
+    "Connacht": (
+        "Galway East",
+        "Galway West",
+        "Mayo",
+        "Roscommon-Galway",
+        "Sligo-Leitrim",
+    ),
+    "Ulster": (
+        "Donegal",
+        "Cavan-Monaghan",
+    ),
+}
+
+# 2016-2020 boundaries: Laois and Offaly were one constituency
+PROVINCE_CONSTITUENCIES_2020 = {
+    province: tuple(c for c in names if c not in ("Laois", "Offaly"))
+    for province, names in PROVINCE_CONSTITUENCIES_2022.items()
+}
+PROVINCE_CONSTITUENCIES_2020["Leinster"] += ("Laois-Offaly",)
+
+# Westminster / Assembly constituencies used in the NI dataset
+PROVINCE_CONSTITUENCIES_NI = {
+    "Ulster": (
+        "Belfast East",
+        "Belfast North",
+        "Belfast South",
+        "Belfast West",
+        "East Antrim",
+        "East Londonderry",
+        "Fermanagh and South Tyrone",
+        "Foyle",
+        "Lagan Valley",
+        "Mid Ulster",
+        "Newry and Armagh",
+        "North Antrim",
+        "North Down",
+        "South Antrim",
+        "South Down",
+        "Strangford",
+        "Upper Bann",
+        "West Tyrone",
+    ),
+}
+
+EDITIONS = {
+    "2020": PROVINCE_CONSTITUENCIES_2020,
+    "2022": PROVINCE_CONSTITUENCIES_2022,
+    "ni": PROVINCE_CONSTITUENCIES_NI,
+}
+
+# Dashes people paste from the web / Oireachtas pages
+_DASHES = str.maketrans({"–": "-", "—": "-", "‒": "-", "−": "-"})
+
+
+@lru_cache(maxsize=None)
+def normalise_constituency(name: str) -> str:
+    """
+    Lookup key for a constituency name:
+      - fadas removed (Dún Laoghaire -> dun laoghaire)
+      - en/em dashes -> '-', no spaces around dashes
+      - whitespace collapsed, casefolded
+    """
+    s = unicodedata.normalize("NFKD", str(name).translate(_DASHES))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = " ".join(s.split())
+    s = s.replace(" -", "-").replace("- ", "-")
+    return s.casefold()
+
+
+@lru_cache(maxsize=None)
+def province_table(edition: str = DEFAULT_EDITION) -> Mapping[str, str]:
+    """Normalised constituency -> province for one edition, built once."""
+    if edition not in EDITIONS:
+        raise ValueError(f"Unknown gazetteer edition {edition!r}; expected one of {sorted(EDITIONS)}")
+
+    table = {}
+    for province, names in EDITIONS[edition].items():
+        for name in names:
+            table[normalise_constituency(name)] = province
+    return MappingProxyType(table)
+
+
+def province_of(constituency, edition: str = DEFAULT_EDITION) -> str | None:
+    """Province for one constituency name, or None if blank/unknown."""
+    if constituency is None or pd.isna(constituency):
+        return None
+    key = normalise_constituency(constituency)
+    return province_table(edition).get(key) if key else None
+
+
+def map_unique(values, fn: Callable, fill=None, dtype=object) -> np.ndarray:
+    """
+    Apply fn once per distinct non-null value of a column and broadcast the
+    results back to every row; nulls get fill.
+    Works for numpy/pandas columns and Arrow-backed pandas columns alike.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+    mapped = np.empty(len(uniques) + 1, dtype=dtype)
+    mapped[:-1] = [fn(u) for u in uniques]
+    mapped[-1] = fill
+    # code -1 (null) indexes the trailing fill
+    return mapped[codes]
+
+
+def provinces_for(values, edition: str = DEFAULT_EDITION) -> pd.Series:
+    """Province per row of a constituency column (one dict probe per distinct name)."""
+    table = province_table(edition)
+    index = values.index if isinstance(values, pd.Series) else None
+    out = map_unique(values, lambda c: table.get(normalise_constituency(c)))
+    return pd.Series(out, index=index, dtype=object)
+
+
+@lru_cache(maxsize=4)
+def centroid_table(coords_csv: str = COORDS_CSV) -> Mapping[str, Tuple[float, float]]:
+    """Normalised constituency -> (lon, lat), read from coords_csv once per process."""
+    coords = pd.read_csv(coords_csv, encoding="utf-8-sig")
+
+    required = {"constituencies", "x_coordinates", "y_coordinates"}
+    missing = required - set(coords.columns)
+    if missing:
+        raise KeyError(f"{coords_csv} missing columns: {sorted(missing)}")
+
+    lon = pd.to_numeric(coords["x_coordinates"], errors="coerce")
+    lat = pd.to_numeric(coords["y_coordinates"], errors="coerce")
+
+    table: Dict[str, Tuple[float, float]] = {}
+    for name, x, y in zip(coords["constituencies"], lon, lat):
+        if pd.isna(name) or pd.isna(x) or pd.isna(y):
+            continue
+        table[normalise_constituency(name)] = (float(x), float(y))
+    return MappingProxyType(table)
+
+
+def centroids_for(values, coords_csv: str = COORDS_CSV) -> pd.DataFrame:
+    """lon/lat columns per row of a constituency column; NaN where unknown."""
+    table = centroid_table(coords_csv)
+    index = values.index if isinstance(values, pd.Series) else None
+    unknown = (np.nan, np.nan)
+
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+    lonlat = np.array(
+        [table.get(normalise_constituency(u), unknown) for u in uniques] + [unknown],
+        dtype=np.float64,
+    ).reshape(-1, 2)[codes]
+    return pd.DataFrame(lonlat, index=index, columns=["lon", "lat"])
@@ -0,0 +1,440 @@
+import argparse
+import csv
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+try:
+    # inotify (Linux) / FSEvents (macOS) via watchdog, when installed
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - depends on the environment
+    FileSystemEventHandler = object
+    Observer = None
+
+PROTOTYPE2 = Path(__file__).resolve().parents[1]
+
+NI_AUDIO_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland/ni_audio_16k_mono"
+DAIL_AUDIO_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_audio_processed"
+
+# Speaker catalog, speaker_master.csv and the DÁIL dataset CSVs (build_dataset.py's data dir)
+DAIL_METADATA_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData"
+
+# extract_speakers2.py (the incremental speaker catalog) lives in the project archive
+EXTRACT_SPEAKERS_DIR = PROTOTYPE2.parent / "ProjectArchive" / "Scripts"
+
+# Files already pushed through the pipeline: path, mtime_ns
+LEDGER_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/ingest_ledger.csv"
+
+AUDIO_EXTS = (".wav",)
+
+# A file must be unchanged (size + mtime) this long before it is processed,
+# so half-written downloads / ffmpeg outputs are never picked up
+DEBOUNCE_SECONDS = 10.0
+
+# Polling interval (also how often debounced files are checked when using inotify)
+POLL_SECONDS = 2.0
+
+# Files trimmed / featurised at once
+MAX_WORKERS = 2
+
+LEDGER_FIELDS = ["path", "mtime_ns"]
+
+
+def is_audio(path: str) -> bool:
+    return path.lower().endswith(AUDIO_EXTS)
+
+
+def file_signature(path: str) -> Tuple[int, int] | None:
+    """(size, mtime_ns), or None if the file is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def scan_dirs(dirs: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """path -> (size, mtime_ns) for every audio file directly in dirs."""
+    found = {}
+    for d in dirs:
+        if not os.path.isdir(d):
+            continue
+        with os.scandir(d) as it:
+            for entry in it:
+                if is_audio(entry.name) and entry.is_file():
+                    st = entry.stat()
+                    found[entry.path] = (st.st_size, st.st_mtime_ns)
+    return found
+
+
+class PollingWatcher:
+    """
+    Change feed from periodic directory listings. Used when watchdog is not
+    installed, and on filesystems where inotify does not fire (network mounts).
+    """
+
+    def __init__(self, dirs: List[str]):
+        self.dirs = dirs
+        self.snapshot = scan_dirs(dirs)
+
+    def changes(self) -> List[str]:
+        current = scan_dirs(self.dirs)
+        changed = [p for p, sig in current.items() if self.snapshot.get(p) != sig]
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class _QueueHandler(FileSystemEventHandler):
+    def __init__(self, events: "queue.Queue[str]"):
+        self.events = events
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Renames (e.g. yt-dlp's .part -> .wav) report the new name as dest_path
+        path = getattr(event, "dest_path", "") or event.src_path
+        if is_audio(path):
+            self.events.put(path)
+
+
+class InotifyWatcher:
+    """Change feed from watchdog's native observer (inotify on Linux)."""
+
+    def __init__(self, dirs: List[str]):
+        self.events: "queue.Queue[str]" = queue.Queue()
+        self.observer = Observer()
+        handler = _QueueHandler(self.events)
+        for d in dirs:
+            self.observer.schedule(handler, d, recursive=False)
+        self.observer.start()
+
+    def changes(self) -> List[str]:
+        out = set()
+        while True:
+            try:
+                out.add(self.events.get_nowait())
+            except queue.Empty:
+                return list(out)
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+def make_watcher(dirs: List[str], polling: bool = False):
+    if polling or Observer is None:
+        return PollingWatcher(dirs)
+    return InotifyWatcher(dirs)
+
+
+class Debouncer:
+    """
+    Holds changed paths until their (size, mtime) has stayed the same for
+    quiet_seconds. A burst of writes to one file therefore yields one event.
+    """
+
+    def __init__(self, quiet_seconds: float = DEBOUNCE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.quiet_seconds = quiet_seconds
+        self.clock = clock
+        self.pending: Dict[str, Tuple[Tuple[int, int] | None, float]] = {}
+
+    def touch(self, path: str):
+        self.pending[path] = (file_signature(path), self.clock())
+
+    def ready(self) -> List[str]:
+        now = self.clock()
+        out = []
+        for path, (sig, since) in list(self.pending.items()):
+            current = file_signature(path)
+            if current is None:
+                del self.pending[path]
+            elif current != sig:
+                self.pending[path] = (current, now)
+            elif now - since >= self.quiet_seconds:
+                del self.pending[path]
+                out.append(path)
+        return sorted(out)
+
+
+def load_ledger(path: str) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return {r["path"]: r["mtime_ns"] for r in csv.DictReader(f)}
+
+
+def append_ledger(path: str, entries: Dict[str, str]):
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=LEDGER_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows({"path": p, "mtime_ns": m} for p, m in entries.items())
+
+
+class IngestDaemon:
+    """
+    Watches audio directories and pushes each new or rewritten file through
+    process_file (one call per file, at most max_workers at a time), then
+    calls finish_batch once with the outputs of the whole batch.
+
+    Files are only recorded in the ledger once finish_batch succeeds. If it
+    raises, the processed files and their outputs are kept and finish_batch
+    is retried on the next tick (together with anything new), so a failing
+    index rebuild neither stops the daemon nor loses the batch.
+
+    The ledger records what has been processed, so a restart only picks up
+    files that arrived while the daemon was down. On the very first start
+    (no ledger) the files already present are recorded without processing.
+    """
+
+    def __init__(
+        self,
+        dirs: List[str],
+        process_file: Callable[[str], List[str]],
+        finish_batch: Callable[[List[str], List[str]], None] = lambda files, outputs: None,
+        ledger_path: str = LEDGER_CSV,
+        debounce_seconds: float = DEBOUNCE_SECONDS,
+        max_workers: int = MAX_WORKERS,
+        polling: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.dirs = [d for d in dirs if os.path.isdir(d)]
+        self.process_file = process_file
+        self.finish_batch = finish_batch
+        self.ledger_path = ledger_path
+        self.debouncer = Debouncer(debounce_seconds, clock)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self.watcher = make_watcher(self.dirs, polling)
+        self.failures: Dict[str, str] = {}
+        self.processed = 0
+
+        # Processed files (path -> mtime_ns) and outputs waiting for a successful finish_batch
+        self.unfinished: Dict[str, str] = {}
+        self.unfinished_outputs: List[str] = []
+        self.batch_error = ""
+
+        ledger = load_ledger(ledger_path)
+        on_disk = scan_dirs(self.dirs)
+        if not ledger and not os.path.exists(ledger_path):
+            append_ledger(ledger_path, {p: str(sig[1]) for p, sig in on_disk.items()})
+            ledger = {p: str(sig[1]) for p, sig in on_disk.items()}
+        self.ledger = ledger
+
+        # Catch up on files that arrived or changed while the daemon was stopped
+        for path, (_, mtime_ns) in on_disk.items():
+            if self.ledger.get(path) != str(mtime_ns):
+                self.debouncer.touch(path)
+
+    def run_once(self) -> List[str]:
+        """
+        Collect changes, process files that have settled, and finish the
+        batch. Returns the files recorded in the ledger this tick.
+        """
+        for path in self.watcher.changes():
+            self.debouncer.touch(path)
+
+        ready = []
+        for path in self.debouncer.ready():
+            sig = file_signature(path)
+            if sig is not None and self.ledger.get(path) != str(sig[1]):
+                ready.append((path, sig))
+
+        futures = {path: self.executor.submit(self.process_file, path) for path, _ in ready}
+
+        for path, sig in ready:
+            try:
+                self.unfinished_outputs.extend(futures[path].result() or [])
+            except Exception as e:
+                self.failures[path] = f"{type(e).__name__}: {e}"
+                print(f"[ingest] failed: {path}: {self.failures[path]}", file=sys.stderr)
+                continue
+            self.failures.pop(path, None)
+            self.unfinished[path] = str(sig[1])
+
+        if not self.unfinished:
+            return []
+
+        done = self.unfinished
+        try:
+            self.finish_batch(sorted(done), list(self.unfinished_outputs))
+        except (Exception, SystemExit) as e:
+            # e.g. a missing index CSV makes the rebuild scripts raise SystemExit
+            self.batch_error = f"{type(e).__name__}: {e}"
+            print(f"[ingest] finishing batch of {len(done)} file(s) failed, retrying next tick: {self.batch_error}",
+                  file=sys.stderr)
+            return []
+
+        append_ledger(self.ledger_path, done)
+        self.ledger.update(done)
+        self.processed += len(done)
+        self.unfinished, self.unfinished_outputs, self.batch_error = {}, [], ""
+        return sorted(done)
+
+    def run_forever(self, stop: threading.Event | None = None, poll_seconds: float = POLL_SECONDS):
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                processed = self.run_once()
+                if processed:
+                    print(f"[ingest] processed {len(processed)} file(s); total {self.processed}")
+                stop.wait(poll_seconds)
+        finally:
+            self.close()
+
+    def close(self):
+        self.watcher.close()
+        self.executor.shutdown(wait=True)
+
+
+# ---------------------------------------------------------------------------
+# The FYP pipeline: trim NI recordings, cache features, refresh the indexes
+# ---------------------------------------------------------------------------
+
+def _import_from(subdir: str | Path, module: str):
+    """Import module from PROTOTYPE2/subdir (or from subdir itself when absolute)."""
+    path = str(PROTOTYPE2 / subdir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return __import__(module)
+
+
+class FypPipeline:
+    """
+    process_file / finish_batch for the two corpora:
+      - NI: ni_audio_16k_mono/<video_id>.wav (or its <video_id>_<start>.wav
+        valid_times sections) is trimmed into segments using
+        its ni_dataset.csv row (trim_ni_segments.trim_video); the new
+        segments' MFCC features go into the shared FeatureCache.
+      - DÁIL: files in roi_audio_processed are already segments; their
+        features are cached directly.
+    After each batch the CSV indexes are rebuilt: for NI files the NI index
+    and native fields; for DÁIL files the speaker catalog (incremental),
+    the DÁIL dataset and its segment index; then the merge and resolved
+    paths. These only read CSVs and filenames, so they take seconds.
+    """
+
+    def __init__(self, ni_dir: str = NI_AUDIO_DIR, dail_dir: str = DAIL_AUDIO_DIR,
+                 dail_meta_dir: str = DAIL_METADATA_DIR):
+        from feature_cache import FeatureCache
+        from train_province_mfcc_baseline import FEATURE_CACHE_DIR, feature_config
+
+        self.ni_dir = os.path.abspath(ni_dir)
+        self.dail_dir = os.path.abspath(dail_dir)
+        self.dail_meta_dir = Path(dail_meta_dir)
+        self.cache = FeatureCache(FEATURE_CACHE_DIR, feature_config())
+        self.trim = _import_from("NorthernIreland/ni_scripts", "trim_ni_segments")
+        self.trim.ensure_log(overwrite=False)
+        os.makedirs(self.trim.OUT_DIR, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def cache_features(self, paths: List[str]):
+        from predict import extract_features
+
+        extract_features(paths, cache=self.cache)
+
+    def process_file(self, path: str) -> List[str]:
+        if os.path.dirname(os.path.abspath(path)) == self.ni_dir:
+            video_id = Path(path).stem
+            row = self.trim.find_dataset_row(video_id)
+            if row is None and re.fullmatch(r".+_\d+", video_id):
+                # A valid_times section (<video_id>_<start>.wav) rather than a whole video
+                video_id = video_id.rsplit("_", 1)[0]
+                row = self.trim.find_dataset_row(video_id)
+            if row is None:
+                raise LookupError(f"{video_id} is not in {self.trim.INPUT_CSV}")
+            try:
+                segments = self.trim.trim_video(row, video_id)
+            except Exception as e:
+                self.trim.log(video_id, "", "", "", "", "fail", str(e))
+                raise
+        else:
+            segments = [path]
+
+        self.cache_features(segments)
+        return segments
+
+    def rebuild_dail_index(self):
+        """Speaker catalog -> final_dataset_all.csv -> the DÁIL segment index the merge reads."""
+        catalog = _import_from(EXTRACT_SPEAKERS_DIR, "extract_speakers2")
+        dataset = _import_from("DailData/roi_Scripts", "build_dataset")
+        segments = _import_from("DailData/roi_Scripts", "build_dail_segments_index")
+        merge = _import_from("Scripts", "merge_ni_and_dail_datasets")
+
+        meta = self.dail_meta_dir
+        catalog.update_catalog(
+            Path(self.dail_dir),
+            meta / dataset.FILES_CSV.name,
+            meta / catalog.FAILED_CSV,
+            meta / catalog.STATE_CSV,
+        )
+        dataset.main(meta)
+        segments.main(str(meta / dataset.OUT_ALL.name), self.dail_dir, merge.DAIL_PATH)
+
+    def finish_batch(self, files: List[str], outputs: List[str]):
+        dirs = {os.path.dirname(os.path.abspath(f)) for f in files}
+        with self.lock:
+            if self.ni_dir in dirs:
+                _import_from("NorthernIreland/ni_scripts", "build_segments_index").main()
+                _import_from("NorthernIreland/ni_scripts", "make_ni_segments_index_with_native").main()
+            if self.dail_dir in dirs:
+                self.rebuild_dail_index()
+            _import_from("Scripts", "merge_ni_and_dail_datasets").main()
+            _import_from("Scripts", "add_resolved_paths").main()
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Watch the audio directories and ingest new recordings.")
+    ap.add_argument("--ni-dir", default=NI_AUDIO_DIR)
+    ap.add_argument("--dail-dir", default=DAIL_AUDIO_DIR)
+    ap.add_argument("--dail-meta-dir", default=DAIL_METADATA_DIR,
+                    help="Speaker catalog / speaker_master.csv / DÁIL dataset directory")
+    ap.add_argument("--ledger", default=LEDGER_CSV)
+    ap.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="Seconds a file must be unchanged")
+    ap.add_argument("--poll", type=float, default=POLL_SECONDS)
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS)
+    ap.add_argument("--polling", action="store_true", help="Poll directories instead of using inotify")
+    ap.add_argument("--once", action="store_true", help="Process what is pending now and exit")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    pipeline = FypPipeline(args.ni_dir, args.dail_dir, args.dail_meta_dir)
+
+    daemon = IngestDaemon(
+        [args.ni_dir, args.dail_dir],
+        pipeline.process_file,
+        pipeline.finish_batch,
+        ledger_path=args.ledger,
+        debounce_seconds=0.0 if args.once else args.debounce,
+        max_workers=args.workers,
+        polling=args.polling or args.once,
+    )
+    mode = "polling" if isinstance(daemon.watcher, PollingWatcher) else "inotify"
+    print(f"[ingest] watching {daemon.dirs} ({mode}, debounce {args.debounce}s, {args.workers} workers)")
+
+    if args.once:
+        processed = daemon.run_once()
+        daemon.close()
+        print(f"[ingest] processed {len(processed)} file(s)")
+        return
+
+    try:
+        daemon.run_forever(poll_seconds=args.poll)
+    except KeyboardInterrupt:
+        print("\n[ingest] stopped")
+
+
+if __name__ == "__main__":
+    main()
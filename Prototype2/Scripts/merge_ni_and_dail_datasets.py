@@ -5,6 +5,9 @@ NI_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/NorthernIreland
 DAIL_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData/dail_segments_index.csv"
 OUT_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/all_segments_index.csv"
 
+# Near-duplicate clusters from audio_fingerprint.py (optional; skipped if missing)
+DUPLICATES_PATH = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/duplicate_segments.csv"
+
 MASTER_FIELDS = [
     "segment_file",
     "video_id",
@@ -42,6 +45,15 @@ def ensure_fields(rows: list[dict]) -> list[dict]:
     return rows
 
 
+def segment_key(r: dict) -> tuple[str, str, str, str]:
+    return (
+        (r.get("dataset") or "").strip(),
+        (r.get("video_id") or "").strip(),
+        str(r.get("start_sec") or "").strip(),
+        str(r.get("end_sec") or "").strip(),
+    )
+
+
 def dedupe(rows: list[dict]) -> tuple[list[dict], int]:
     """
     Remove exact duplicates using a stable key:
@@ -54,12 +66,7 @@ def dedupe(rows: list[dict]) -> tuple[list[dict], int]:
     removed = 0
 
     for r in rows:
-        key = (
-            (r.get("dataset") or "").strip(),
-            (r.get("video_id") or "").strip(),
-            str(r.get("start_sec") or "").strip(),
-            str(r.get("end_sec") or "").strip(),
-        )
+        key = segment_key(r)
         if key in seen:
             removed += 1
             continue
@@ -69,6 +76,24 @@ def dedupe(rows: list[dict]) -> tuple[list[dict], int]:
     return out, removed
 
 
+def drop_near_duplicates(rows: list[dict], report_path: str) -> tuple[list[dict], int]:
+    """
+    Remove every non-representative member of a near-duplicate cluster
+    (the same speech under another video ID, overlapping uploads), as listed
+    in the audio_fingerprint.py report. Rows are matched on the dedupe key;
+    a key that is some cluster's representative is always kept, so a stale
+    or hand-edited report can never drop the only copy of a segment.
+    """
+    drop, keep = set(), set()
+    for r in read_rows(report_path):
+        is_rep = (r.get("is_representative") or "").strip().lower() == "true"
+        (keep if is_rep else drop).add(segment_key(r))
+    drop -= keep
+
+    out = [r for r in rows if segment_key(r) not in drop]
+    return out, len(rows) - len(out)
+
+
 def write_rows(path: str, rows: list[dict]):
     with open(path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=MASTER_FIELDS, extrasaction="ignore")
@@ -88,6 +113,12 @@ def main():
     combined = ni_rows + dail_rows
     combined, removed = dedupe(combined)
 
+    near_removed = 0
+    if os.path.exists(DUPLICATES_PATH):
+        combined, near_removed = drop_near_duplicates(combined, DUPLICATES_PATH)
+    else:
+        print(f"No near-duplicate report at {DUPLICATES_PATH}; run audio_fingerprint.py to create it")
+
     write_rows(OUT_PATH, combined)
 
     print(f"Wrote merged index: {OUT_PATH}")
@@ -95,6 +126,7 @@ def main():
     print(f"DAIL rows: {len(dail_rows)}")
     print(f"Total rows written: {len(combined)}")
     print(f"Duplicates removed: {removed}")
+    print(f"Near-duplicates removed (audio fingerprint): {near_removed}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_cache import FeatureCache
+from prediction_cache import PredictionCache, content_key
+from province_model_store import load_province_model
+from train_province_mfcc_baseline import (
+    AUDIO_COL_FALLBACK,
+    AUDIO_COL_PRIMARY,
+    FEATURE_CACHE_DIR,
+    N_MFCC,
+    feature_config,
+    mfcc_features,
+    pick_audio_path,
+)
+
+
+DEFAULT_INDEX_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/all_segments_index_with_resolved_paths.csv"
+DEFAULT_MODEL_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/models/province_rf"
+DEFAULT_OUT_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/predictions"
+DEFAULT_CACHE_DIR = FEATURE_CACHE_DIR
+DEFAULT_PREDICTION_CACHE = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/prediction_cache.sqlite"
+
+SEGMENTS_OUT = "segment_predictions.csv"
+VIDEOS_OUT = "video_predictions.csv"
+
+# Files per task sent to a worker process (amortises pickling overhead)
+POOL_CHUNKSIZE = 8
+
+
+def segments_from_index(index_csv: str) -> pd.DataFrame:
+    """
+    Read a segment index CSV and pick the audio path per row
+    (segment_file_resolved if it exists on disk, else segment_file).
+    """
+    df = pd.read_csv(index_csv, encoding="utf-8-sig")
+
+    if AUDIO_COL_PRIMARY not in df.columns and AUDIO_COL_FALLBACK not in df.columns:
+        raise SystemExit(f"{index_csv} has neither {AUDIO_COL_PRIMARY} nor {AUDIO_COL_FALLBACK}")
+
+    out = pd.DataFrame({
+        "segment_file": df.apply(pick_audio_path, axis=1),
+        "video_id": df.get("video_id", pd.Series([""] * len(df))).fillna("").astype(str),
+    })
+    return out
+
+
+def segments_from_dir(wav_dir: str) -> pd.DataFrame:
+    """
+    Every .wav in wav_dir is one segment; the file stem stands in for the video id.
+    """
+    paths = sorted(
+        os.path.join(wav_dir, f) for f in os.listdir(wav_dir)
+        if f.lower().endswith(".wav")
+    )
+    return pd.DataFrame({
+        "segment_file": paths,
+        "video_id": [os.path.splitext(os.path.basename(p))[0] for p in paths],
+    })
+
+
+def _safe_features(path: str) -> Tuple[np.ndarray | None, str]:
+    try:
+        return mfcc_features(path), ""
+    except Exception as e:
+        return None, f"mfcc_error:{e}"
+
+
+def extract_features(
+    paths: List[str],
+    cache: FeatureCache | None = None,
+    jobs: int = 1,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Compute mfcc_features() for each path, reusing cached vectors where possible.
+    Cache misses are computed in a process pool when jobs > 1.
+
+    Returns:
+      X: (n_paths, 52), rows of NaN where extraction failed
+      errors: "" per path, or a reason string
+    """
+    X = np.full((len(paths), 4 * N_MFCC), np.nan, dtype=np.float32)
+    errors = [""] * len(paths)
+    todo: List[int] = []
+
+    for i, p in enumerate(paths):
+        if not p or not os.path.exists(p):
+            errors[i] = f"missing_audio:{p}"
+            continue
+
+        x = cache.get(p) if cache is not None else None
+        if x is not None:
+            X[i] = x
+        else:
+            todo.append(i)
+
+    todo_paths = [paths[i] for i in todo]
+    if jobs > 1 and len(todo_paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_safe_features, todo_paths, chunksize=POOL_CHUNKSIZE))
+    else:
+        results = [_safe_features(p) for p in todo_paths]
+
+    for i, (x, err) in zip(todo, results):
+        if x is None:
+            errors[i] = err
+            continue
+        X[i] = x
+        if cache is not None:
+            cache.put(paths[i], x)
+
+    return X, errors
+
+
+def predict_paths(
+    model,
+    labels: List[str],
+    paths: List[str],
+    model_version: str = "",
+    feature_cache: FeatureCache | None = None,
+    prediction_cache: PredictionCache | None = None,
+    hash_mode: str = "bytes",
+    jobs: int = 1,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Province probabilities for each path.
+
+    With a prediction cache, each file is first hashed by content; cached
+    results are served directly. Files sharing the same content within the
+    batch are extracted and scored only once.
+
+    Returns:
+      probs: (n_paths, n_labels), NaN rows where scoring failed
+      errors: "" per path, or a reason string
+    """
+    probs = np.full((len(paths), len(labels)), np.nan)
+    errors = [""] * len(paths)
+    pending: Dict[str, List[int]] = {}
+    config = feature_config()
+
+    for i, p in enumerate(paths):
+        if not p or not os.path.exists(p):
+            errors[i] = f"missing_audio:{p}"
+            continue
+
+        if prediction_cache is None:
+            pending.setdefault(os.path.abspath(p), []).append(i)
+            continue
+
+        try:
+            key = content_key(p, config, model_version, mode=hash_mode)
+        except Exception as e:
+            errors[i] = f"hash_error:{e}"
+            continue
+
+        cached = prediction_cache.get(key) if key not in pending else None
+        if cached is not None:
+            probs[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+
+    keys = list(pending)
+    reps = [pending[k][0] for k in keys]
+    X, feat_errors = extract_features([paths[i] for i in reps], cache=feature_cache, jobs=jobs)
+
+    ok = np.array([not e for e in feat_errors], dtype=bool)
+    rep_probs = np.full((len(reps), len(labels)), np.nan)
+    if ok.any():
+        rep_probs[ok] = model.predict_proba(X[ok])
+
+    for k, key in enumerate(keys):
+        for i in pending[key]:
+            probs[i] = rep_probs[k]
+            errors[i] = feat_errors[k]
+        if ok[k] and prediction_cache is not None:
+            prediction_cache.put(key, rep_probs[k])
+
+    return probs, errors
+
+
+def build_scored_frame(segments: pd.DataFrame, labels: List[str], probs: np.ndarray, errors: List[str]) -> pd.DataFrame:
+    """
+    Add predicted_province, confidence and prob_<label> columns to the segments frame.
+    Rows that failed keep NaN probabilities and carry the error in status.
+    """
+    out = segments.copy()
+    ok = np.array([not e for e in errors], dtype=bool)
+
+    for j, label in enumerate(labels):
+        out[f"prob_{label}"] = probs[:, j]
+
+    best = np.argmax(np.nan_to_num(probs, nan=-1.0), axis=1)
+    out["predicted_province"] = np.where(ok, np.array(labels, dtype=object)[best], "")
+    out["confidence"] = probs.max(axis=1)
+    out["status"] = ["ok" if not e else e for e in errors]
+    return out
+
+
+def aggregate_by_video(scored: pd.DataFrame, labels: List[str]) -> pd.DataFrame:
+    """
+    Per-video province distribution: mean of segment probabilities over scored segments.
+    """
+    prob_cols = [f"prob_{label}" for label in labels]
+    ok = scored[scored["status"] == "ok"]
+
+    videos = ok.groupby("video_id")[prob_cols].mean()
+    videos.insert(0, "n_segments", ok.groupby("video_id").size())
+    videos["predicted_province"] = [labels[j] for j in np.argmax(videos[prob_cols].to_numpy(), axis=1)]
+    videos["confidence"] = videos[prob_cols].max(axis=1)
+    return videos.reset_index()
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Score audio segments with a saved province model.")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--index", default=None, help="Segment index CSV (default: merged index)")
+    src.add_argument("--wav-dir", default=None, help="Directory of .wav segments")
+    ap.add_argument("--model", default=DEFAULT_MODEL_DIR, help="Model root or version directory")
+    ap.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Feature cache dir ('' to disable)")
+    ap.add_argument("--prediction-cache", default=DEFAULT_PREDICTION_CACHE,
+                    help="Prediction cache sqlite file ('' to disable)")
+    ap.add_argument("--hash-mode", choices=["bytes", "pcm"], default="bytes",
+                    help="Cache key from file bytes, or from decoded PCM (matches re-encoded uploads)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    t0 = time.perf_counter()
+    model, meta = load_province_model(args.model, expected_config=feature_config())
+    labels = list(meta["labels"])
+    t_load = time.perf_counter() - t0
+
+    if args.wav_dir:
+        segments = segments_from_dir(args.wav_dir)
+    else:
+        segments = segments_from_index(args.index or DEFAULT_INDEX_CSV)
+
+    cache = FeatureCache(args.cache_dir, feature_config()) if args.cache_dir else None
+    pred_cache = PredictionCache(args.prediction_cache) if args.prediction_cache else None
+
+    t1 = time.perf_counter()
+    probs, errors = predict_paths(
+        model,
+        labels,
+        list(segments["segment_file"]),
+        model_version=meta["version"],
+        feature_cache=cache,
+        prediction_cache=pred_cache,
+        hash_mode=args.hash_mode,
+        jobs=args.jobs,
+    )
+    t_predict = time.perf_counter() - t1
+
+    scored = build_scored_frame(segments, labels, probs, errors)
+    videos = aggregate_by_video(scored, labels)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    seg_path = os.path.join(args.out_dir, SEGMENTS_OUT)
+    vid_path = os.path.join(args.out_dir, VIDEOS_OUT)
+    scored.to_csv(seg_path, index=False)
+    videos.to_csv(vid_path, index=False)
+
+    total = time.perf_counter() - t0
+    n_ok = int((scored["status"] == "ok").sum())
+
+    print(f"Model: {meta['version']} ({meta['model_class']}), loaded in {t_load * 1000:.1f} ms")
+    print(f"Segments: {len(scored)} (scored {n_ok}, failed {len(scored) - n_ok})")
+    if pred_cache is not None:
+        print("Prediction cache:", pred_cache.stats())
+        pred_cache.close()
+    if cache is not None:
+        print(f"Feature cache: {cache.hits} hits, {cache.misses} misses")
+    print(f"Features + scoring: {t_predict:.2f}s, total: {total:.2f}s")
+    print(f"Throughput: {len(scored) / total if total > 0 else 0.0:.1f} segments/sec")
+    print(f"Wrote: {seg_path}")
+    print(f"Wrote: {vid_path}")
+
+
+if __name__ == "__main__":
+    main()
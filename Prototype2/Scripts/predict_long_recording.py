@@ -0,0 +1,177 @@
+import argparse
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import librosa
+
+from audio_loader import load_audio
+from province_model_store import load_province_model
+from train_province_mfcc_baseline import (
+    HOP_LENGTH,
+    N_FFT,
+    N_MFCC,
+    TARGET_SR,
+    WIN_LENGTH,
+    feature_config,
+)
+
+
+DEFAULT_MODEL_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/models/province_rf"
+
+# Training segments are cut to at most 30s (MAX_SEG_SECONDS in trim_ni_segments.py)
+WINDOW_SECONDS = 30
+WINDOW_HOP_SECONDS = 15
+
+
+def frame_features(y: np.ndarray, sr: int = TARGET_SR) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One MFCC + delta pass over a whole recording, with the same settings as mfcc_features().
+    Returns (mfcc, delta), each (N_MFCC, n_frames).
+    """
+    if y.size < WIN_LENGTH:
+        y = np.pad(y, (0, WIN_LENGTH - y.size), mode="constant")
+
+    mfcc = librosa.feature.mfcc(
+        y=y,
+        sr=sr,
+        n_mfcc=N_MFCC,
+        n_fft=N_FFT,
+        hop_length=HOP_LENGTH,
+        win_length=WIN_LENGTH,
+    )
+    delta = librosa.feature.delta(mfcc)
+    return mfcc, delta
+
+
+def window_starts(n_frames: int, win: int, step: int) -> np.ndarray:
+    """
+    Start frames of each window. The last window is pinned to the end of the
+    recording so the tail is always covered; recordings shorter than one
+    window give a single window over everything.
+    """
+    if n_frames <= win:
+        return np.array([0], dtype=np.int64)
+
+    starts = np.arange(0, n_frames - win + 1, step, dtype=np.int64)
+    if starts[-1] != n_frames - win:
+        starts = np.append(starts, n_frames - win)
+    return starts
+
+
+def window_stats(frames: np.ndarray, starts: np.ndarray, win: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-window mean and std of every row of frames (d, n_frames), from cumulative sums.
+    Each window costs O(d) regardless of its length.
+
+    Returns (means, stds), each (n_windows, d).
+    """
+    x = frames.astype(np.float64).T
+    zero = np.zeros((1, x.shape[1]))
+    c1 = np.concatenate([zero, np.cumsum(x, axis=0)])
+    c2 = np.concatenate([zero, np.cumsum(x * x, axis=0)])
+
+    ends = np.minimum(starts + win, x.shape[0])
+    n = (ends - starts)[:, None]
+
+    mean = (c1[ends] - c1[starts]) / n
+    var = (c2[ends] - c2[starts]) / n - mean * mean
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def window_features(mfcc: np.ndarray, delta: np.ndarray, starts: np.ndarray, win: int) -> np.ndarray:
+    """
+    Build the 52-dim mfcc_features() layout for every window in one shot:
+    MFCC mean | MFCC std | delta mean | delta std.
+    """
+    m_mean, m_std = window_stats(mfcc, starts, win)
+    d_mean, d_std = window_stats(delta, starts, win)
+    return np.concatenate([m_mean, m_std, d_mean, d_std], axis=1).astype(np.float32)
+
+
+def score_long_recording(
+    path: str,
+    model,
+    labels: List[str],
+    window_seconds: float = WINDOW_SECONDS,
+    hop_seconds: float = WINDOW_HOP_SECONDS,
+) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """
+    Score one long recording with overlapping windows.
+
+    Frame-level MFCCs and deltas are computed once; window features are derived
+    from them, and all windows are scored in a single predict_proba call.
+    Deltas near window edges come from the full recording rather than a cut
+    clip, which differs from per-clip extraction only in the outer 4 frames.
+
+    Returns:
+      windows: start_sec, end_sec, prob_<label>, predicted_province per window
+      distribution: label -> mean window probability for the recording
+    """
+    y, sr = load_audio(path, sr=TARGET_SR)
+    mfcc, delta = frame_features(y, sr)
+
+    # A clip of window_seconds yields 1 + samples // hop frames (centered framing)
+    win = 1 + int(window_seconds * sr) // HOP_LENGTH
+    step = max(1, int(hop_seconds * sr) // HOP_LENGTH)
+
+    starts = window_starts(mfcc.shape[1], win, step)
+    X = window_features(mfcc, delta, starts, win)
+    probs = model.predict_proba(X)
+
+    ends = np.minimum(starts + win - 1, mfcc.shape[1] - 1)
+    windows = pd.DataFrame({
+        "start_sec": starts * HOP_LENGTH / sr,
+        "end_sec": np.minimum(ends * HOP_LENGTH / sr, y.size / sr),
+    })
+    for j, label in enumerate(labels):
+        windows[f"prob_{label}"] = probs[:, j]
+    windows["predicted_province"] = [labels[j] for j in np.argmax(probs, axis=1)]
+
+    distribution = {label: float(p) for label, p in zip(labels, probs.mean(axis=0))}
+    return windows, distribution
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Province distribution for long recordings via sliding windows.")
+    ap.add_argument("recordings", nargs="+", help="Audio files to score")
+    ap.add_argument("--model", default=DEFAULT_MODEL_DIR, help="Model root or version directory")
+    ap.add_argument("--window", type=float, default=WINDOW_SECONDS, help="Window length in seconds")
+    ap.add_argument("--hop", type=float, default=WINDOW_HOP_SECONDS, help="Window hop in seconds")
+    ap.add_argument("--windows-dir", default=None, help="Write per-window CSVs here")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    model, meta = load_province_model(args.model, expected_config=feature_config())
+    labels = list(meta["labels"])
+
+    rows = []
+    for path in args.recordings:
+        t0 = time.perf_counter()
+        windows, dist = score_long_recording(path, model, labels, args.window, args.hop)
+        elapsed = time.perf_counter() - t0
+
+        duration = float(windows["end_sec"].max()) if len(windows) else 0.0
+        best = max(dist, key=dist.get)
+        print(f"{os.path.basename(path)}: {best} ({dist[best]:.2f}) "
+              f"- {len(windows)} windows over {duration / 60:.1f} min in {elapsed:.2f}s")
+
+        if args.windows_dir:
+            os.makedirs(args.windows_dir, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(path))[0]
+            windows.to_csv(os.path.join(args.windows_dir, f"{stem}_windows.csv"), index=False)
+
+        rows.append({"recording": path, "n_windows": len(windows), "predicted_province": best, **dist})
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from audio_loader import load_audio
+from train_province_mfcc_baseline import TARGET_SR
+
+
+# In-memory LRU entries; the sqlite store behind it holds everything else
+MAX_MEMORY_ENTRIES = 10_000
+
+# Disk rows kept after pruning (least recently used go first); None = unbounded
+MAX_DISK_ENTRIES = 1_000_000
+
+# Prune the disk store after this many writes
+PRUNE_EVERY_PUTS = 1_000
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def pcm_digest(path: str) -> str:
+    """
+    Hash of the decoded audio (16 kHz mono, quantized to int16), so the same
+    speech re-uploaded in another container or with new tags still matches.
+    """
+    y, _ = load_audio(path, sr=TARGET_SR)
+    pcm = np.clip(np.round(y * 32768.0), -32768, 32767).astype("<i2")
+    return hashlib.sha256(pcm.tobytes()).hexdigest()
+
+
+def content_key(path: str, config: Dict[str, object], model_version: str, mode: str = "bytes") -> str:
+    """
+    Cache key for one prediction: audio content + feature config + model version.
+    mode="bytes" hashes the file; mode="pcm" hashes the decoded samples.
+    """
+    if mode == "bytes":
+        digest = file_digest(path)
+    elif mode == "pcm":
+        digest = pcm_digest(path)
+    else:
+        raise ValueError(f"Unknown hash mode: {mode}")
+
+    salt = json.dumps({"config": config, "model": model_version, "mode": mode}, sort_keys=True)
+    return hashlib.sha256((digest + "|" + salt).encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    Bounded LRU of prediction probabilities in memory, backed by a sqlite file
+    that survives restarts. Counters:
+      memory_hits / disk_hits / misses / puts
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_memory_entries: int = MAX_MEMORY_ENTRIES,
+        max_disk_entries: int | None = MAX_DISK_ENTRIES,
+    ):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.memory: "OrderedDict[str, List[float]]" = OrderedDict()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.puts = 0
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        # WAL keeps per-put commits cheap and lets several predictor processes read concurrently
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " key TEXT PRIMARY KEY,"
+            " probs TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions(last_used)")
+        self.conn.commit()
+
+    def _remember(self, key: str, probs: List[float]):
+        self.memory[key] = probs
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key: str) -> List[float] | None:
+        probs = self.memory.get(key)
+        if probs is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return probs
+
+        row = self.conn.execute("SELECT probs FROM predictions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        probs = json.loads(row[0])
+        self.conn.execute("UPDATE predictions SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        self._remember(key, probs)
+        self.disk_hits += 1
+        return probs
+
+    def put(self, key: str, probs) -> None:
+        probs = [float(p) for p in probs]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO predictions (key, probs, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(probs), time.time()),
+        )
+        self.conn.commit()
+        self._remember(key, probs)
+
+        self.puts += 1
+        if self.max_disk_entries is not None and self.puts % PRUNE_EVERY_PUTS == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop least recently used disk rows beyond max_disk_entries."""
+        self.conn.execute(
+            "DELETE FROM predictions WHERE key IN ("
+            " SELECT key FROM predictions ORDER BY last_used DESC, rowid DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self.conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate_pct": round(100.0 * hits / max(hits + self.misses, 1), 1),
+            "memory_entries": len(self.memory),
+        }
+
+    def close(self):
+        self.conn.close()
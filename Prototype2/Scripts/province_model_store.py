@@ -0,0 +1,293 @@
+import copy
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import joblib
+import numpy as np
+
+
+# Bump when the on-disk layout of an artifact changes
+ARTIFACT_VERSION = 1
+
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+LATEST_FILE = "LATEST"
+
+# Flat per-node arrays of a packed forest, one .npy file each
+FOREST_DIR = "forest"
+FOREST_ARRAYS = ["roots", "left", "right", "feature", "threshold", "value"]
+
+
+def _write_text_atomic(path: str, text: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class PackedForest:
+    """
+    Read-only predictor for a fitted RandomForestClassifier, stored as flat node arrays.
+
+    sklearn copies tree nodes into private buffers when unpickling, so a pickled
+    forest can never be memory-mapped. Here all trees live in shared arrays:
+      roots:     (n_trees,)             node index of each tree root
+      left/right:(n_nodes,)             child indices (leaves point at themselves)
+      feature:   (n_nodes,)             split feature (0 for leaves)
+      threshold: (n_nodes,)             split threshold
+      value:     (n_nodes, n_classes)   leaf class probabilities
+    Loaded with np.load(mmap_mode="r"), every process shares the same pages.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], classes: List[str], max_depth: int):
+        self.roots = arrays["roots"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.classes_ = np.array(classes, dtype=object)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_forest(cls, forest) -> "PackedForest":
+        roots, left, right, feature, threshold, value = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in forest.estimators_:
+            t = est.tree_
+            n = t.node_count
+            idx = np.arange(n, dtype=np.int64)
+            is_leaf = t.children_left < 0
+
+            roots.append(offset)
+            left.append(np.where(is_leaf, idx, t.children_left) + offset)
+            right.append(np.where(is_leaf, idx, t.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, t.feature).astype(np.int64))
+            threshold.append(t.threshold.astype(np.float64))
+
+            v = t.value[:, 0, :].astype(np.float64)
+            totals = v.sum(axis=1, keepdims=True)
+            value.append(np.divide(v, totals, out=np.zeros_like(v), where=totals > 0))
+
+            offset += n
+            max_depth = max(max_depth, t.max_depth)
+
+        arrays = {
+            "roots": np.array(roots, dtype=np.int64),
+            "left": np.concatenate(left),
+            "right": np.concatenate(right),
+            "feature": np.concatenate(feature),
+            "threshold": np.concatenate(threshold),
+            "value": np.concatenate(value),
+        }
+        return cls(arrays, [str(c) for c in forest.classes_], max_depth)
+
+    def save(self, out_dir: str):
+        os.makedirs(out_dir, exist_ok=True)
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(out_dir, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, in_dir: str, classes: List[str], max_depth: int, mmap: bool = True) -> "PackedForest":
+        arrays = {
+            name: np.load(os.path.join(in_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in FOREST_ARRAYS
+        }
+        return cls(arrays, classes, max_depth)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Walk every tree for every sample at once, one tree level per step.
+        Matches RandomForestClassifier.predict_proba (mean of leaf distributions).
+        """
+        # sklearn casts inputs to float32 before comparing against thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        n_samples, n_trees = X.shape[0], self.roots.size
+        node = np.tile(self.roots, n_samples)
+        sample = np.repeat(np.arange(n_samples), n_trees)
+
+        # Only (sample, tree) paths that have not reached a leaf are advanced
+        active = np.arange(node.size)
+        for _ in range(self.max_depth):
+            cur = node[active]
+            go_left = X[sample[active], self.feature[cur]] <= self.threshold[cur]
+            nxt = np.where(go_left, self.left[cur], self.right[cur])
+            node[active] = nxt
+            active = active[nxt != cur]
+            if active.size == 0:
+                break
+
+        return self.value[node.reshape(n_samples, n_trees)].mean(axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def save_province_model(
+    model,
+    labels: List[str],
+    feature_config: Dict[str, object],
+    model_root: str,
+) -> str:
+    """
+    Save a fitted classifier as a new versioned artifact under model_root.
+
+    Layout:
+      model_root/<version>/model.joblib   (full estimator, for inspection/refitting)
+      model_root/<version>/forest/*.npy   (packed node arrays: forests, or a
+                                          PackedForest attribute of the model)
+      model_root/<version>/meta.json      (artifact version, labels, feature config)
+      model_root/LATEST                   (name of the newest version directory)
+
+    Returns the version directory path.
+    """
+    model_labels = [str(c) for c in getattr(model, "classes_", labels)]
+    labels = [str(c) for c in labels]
+    if model_labels != labels:
+        raise ValueError(f"Label set {labels} does not match model classes {model_labels}")
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    version = stamp
+    n = 1
+    while os.path.exists(os.path.join(model_root, version)):
+        n += 1
+        version = f"{stamp}-{n}"
+
+    out_dir = os.path.join(model_root, version)
+    os.makedirs(out_dir)
+
+    packed = None
+    packed_attr = None
+    if hasattr(model, "estimators_") and all(hasattr(e, "tree_") for e in model.estimators_):
+        packed = PackedForest.from_forest(model)
+        joblib.dump(model, os.path.join(out_dir, MODEL_FILE))
+    else:
+        # A composite model (e.g. CascadeClassifier) holding a PackedForest: its
+        # arrays go to forest/ and the pickle gets None in that slot, so loading
+        # memory-maps the forest instead of unpickling a private copy of it
+        packed_attr = next((k for k, v in vars(model).items() if isinstance(v, PackedForest)), None)
+        if packed_attr is not None:
+            packed = getattr(model, packed_attr)
+            shell = copy.copy(model)
+            setattr(shell, packed_attr, None)
+            joblib.dump(shell, os.path.join(out_dir, MODEL_FILE))
+        else:
+            joblib.dump(model, os.path.join(out_dir, MODEL_FILE))
+
+    if packed is not None:
+        packed.save(os.path.join(out_dir, FOREST_DIR))
+
+    meta = {
+        "artifact_version": ARTIFACT_VERSION,
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model_class": type(model).__name__,
+        "labels": labels,
+        "feature_config": feature_config,
+        "packed_forest": None if packed is None else {"max_depth": packed.max_depth, "attribute": packed_attr},
+    }
+    _write_text_atomic(os.path.join(out_dir, META_FILE), json.dumps(meta, indent=2))
+    _write_text_atomic(os.path.join(model_root, LATEST_FILE), version + "\n")
+
+    return out_dir
+
+
+def resolve_model_dir(path: str) -> str:
+    """
+    Accept either a version directory or a model root containing LATEST.
+    """
+    if os.path.exists(os.path.join(path, META_FILE)):
+        return path
+
+    latest = os.path.join(path, LATEST_FILE)
+    if not os.path.exists(latest):
+        raise FileNotFoundError(f"No model artifact found at {path}")
+
+    with open(latest, encoding="utf-8") as f:
+        version = f.read().strip()
+    return os.path.join(path, version)
+
+
+def read_model_meta(path: str) -> Dict[str, object]:
+    model_dir = resolve_model_dir(path)
+    with open(os.path.join(model_dir, META_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_feature_config(meta: Dict[str, object], expected_config: Dict[str, object]):
+    """
+    Raise ValueError if the artifact was trained with a different feature configuration.
+    Compared via JSON round-trip so tuples/lists and int/float keys compare the same way.
+    """
+    saved = meta.get("feature_config") or {}
+    expected = json.loads(json.dumps(expected_config))
+
+    diffs = [
+        f"{k}: saved={saved.get(k)!r} current={expected.get(k)!r}"
+        for k in sorted(set(saved) | set(expected))
+        if saved.get(k) != expected.get(k)
+    ]
+    if diffs:
+        raise ValueError("Feature configuration mismatch: " + "; ".join(diffs))
+
+
+def load_province_model(
+    path: str,
+    expected_config: Dict[str, object] | None = None,
+    mmap: bool = True,
+    full: bool = False,
+) -> Tuple[object, Dict[str, object]]:
+    """
+    Load a saved classifier and its metadata.
+
+    - Metadata is read and validated before the model file is touched, so a
+      mismatched feature configuration fails fast.
+    - Forests saved with packed node arrays load as a PackedForest (or, for
+      a composite model, its packed attribute is restored from them). With
+      mmap=True those arrays are memory-mapped read-only, so worker processes
+      share the same pages and cold-start does not unpickle hundreds of trees.
+    - Anything else (or full=True) is loaded from the joblib pickle.
+
+    Returns (model, meta).
+    """
+    model_dir = resolve_model_dir(path)
+    meta = read_model_meta(model_dir)
+
+    if meta.get("artifact_version") != ARTIFACT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact version {meta.get('artifact_version')} "
+            f"(expected {ARTIFACT_VERSION}) in {model_dir}"
+        )
+
+    if expected_config is not None:
+        check_feature_config(meta, expected_config)
+
+    packed = meta.get("packed_forest")
+    packed_attr = packed.get("attribute") if packed else None
+    if packed and not packed_attr and not full:
+        model = PackedForest.load(
+            os.path.join(model_dir, FOREST_DIR),
+            classes=meta["labels"],
+            max_depth=packed["max_depth"],
+            mmap=mmap,
+        )
+    else:
+        model = joblib.load(os.path.join(model_dir, MODEL_FILE))
+
+    if packed_attr:
+        # Only the packed arrays of a nested forest were saved, so they are always restored
+        setattr(model, packed_attr, PackedForest.load(
+            os.path.join(model_dir, FOREST_DIR),
+            classes=meta["labels"],
+            max_depth=packed["max_depth"],
+            mmap=mmap,
+        ))
+
+    return model, meta
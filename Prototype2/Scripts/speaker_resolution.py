@@ -0,0 +1,235 @@
+import argparse
+import heapq
+import re
+import sys
+import time
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+
+# normalise_key (fadas, mojibake, titles) lives with the speaker extraction script
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "ProjectArchive" / "Scripts"))
+from extract_speakers2 import normalise_key  # noqa: E402
+
+
+FILES_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData/dail_speaker_files.csv"
+SPEAKERS_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData/speaker_master.csv"
+MATCHES_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/DailData/roi_MetaData/speaker_matches.csv"
+
+NGRAM = 3
+
+# Accept a fuzzy match at or above this similarity (0-1)
+MATCH_THRESHOLD = 0.88
+
+# A match is flagged ambiguous when the runner-up is within this margin
+AMBIGUOUS_MARGIN = 0.03
+
+# Candidates (by shared n-grams) that get a full similarity score
+MAX_CANDIDATES = 20
+
+# n-grams shared by more than this fraction of names carry no signal; skip them
+MAX_GRAM_FRACTION = 0.2
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9 ]+")
+
+MATCH_COLUMNS = ["query_key", "match_key", "score", "method", "runner_up_key", "runner_up_score", "ambiguous"]
+
+
+@lru_cache(maxsize=None)
+def match_key(name: str) -> str:
+    """
+    Comparison form of a speaker name: normalise_key() plus punctuation
+    dropped (O'Brien == OBrien, Healy-Rae == Healy Rae).
+    """
+    key = normalise_key(str(name))
+    key = _NON_ALNUM_RE.sub(" ", key.replace("'", ""))
+    return " ".join(key.split())
+
+
+@lru_cache(maxsize=None)
+def ngrams(key: str, n: int = NGRAM) -> frozenset:
+    padded = f" {key} "
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Best of the character-level ratio and the ratio with tokens sorted, so
+    'mcdonald mary lou' still scores 1.0 against 'mary lou mcdonald'.
+    """
+    if a == b:
+        return 1.0
+    direct = SequenceMatcher(None, a, b, autojunk=False).ratio()
+    sorted_a, sorted_b = " ".join(sorted(a.split())), " ".join(sorted(b.split()))
+    if sorted_a == sorted_b:
+        return 1.0
+    return max(direct, SequenceMatcher(None, sorted_a, sorted_b, autojunk=False).ratio())
+
+
+class SpeakerIndex:
+    """
+    Blocking index over reference speaker names.
+
+    Each reference name is reduced to match_key() and indexed by its
+    character n-grams. A query is only compared (with similarity()) against
+    the few names sharing the most n-grams with it, found by walking the
+    postings of its own n-grams, so cost grows with the number of similar
+    names rather than the size of the list.
+    """
+
+    def __init__(self, names: Iterable[str], n: int = NGRAM, max_gram_fraction: float = MAX_GRAM_FRACTION):
+        self.n = n
+        # reference key -> the original names that reduce to it
+        self.names_by_key: Dict[str, List[str]] = {}
+        for name in names:
+            if name is None or pd.isna(name) or not str(name).strip():
+                continue
+            self.names_by_key.setdefault(match_key(name), []).append(str(name))
+
+        self.keys = list(self.names_by_key)
+        postings: Dict[str, List[int]] = {}
+        for i, key in enumerate(self.keys):
+            for gram in ngrams(key, n):
+                postings.setdefault(gram, []).append(i)
+
+        max_postings = max(20, int(max_gram_fraction * len(self.keys)))
+        self.postings = {g: ids for g, ids in postings.items() if len(ids) <= max_postings}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, key: str, limit: int = MAX_CANDIDATES) -> List[int]:
+        """Ids of the reference keys sharing the most n-grams with key (best first)."""
+        shared = Counter()
+        for gram in ngrams(key, self.n):
+            ids = self.postings.get(gram)
+            if ids:
+                shared.update(ids)
+        return [i for i, _ in heapq.nlargest(limit, shared.items(), key=lambda kv: kv[1])]
+
+    def best(self, name: str, limit: int = MAX_CANDIDATES) -> List[Tuple[str, float]]:
+        """Up to two (reference key, similarity) pairs for name, best first."""
+        key = match_key(name)
+        if key in self.names_by_key:
+            exact = [(key, 1.0)]
+            others = [(self.keys[i], similarity(key, self.keys[i])) for i in self.candidates(key, limit)]
+            others = [kv for kv in others if kv[0] != key]
+            return exact + heapq.nlargest(1, others, key=lambda kv: kv[1])
+
+        scored = [(self.keys[i], similarity(key, self.keys[i])) for i in self.candidates(key, limit)]
+        return heapq.nlargest(2, scored, key=lambda kv: kv[1])
+
+
+def resolve_speakers(
+    queries: Iterable[str],
+    index: SpeakerIndex,
+    threshold: float = MATCH_THRESHOLD,
+    ambiguous_margin: float = AMBIGUOUS_MARGIN,
+) -> pd.DataFrame:
+    """
+    Match table with one row per distinct query name:
+      query_key, match_key (reference name, or None), score (0-1 confidence),
+      method (exact / fuzzy / none), runner_up_key, runner_up_score, ambiguous
+    """
+    rows = []
+    for query in pd.unique(pd.Series(list(queries), dtype=object).dropna()):
+        best = index.best(query)
+        top_key, top_score = best[0] if best else (None, 0.0)
+        runner_key, runner_score = best[1] if len(best) > 1 else (None, 0.0)
+
+        if top_key is not None and top_score >= threshold:
+            method = "exact" if top_key == match_key(query) else "fuzzy"
+            matched = index.names_by_key[top_key][0]
+        else:
+            method, matched = "none", None
+
+        rows.append({
+            "query_key": query,
+            "match_key": matched,
+            "score": round(top_score, 4),
+            "method": method,
+            "runner_up_key": index.names_by_key[runner_key][0] if runner_key is not None else None,
+            "runner_up_score": round(runner_score, 4),
+            "ambiguous": matched is not None and runner_score >= top_score - ambiguous_margin,
+        })
+
+    return pd.DataFrame(rows, columns=MATCH_COLUMNS)
+
+
+def apply_matches(keys: pd.Series, matches: pd.DataFrame) -> pd.Series:
+    """keys with every matched query replaced by its reference name; unmatched keys unchanged."""
+    resolved = matches.dropna(subset=["match_key"])
+    mapping = dict(zip(resolved["query_key"], resolved["match_key"]))
+    return keys.map(mapping).fillna(keys)
+
+
+def near_duplicates(names: Iterable[str], threshold: float = MATCH_THRESHOLD) -> pd.DataFrame:
+    """
+    Pairs of distinct names in one list that resolve to each other: different
+    spellings of the same speaker. Same blocking index, queried against itself.
+    """
+    names = [str(n) for n in pd.unique(pd.Series(list(names), dtype=object).dropna())]
+    index = SpeakerIndex(names)
+
+    pairs = {}
+    for key in index.keys:
+        for i in index.candidates(key):
+            other = index.keys[i]
+            if other == key:
+                continue
+            score = similarity(key, other)
+            if score >= threshold:
+                pairs[tuple(sorted((key, other)))] = score
+
+    # Spellings that already share a match key are duplicates too
+    for key, originals in index.names_by_key.items():
+        if len(set(originals)) > 1:
+            pairs[(key, key)] = 1.0
+
+    rows = []
+    for (a, b), score in sorted(pairs.items()):
+        rows.append({
+            "name_a": index.names_by_key[a][0],
+            "name_b": index.names_by_key[b][-1 if a == b else 0],
+            "score": round(score, 4),
+        })
+    return pd.DataFrame(rows, columns=["name_a", "name_b", "score"])
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Resolve speaker keys in dail_speaker_files.csv against speaker_master.csv.")
+    ap.add_argument("--files", default=FILES_CSV)
+    ap.add_argument("--speakers", default=SPEAKERS_CSV)
+    ap.add_argument("--out", default=MATCHES_CSV)
+    ap.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    files = pd.read_csv(args.files, encoding="utf-8-sig")
+    speakers = pd.read_csv(args.speakers, encoding="utf-8-sig")
+
+    t0 = time.perf_counter()
+    index = SpeakerIndex(speakers["speaker_key"])
+    matches = resolve_speakers(files["speaker_key"], index, threshold=args.threshold)
+    elapsed = time.perf_counter() - t0
+
+    matches.to_csv(args.out, index=False)
+
+    print(f"Reference speakers: {len(index)}  Distinct file speakers: {len(matches)}")
+    print(matches["method"].value_counts().to_string())
+    print("Ambiguous matches:", int(matches["ambiguous"].sum()))
+    print(f"Resolved in {elapsed:.2f}s")
+    print("Wrote:", args.out)
+
+
+if __name__ == "__main__":
+    main()
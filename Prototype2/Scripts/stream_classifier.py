@@ -0,0 +1,345 @@
+import argparse
+import struct
+import sys
+import time
+from typing import BinaryIO, Dict, Iterator, List
+
+import numpy as np
+
+import librosa
+
+from province_model_store import load_province_model
+from train_province_mfcc_baseline import (
+    HOP_LENGTH,
+    N_FFT,
+    N_MFCC,
+    TARGET_SR,
+    WIN_LENGTH,
+    feature_config,
+)
+
+
+DEFAULT_MODEL_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/models/province_rf"
+
+# Stats cover the most recent 30s of frames, the same span as a training segment
+STATS_WINDOW_FRAMES = 1 + (30 * TARGET_SR) // HOP_LENGTH
+
+# Emit a prediction every 1s of audio (100 frames at 10ms hop)
+EMIT_EVERY_FRAMES = 100
+
+CHUNK_SAMPLES = 1600      # 100ms per read
+POLL_SECONDS = 0.2        # how often a growing file is re-checked
+TOP_DB = 80.0             # librosa.power_to_db default used by librosa.feature.mfcc
+
+# librosa.feature.delta(width=9, order=1): Savitzky-Golay slope over +-4 frames
+DELTA_HALF_WIDTH = 4
+DELTA_KERNEL = np.arange(-DELTA_HALF_WIDTH, DELTA_HALF_WIDTH + 1, dtype=np.float64)
+DELTA_KERNEL /= np.sum(DELTA_KERNEL ** 2)
+
+
+def dct_matrix(n_out: int, n_in: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, as used by librosa.feature.mfcc (dct_type=2, norm='ortho')."""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+class RunningStats:
+    """
+    Mean/std of the last `capacity` vectors pushed, kept in a ring buffer with
+    running sums so each push is O(dim). Sums are rebuilt from the buffer once
+    per lap to stop floating-point drift from add/subtract.
+    """
+
+    def __init__(self, dim: int, capacity: int):
+        self.buf = np.zeros((capacity, dim), dtype=np.float64)
+        self.capacity = capacity
+        self.count = 0
+        self.pos = 0
+        self.s1 = np.zeros(dim)
+        self.s2 = np.zeros(dim)
+
+    def push(self, rows: np.ndarray):
+        for row in np.atleast_2d(rows):
+            if self.count == self.capacity:
+                old = self.buf[self.pos]
+                self.s1 -= old
+                self.s2 -= old * old
+            else:
+                self.count += 1
+
+            self.buf[self.pos] = row
+            self.s1 += row
+            self.s2 += row * row
+            self.pos = (self.pos + 1) % self.capacity
+
+            if self.pos == 0:
+                live = self.buf[:self.count]
+                self.s1 = live.sum(axis=0)
+                self.s2 = (live * live).sum(axis=0)
+
+    def mean_std(self) -> tuple[np.ndarray, np.ndarray]:
+        n = max(self.count, 1)
+        mean = self.s1 / n
+        return mean, np.sqrt(np.maximum(self.s2 / n - mean * mean, 0.0))
+
+
+class StreamingMfccExtractor:
+    """
+    Incremental version of mfcc_features() for a live sample stream.
+
+    - Framing matches librosa's centered STFT: the stream starts with n_fft//2
+      zeros, and a frame is produced as soon as its n_fft samples have arrived.
+    - Only the last n_fft - hop samples are kept between pushes.
+    - Deltas use the same 9-frame kernel as librosa.feature.delta and lag the
+      MFCCs by 4 frames. The first 4 deltas equal the 5th, as in librosa's
+      'interp' edge mode for a first-order fit.
+    - With top_db set, the dB floor follows the running maximum instead of the
+      clip maximum, so early frames can sit slightly above an offline extract.
+
+    features() returns the 52-dim layout (MFCC mean/std, delta mean/std) over
+    the most recent window_frames frames.
+    """
+
+    def __init__(self, window_frames: int = STATS_WINDOW_FRAMES, top_db: float | None = TOP_DB, sr: int = TARGET_SR):
+        self.sr = sr
+        self.top_db = top_db
+
+        win = librosa.filters.get_window("hann", WIN_LENGTH, fftbins=True)
+        self.window = librosa.util.pad_center(win, size=N_FFT)
+        self.mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT)
+        self.dct = dct_matrix(N_MFCC, self.mel_basis.shape[0])
+
+        self.pending = np.zeros(N_FFT // 2, dtype=np.float32)
+        self.max_db = -np.inf
+        self.n_frames = 0
+
+        # Last 2*4+1 MFCC frames, for the delta kernel
+        self.recent = np.zeros((0, N_MFCC))
+        self.mfcc_stats = RunningStats(N_MFCC, window_frames)
+        self.delta_stats = RunningStats(N_MFCC, window_frames)
+
+    def _frames_to_mfcc(self, frames: np.ndarray) -> np.ndarray:
+        spec = np.abs(np.fft.rfft(frames * self.window, n=N_FFT, axis=1)) ** 2
+        mel = spec @ self.mel_basis.T
+        log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+
+        if self.top_db is not None:
+            self.max_db = max(self.max_db, float(log_mel.max()))
+            log_mel = np.maximum(log_mel, self.max_db - self.top_db)
+
+        return log_mel @ self.dct.T
+
+    def _push_deltas(self, mfcc: np.ndarray):
+        width = 2 * DELTA_HALF_WIDTH + 1
+        self.recent = np.concatenate([self.recent, mfcc])
+
+        if self.recent.shape[0] < width:
+            return
+
+        windows = np.lib.stride_tricks.sliding_window_view(self.recent, width, axis=0)
+        deltas = windows @ DELTA_KERNEL
+
+        if self.delta_stats.count == 0:
+            # First full kernel: also fill the 4 leading frames with its value
+            deltas = np.concatenate([np.repeat(deltas[:1], DELTA_HALF_WIDTH, axis=0), deltas])
+        self.delta_stats.push(deltas)
+
+        self.recent = self.recent[-(width - 1):]
+
+    def push(self, samples: np.ndarray) -> int:
+        """
+        Add mono float samples at self.sr. Returns the number of new frames.
+        """
+        buf = np.concatenate([self.pending, np.asarray(samples, dtype=np.float32).ravel()])
+        if buf.size < N_FFT:
+            self.pending = buf
+            return 0
+
+        n_new = 1 + (buf.size - N_FFT) // HOP_LENGTH
+        frames = np.lib.stride_tricks.sliding_window_view(buf, N_FFT)[::HOP_LENGTH][:n_new]
+        self.pending = buf[n_new * HOP_LENGTH:]
+
+        mfcc = self._frames_to_mfcc(frames.astype(np.float64))
+        self.mfcc_stats.push(mfcc)
+        self._push_deltas(mfcc)
+
+        self.n_frames += n_new
+        return n_new
+
+    def features(self) -> np.ndarray:
+        m_mean, m_std = self.mfcc_stats.mean_std()
+        d_mean, d_std = self.delta_stats.mean_std()
+        return np.concatenate([m_mean, m_std, d_mean, d_std]).astype(np.float32)
+
+
+class StreamingClassifier:
+    """
+    Wrap a StreamingMfccExtractor and a province model; push() returns a
+    prediction each time another emit_every frames have been processed.
+    """
+
+    def __init__(self, model, labels: List[str], emit_every: int = EMIT_EVERY_FRAMES, extractor=None):
+        self.model = model
+        self.labels = list(labels)
+        self.emit_every = emit_every
+        self.extractor = extractor or StreamingMfccExtractor()
+        self._next_emit = emit_every
+
+    def push(self, samples: np.ndarray) -> List[Dict[str, object]]:
+        ex = self.extractor
+        ex.push(samples)
+
+        out = []
+        if ex.n_frames >= self._next_emit and ex.delta_stats.count > 0:
+            probs = self.model.predict_proba(ex.features()[None, :])[0]
+            best = int(np.argmax(probs))
+            out.append({
+                "frame": ex.n_frames,
+                "time_sec": ex.n_frames * HOP_LENGTH / ex.sr,
+                "predicted_province": self.labels[best],
+                "confidence": float(probs[best]),
+                "probs": dict(zip(self.labels, map(float, probs))),
+            })
+            while self._next_emit <= ex.n_frames:
+                self._next_emit += self.emit_every
+        return out
+
+
+def _pcm_to_float(raw: bytes, sample_format: str, channels: int) -> np.ndarray:
+    if sample_format == "int16":
+        x = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    else:
+        x = np.frombuffer(raw, dtype="<f4")
+    if channels > 1:
+        x = x.reshape(-1, channels).mean(axis=1)
+    return x
+
+
+def read_wav_header(f: BinaryIO) -> Dict[str, object]:
+    """
+    Parse RIFF chunks up to 'data'. The data size in the header is ignored,
+    because a file that is still being written usually has it wrong.
+    """
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError("WAV header incomplete (no data chunk yet)")
+        cid, size = head[:4], struct.unpack("<I", head[4:])[0]
+
+        if cid == b"data":
+            break
+        body = f.read(size + (size & 1))
+        if cid == b"fmt ":
+            tag, channels, sr, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            fmt = {"tag": tag, "channels": channels, "sr": sr, "bits": bits}
+
+    if fmt is None:
+        raise ValueError("WAV has no fmt chunk")
+
+    if fmt["tag"] in (1, 0xFFFE) and fmt["bits"] == 16:
+        sample_format = "int16"
+    elif fmt["tag"] in (3, 0xFFFE) and fmt["bits"] == 32:
+        sample_format = "float32"
+    else:
+        raise ValueError(f"Unsupported WAV format: {fmt}")
+
+    return {"sr": fmt["sr"], "channels": fmt["channels"], "sample_format": sample_format}
+
+
+def iter_wav_chunks(
+    path: str,
+    chunk_samples: int = CHUNK_SAMPLES,
+    follow: bool = False,
+    idle_timeout: float | None = None,
+) -> Iterator[np.ndarray]:
+    """
+    Yield mono float32 chunks from a WAV file. With follow=True, keep polling
+    for appended data (a growing recording) until idle_timeout seconds pass
+    without new samples.
+    """
+    with open(path, "rb") as f:
+        hdr = read_wav_header(f)
+        if hdr["sr"] != TARGET_SR:
+            raise ValueError(f"Stream must be {TARGET_SR} Hz, got {hdr['sr']} Hz")
+
+        frame_bytes = hdr["channels"] * (2 if hdr["sample_format"] == "int16" else 4)
+        want = chunk_samples * frame_bytes
+        carry = b""
+        idle_since = time.monotonic()
+
+        while True:
+            raw = carry + f.read(want - len(carry))
+            usable = len(raw) - len(raw) % frame_bytes
+            carry = raw[usable:]
+
+            if usable:
+                idle_since = time.monotonic()
+                yield _pcm_to_float(raw[:usable], hdr["sample_format"], hdr["channels"])
+                continue
+
+            if not follow:
+                return
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return
+            time.sleep(POLL_SECONDS)
+
+
+def iter_raw_pcm(stream: BinaryIO, chunk_samples: int = CHUNK_SAMPLES) -> Iterator[np.ndarray]:
+    """
+    Yield chunks from headerless 16 kHz mono s16le PCM, e.g. a microphone piped through
+    `ffmpeg -f avfoundation -i :0 -ac 1 -ar 16000 -f s16le -`.
+    """
+    carry = b""
+    while True:
+        raw = stream.read(chunk_samples * 2)
+        if not raw:
+            return
+        raw = carry + raw
+        usable = len(raw) - len(raw) % 2
+        carry = raw[usable:]
+        if usable:
+            yield _pcm_to_float(raw[:usable], "int16", 1)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Live province prediction from a PCM stream.")
+    ap.add_argument("source", help="WAV file path, or '-' for raw s16le 16kHz mono PCM on stdin")
+    ap.add_argument("--model", default=DEFAULT_MODEL_DIR, help="Model root or version directory")
+    ap.add_argument("--follow", action="store_true", help="Keep reading as the WAV file grows")
+    ap.add_argument("--idle-timeout", type=float, default=10.0, help="Stop following after this many idle seconds")
+    ap.add_argument("--emit-every", type=int, default=EMIT_EVERY_FRAMES, help="Frames between predictions")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    model, meta = load_province_model(args.model, expected_config=feature_config())
+    clf = StreamingClassifier(model, meta["labels"], emit_every=args.emit_every)
+
+    if args.source == "-":
+        chunks = iter_raw_pcm(sys.stdin.buffer)
+    else:
+        chunks = iter_wav_chunks(args.source, follow=args.follow, idle_timeout=args.idle_timeout)
+
+    worst_ms = 0.0
+    for chunk in chunks:
+        t0 = time.perf_counter()
+        preds = clf.push(chunk)
+        worst_ms = max(worst_ms, (time.perf_counter() - t0) * 1000)
+
+        for p in preds:
+            print(f"[{p['time_sec']:8.1f}s] {p['predicted_province']:<9} ({p['confidence']:.2f})  "
+                  f"worst chunk latency {worst_ms:.1f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import soundfile as sf
+
+from audio_fingerprint import cluster_report, fingerprint_paths, fingerprint_signal, jaccard, load_segments, minhash
+from merge_ni_and_dail_datasets import dedupe, drop_near_duplicates, ensure_fields, read_rows
+
+SR = 16000
+
+
+def speech_like(seconds: float, seed: int) -> np.ndarray:
+    """Gliding harmonic tone switched on and off like syllables, plus a little noise."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SR)
+    t = np.arange(n) / SR
+    f0 = 120 + 40 * np.sin(2 * np.pi * 0.3 * t + rng.uniform(0, 6))
+    phase = np.cumsum(2 * np.pi * f0 / SR)
+    y = sum(np.sin(h * phase) / h * (1 + np.sin(2 * np.pi * rng.uniform(1, 5) * t)) for h in range(1, 15))
+    y = y * np.repeat(rng.uniform(size=int(seconds * 5) + 1) > 0.3, SR // 5)[:n]
+    y = y + 0.05 * rng.normal(size=n)
+    return (y / np.abs(y).max()).astype(np.float32)
+
+
+def test_fingerprint_survives_offset_gain_and_noise():
+    y = speech_like(20, seed=1)
+    shifted = np.roll(y, -int(0.37 * SR)) * 0.6 + 0.01 * np.random.default_rng(0).normal(size=y.size)
+
+    a = fingerprint_signal(y)
+    assert a.dtype == np.uint32 and a.size > 1000
+
+    assert jaccard(a, fingerprint_signal(shifted.astype(np.float32))) > 0.1
+    assert jaccard(a, fingerprint_signal(speech_like(20, seed=2))) < 0.02
+    assert np.mean(minhash(a) == minhash(fingerprint_signal(y[SR * 5:SR * 15]))) > 0.2
+
+
+def test_cluster_report_and_merge(tmp_path: Path):
+    base = speech_like(15, seed=10)
+    clips = {
+        "ni_a": base,
+        "dail_copy": np.roll(base, 3000) * 0.8,
+        "dail_excerpt": base[SR * 3:SR * 12],
+    }
+    clips.update({f"other_{i}": speech_like(15, seed=100 + i) for i in range(12)})
+
+    rows = []
+    for i, (name, y) in enumerate(clips.items()):
+        path = tmp_path / f"{name}.wav"
+        sf.write(path, y, SR)
+        rows.append({
+            "segment_file": str(path),
+            "dataset": "NI" if name.startswith("ni") else "DAIL",
+            "video_id": f"vid{i:08d}",
+            "start_sec": "0",
+            "end_sec": "15",
+        })
+    rows = pd.DataFrame(rows)
+
+    report = cluster_report(rows, fingerprint_paths(rows["segment_file"], workers=1))
+
+    assert report["cluster_id"].nunique() == 1
+    assert set(report["video_id"]) == {"vid00000000", "vid00000001", "vid00000002"}
+    assert report.loc[report["is_representative"], "dataset"].tolist() == ["NI"]
+
+    report_path = tmp_path / "duplicates.csv"
+    report.to_csv(report_path, index=False)
+    with open(report_path, newline="") as f:
+        assert len(list(csv.DictReader(f))) == 3
+
+    kept, removed = drop_near_duplicates(rows.to_dict("records"), str(report_path))
+    assert removed == 2
+    assert len(kept) == len(rows) - 2
+    assert "vid00000000" in {r["video_id"] for r in kept}
+
+
+def test_report_keys_match_merge_rows(tmp_path: Path):
+    base = speech_like(15, seed=20)
+    other = speech_like(15, seed=21)
+    paths = {}
+    for name, y in {"ni": base, "dail_copy": np.roll(base, 2000) * 0.7, "dail_other": other}.items():
+        paths[name] = str(tmp_path / f"{name}.wav")
+        sf.write(paths[name], y, SR)
+
+    fields = ["segment_file", "video_id", "start_sec", "end_sec"]
+    ni_csv, dail_csv = tmp_path / "ni.csv", tmp_path / "dail.csv"
+    pd.DataFrame([[paths["ni"], "nivid", "0", "15"]], columns=fields).assign(dataset="NI").to_csv(ni_csv, index=False)
+    # No dataset column, and one segment listed twice
+    pd.DataFrame(
+        [[paths["dail_copy"], "copyvid", "0", "15"], [paths["dail_other"], "othervid", "0", "15"],
+         [paths["dail_other"], "othervid", "0", "15"]],
+        columns=fields,
+    ).to_csv(dail_csv, index=False)
+
+    rows = load_segments([str(ni_csv), str(dail_csv)])
+    assert rows["video_id"].tolist() == ["nivid", "copyvid", "othervid"]
+
+    report_path = tmp_path / "duplicates.csv"
+    cluster_report(rows, fingerprint_paths(rows["segment_file"], workers=1)).to_csv(report_path, index=False)
+
+    merged, _ = dedupe(ensure_fields(read_rows(str(ni_csv))) + ensure_fields(read_rows(str(dail_csv))))
+    kept, removed = drop_near_duplicates(merged, str(report_path))
+    assert removed == 1
+    assert [r["video_id"] for r in kept] == ["nivid", "othervid"]
+
+
+def test_representative_key_is_never_dropped(tmp_path: Path):
+    report_path = tmp_path / "duplicates.csv"
+    key = {"dataset": "DAIL", "video_id": "v", "start_sec": "0", "end_sec": "15"}
+    pd.DataFrame([{**key, "is_representative": True}, {**key, "is_representative": False}]).to_csv(report_path, index=False)
+
+    kept, removed = drop_near_duplicates([dict(key)], str(report_path))
+    assert (len(kept), removed) == (1, 0)
@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+import soundfile as sf
+
+import librosa
+
+import audio_loader
+from audio_loader import load_audio, load_counts
+
+
+def write(path, sr, channels=1, seconds=1.0):
+    rng = np.random.default_rng(0)
+    shape = (int(sr * seconds), channels) if channels > 1 else int(sr * seconds)
+    sf.write(path, rng.uniform(-0.5, 0.5, shape), sr, subtype="PCM_16")
+    return str(path)
+
+
+def test_matches_librosa_on_every_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_loader, "LOAD_COUNTS", audio_loader.Counter())
+    cases = {
+        "direct": write(tmp_path / "mono.wav", 16000),
+        "downmixed": write(tmp_path / "stereo.wav", 16000, channels=2),
+        "resampled": write(tmp_path / "cd.wav", 44100),
+    }
+    for path in cases.values():
+        y, sr = load_audio(path)
+        ref, ref_sr = librosa.load(path, sr=16000, mono=True)
+        assert sr == ref_sr == 16000
+        assert y.dtype == np.float32
+        np.testing.assert_array_equal(y, ref)
+
+    assert load_counts() == {"direct": 1, "downmixed": 1, "resampled": 1, "fallback": 0}
+
+
+def test_native_rate_and_buffers(tmp_path):
+    path = write(tmp_path / "cd.wav", 44100, channels=2, seconds=0.5)
+
+    y, sr = load_audio(path, sr=None, mono=False)
+    ref, _ = librosa.load(path, sr=None, mono=False)
+    assert sr == 44100 and y.shape == ref.shape == (2, 22050)
+    np.testing.assert_array_equal(y, ref)
+
+    with open(path, "rb") as f:
+        buffer = io.BytesIO(f.read())
+    buffer.seek(100)
+    y, sr = load_audio(buffer, sr=None, mono=True)
+    assert sr == 44100 and y.shape == (22050,)
+
+
+def test_file_like_at_eof_takes_direct_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_loader, "LOAD_COUNTS", audio_loader.Counter())
+    path = write(tmp_path / "mono.wav", 16000)
+    with open(path, "rb") as f:
+        buffer = io.BytesIO(f.read())
+    buffer.seek(0, io.SEEK_END)
+
+    y, sr = load_audio(buffer)
+    np.testing.assert_array_equal(y, librosa.load(path, sr=16000)[0])
+    assert load_counts() == {"direct": 1, "downmixed": 0, "resampled": 0, "fallback": 0}
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import soundfile as sf
+
+from audit_audio import audit_paths, paths_from_index, scan_dirs, summarize
+
+
+def tone(seconds=2.0, sr=16000, amp=0.3, offset=0.0):
+    t = np.arange(int(seconds * sr)) / sr
+    return (amp * np.sin(2 * np.pi * 220 * t) + offset).astype(np.float32)
+
+
+def test_flags_each_problem(tmp_path):
+    clips = {
+        "good.wav": (tone(), 16000, "PCM_16"),
+        "clipped.wav": (np.clip(tone(amp=3.0), -1, 1), 16000, "PCM_16"),
+        "silent.wav": (np.zeros(32000, dtype=np.float32), 16000, "PCM_16"),
+        "dc.wav": (tone(offset=0.1), 16000, "PCM_16"),
+        "cd.wav": (np.stack([tone(sr=44100)] * 2, axis=1), 44100, "PCM_16"),
+        "short.wav": (tone(seconds=0.2), 16000, "PCM_16"),
+    }
+    nan = tone()
+    nan[100:200] = np.nan
+    clips["nan.wav"] = (nan, 16000, "FLOAT")
+
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    for name, (y, sr, subtype) in clips.items():
+        sf.write(sub / name if name == "dc.wav" else tmp_path / name, y, sr, subtype=subtype)
+    (tmp_path / "broken.wav").write_bytes(b"not audio")
+    (tmp_path / "notes.txt").write_text("x")
+
+    paths = scan_dirs([str(tmp_path)]) + [str(tmp_path / "gone.wav")]
+    assert len(paths) == 9
+
+    report = audit_paths(paths, workers=1).set_index("path")
+    flags = {p.rsplit("/", 1)[-1]: f for p, f in report["flags"].items()}
+    assert flags == {
+        "broken.wav": "unreadable",
+        "cd.wav": "samplerate;channels",
+        "clipped.wav": "clipping",
+        "good.wav": "",
+        "nan.wav": "nan",
+        "short.wav": "short",
+        "silent.wav": "silent",
+        "dc.wav": "dc_offset",
+        "gone.wav": "missing",
+    }
+    good = report.loc[str(tmp_path / "good.wav")]
+    assert (good["samplerate"], good["channels"], good["duration_sec"]) == (16000, 1, 2.0)
+    assert summarize(report.reset_index())["clipping"] == 1
+
+    # Same rows in the same order from the process pool
+    parallel = audit_paths(paths * 4, workers=2)
+    assert list(parallel["flags"]) == list(audit_paths(paths * 4, workers=1)["flags"])
+
+
+def test_paths_from_index_prefers_existing_resolved(tmp_path):
+    resolved = tmp_path / "b.wav"
+    resolved.write_bytes(b"RIFF")
+    index = tmp_path / "index.csv"
+    pd.DataFrame({
+        "segment_file": ["/ni/a.wav", "/dail/b.wav", "/dail/c.wav", ""],
+        "segment_file_resolved": ["", str(resolved), "/moved/c.wav", ""],
+    }).to_csv(index, index=False)
+    # A resolved path that does not exist falls back to segment_file, as in training
+    assert paths_from_index(str(index)) == ["/ni/a.wav", str(resolved), "/dail/c.wav"]
@@ -0,0 +1,122 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from cascade_classifier import CascadeClassifier, choose_threshold, make_cheap_model, threshold_report
+from province_model_store import load_province_model, save_province_model
+from train_province_mfcc_baseline import feature_config
+
+
+LABELS = ["Connacht", "Leinster", "Munster", "Ulster"]
+
+
+def make_data(n: int = 200):
+    rng = np.random.default_rng(0)
+    y = np.array([LABELS[i % 4] for i in range(n)], dtype=object)
+    centers = rng.normal(scale=2.0, size=(4, 52))
+    X = centers[[LABELS.index(v) for v in y]] + rng.normal(size=(n, 52))
+    return X.astype(np.float32), y
+
+
+def fit_stages(X, y):
+    cheap = make_cheap_model().fit(X, y)
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    return cheap, forest
+
+
+def test_threshold_zero_never_escalates_and_above_one_always_does():
+    X, y = make_data()
+    cheap, forest = fit_stages(X, y)
+
+    never = CascadeClassifier(cheap, forest, threshold=0.0)
+    np.testing.assert_allclose(never.predict_proba(X), cheap.predict_proba(X))
+    assert never.n_escalated == 0
+
+    always = CascadeClassifier(cheap, forest, threshold=1.01)
+    np.testing.assert_allclose(always.predict_proba(X), forest.predict_proba(X))
+    assert always.n_escalated == len(X)
+
+
+def test_only_low_confidence_rows_are_escalated():
+    X, y = make_data()
+    cheap, forest = fit_stages(X, y)
+    conf = cheap.predict_proba(X).max(axis=1)
+    t = float(np.median(conf))
+
+    cascade = CascadeClassifier(cheap, forest, threshold=t)
+    proba = cascade.predict_proba(X)
+
+    low = conf < t
+    np.testing.assert_allclose(proba[low], forest.predict_proba(X[low]))
+    np.testing.assert_allclose(proba[~low], cheap.predict_proba(X[~low]))
+    assert cascade.n_escalated == int(low.sum())
+
+
+def test_report_and_threshold_choice():
+    y = np.array(["A", "B", "A", "B"], dtype=object)
+    classes = np.array(["A", "B"], dtype=object)
+    # Cheap is right only on its confident rows; forest is always right
+    cheap = np.array([[0.9, 0.1], [0.2, 0.8], [0.45, 0.55], [0.55, 0.45]])
+    forest = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [0.0, 1.0]])
+
+    report = threshold_report(cheap, forest, y, classes, 0.001, 0.010, thresholds=[0.0, 0.6, 1.01])
+
+    assert list(report["accuracy"]) == [0.5, 1.0, 1.0]
+    assert list(report["escalated_fraction"]) == [0.0, 0.5, 1.0]
+    np.testing.assert_allclose(report["avg_latency_ms"], [1.0, 6.0, 11.0])
+    assert choose_threshold(report, max_accuracy_drop=0.0) == 0.6
+    assert choose_threshold(report, max_accuracy_drop=0.5) == 0.0
+
+
+def test_cascade_round_trips_through_model_store(tmp_path: Path):
+    X, y = make_data()
+    cheap, forest = fit_stages(X, y)
+    cascade = CascadeClassifier(cheap, forest, threshold=0.8)
+
+    save_province_model(cascade, list(cascade.classes_), feature_config(), str(tmp_path))
+    loaded, meta = load_province_model(str(tmp_path), expected_config=feature_config())
+
+    assert meta["model_class"] == "CascadeClassifier"
+    np.testing.assert_allclose(loaded.predict_proba(X), cascade.predict_proba(X))
+
+
+def test_saved_cascade_loads_in_a_fresh_process(tmp_path: Path):
+    """
+    Saved the way main() does (with this file not importable under its own
+    name), then loaded by a new interpreter as predict.py would.
+    """
+    here = Path(__file__).resolve().parent
+    save = textwrap.dedent(f"""
+        import runpy, sys
+        import numpy as np
+        sys.path.insert(0, {str(here)!r})
+        from test_cascade_classifier import fit_stages, make_data
+        from province_model_store import PackedForest
+
+        script = runpy.run_path({str(here / "cascade_classifier.py")!r}, run_name="__script__")
+        X, y = make_data()
+        cheap, forest = fit_stages(X, y)
+        forest = PackedForest.from_forest(forest)
+        script["save_cascade"](cheap, forest, 0.8, {str(tmp_path)!r})
+        np.save({str(tmp_path / "expected.npy")!r}, script["CascadeClassifier"](cheap, forest, 0.8).predict_proba(X))
+    """)
+    load = textwrap.dedent(f"""
+        import sys
+        import numpy as np
+        sys.path.insert(0, {str(here)!r})
+        from test_cascade_classifier import make_data
+        from province_model_store import load_province_model
+
+        model, meta = load_province_model({str(tmp_path)!r})
+        assert meta["packed_forest"]["attribute"] == "expensive", meta
+        assert isinstance(model.expensive.value, np.memmap)
+        X, _ = make_data()
+        np.testing.assert_allclose(model.predict_proba(X), np.load({str(tmp_path / "expected.npy")!r}))
+    """)
+    for code in (save, load):
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
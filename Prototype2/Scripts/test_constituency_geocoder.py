@@ -0,0 +1,76 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constituency_geocoder import ConstituencyGeocoder, load_geocoder
+
+
+def square(x0, y0, size=1.0):
+    return [[[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]]
+
+
+def write_boundaries(path: Path, with_province=True):
+    features = []
+    for i, (name, province) in enumerate([("West", "Connacht"), ("East", "Leinster"), ("North", "Ulster")]):
+        x0, y0 = [(-10.0, 53.0), (-9.0, 53.0), (-10.0, 54.0)][i]
+        props = {"constituency": name}
+        if with_province:
+            props["province"] = province
+        features.append({
+            "type": "Feature",
+            "properties": props,
+            "geometry": {"type": "Polygon", "coordinates": square(x0, y0)},
+        })
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    return path
+
+
+def test_single_and_bulk_lookups(tmp_path: Path):
+    geo = ConstituencyGeocoder.from_geojson(str(write_boundaries(tmp_path / "b.geojson")))
+
+    assert geo.lookup(-9.5, 53.5) == ("West", "Connacht")
+    assert geo.lookup(-8.5, 53.2) == ("East", "Leinster")
+
+    constituency, province = geo.label([-9.5, -8.5, -9.5, 0.0, np.nan], [53.5, 53.5, 54.5, 0.0, 53.5])
+    assert list(constituency) == ["West", "East", "North", None, None]
+    assert list(province) == ["Connacht", "Leinster", "Ulster", None, None]
+
+
+def test_border_points_take_first_polygon_and_coast_snaps(tmp_path: Path):
+    geo = ConstituencyGeocoder.from_geojson(str(write_boundaries(tmp_path / "b.geojson")), nearest_max_degrees=0.05)
+
+    # On the West/East border
+    assert geo.lookup(-9.0, 53.5)[0] == "West"
+    # Just off the east coast of East, and far out to sea
+    assert geo.lookup(-7.98, 53.5)[0] == "East"
+    assert geo.lookup(-7.5, 53.5)[0] is None
+
+
+def test_province_mapping_fallback_and_frame(tmp_path: Path):
+    path = write_boundaries(tmp_path / "b.geojson", with_province=False)
+    geo = ConstituencyGeocoder.from_geojson(str(path), province_of={"West": "Connacht"})
+
+    df = pd.DataFrame({"lon": [-9.5, -8.5, "bad"], "lat": [53.5, 53.5, 53.5]})
+    out = geo.label_frame(df)
+
+    assert list(out["constituency"]) == ["West", "East", None]
+    assert list(out["province"]) == ["Connacht", None, None]
+
+
+def test_bulk_matches_single_and_is_fast(tmp_path: Path):
+    geo = load_geocoder(str(write_boundaries(tmp_path / "b.geojson")))
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-10.5, -7.5, 200_000)
+    lat = rng.uniform(52.5, 55.5, 200_000)
+
+    t0 = time.perf_counter()
+    idx = geo.lookup_indices(lon, lat)
+    per_point_us = (time.perf_counter() - t0) / lon.size * 1e6
+
+    for k in range(0, lon.size, 20_000):
+        name = geo.lookup(lon[k], lat[k])[0]
+        assert name == (geo.names[idx[k]] if idx[k] >= 0 else None)
+    assert per_point_us < 50
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import gazetteer
+from gazetteer import centroids_for, normalise_constituency, province_of, provinces_for
+
+
+def test_normalise_handles_fadas_dashes_and_case():
+    assert normalise_constituency("Dún Laoghaire") == "dun laoghaire"
+    assert normalise_constituency("  Carlow – Kilkenny ") == normalise_constituency("Carlow-Kilkenny")
+
+
+def test_province_of_by_edition():
+    assert province_of("Cork North-Central") == "Munster"
+    assert province_of("Laois") == "Leinster"
+    assert province_of("Laois-Offaly") is None
+    assert province_of("Laois–Offaly", edition="2020") == "Leinster"
+    assert province_of("Foyle", edition="ni") == "Ulster"
+    assert province_of(np.nan) is None
+    assert province_of("") is None
+
+
+def test_provinces_for_maps_each_distinct_value_once(monkeypatch):
+    calls = []
+    real = gazetteer.normalise_constituency.__wrapped__
+    monkeypatch.setattr(gazetteer, "normalise_constituency", lambda c: calls.append(c) or real(c))
+
+    col = pd.Series(["Mayo", "Dún Laoghaire", None, "Mayo", "Atlantis"] * 1000, index=range(5000, 10000))
+    out = provinces_for(col)
+
+    assert list(out.iloc[:5]) == ["Connacht", "Leinster", None, "Connacht", None]
+    assert out.index.equals(col.index)
+    assert sorted(calls) == ["Atlantis", "Dún Laoghaire", "Mayo"]
+
+
+def test_centroids_for(tmp_path: Path):
+    csv = tmp_path / "coords.csv"
+    pd.DataFrame({
+        "constituencies": ["Dun Laoghaire", "Mayo"],
+        "x_coordinates": [-6.13, -9.3],
+        "y_coordinates": [53.29, 53.9],
+    }).to_csv(csv, index=False)
+
+    out = centroids_for(pd.Series(["Dún Laoghaire", None, "Mayo", "Atlantis"]), coords_csv=str(csv))
+
+    np.testing.assert_allclose(out["lon"], [-6.13, np.nan, -9.3, np.nan])
+    np.testing.assert_allclose(out["lat"], [53.29, np.nan, 53.9, np.nan])
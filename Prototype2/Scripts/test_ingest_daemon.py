@@ -0,0 +1,211 @@
+import csv
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import ingest_daemon
+from ingest_daemon import Debouncer, FypPipeline, IngestDaemon, InotifyWatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write(path: Path, data: bytes = b"RIFF"):
+    path.write_bytes(data)
+    return str(path)
+
+
+def make_daemon(tmp_path: Path, process_file, clock, **kwargs):
+    batches = []
+    daemon = IngestDaemon(
+        [str(tmp_path / "audio")],
+        process_file,
+        lambda files, outputs: batches.append((files, outputs)),
+        ledger_path=str(tmp_path / "ledger.csv"),
+        debounce_seconds=5.0,
+        polling=True,
+        clock=clock,
+        **kwargs,
+    )
+    return daemon, batches
+
+
+def test_debouncer_waits_for_file_to_settle(tmp_path: Path):
+    clock = FakeClock()
+    d = Debouncer(5.0, clock)
+    path = write(tmp_path / "a.wav")
+
+    d.touch(path)
+    clock.now = 3.0
+    assert d.ready() == []
+
+    write(tmp_path / "a.wav", b"RIFF more bytes")   # still being written
+    clock.now = 6.0
+    assert d.ready() == []
+    clock.now = 11.5
+    assert d.ready() == [path]
+    assert d.ready() == []
+
+
+def test_daemon_processes_only_new_files_and_resumes(tmp_path: Path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    write(audio / "old.wav")
+
+    clock = FakeClock()
+    seen = []
+    daemon, batches = make_daemon(tmp_path, lambda p: seen.append(p) or [p + ".seg"], clock)
+
+    # First start: existing files are baselined, not processed
+    assert daemon.run_once() == []
+
+    new = write(audio / "new.wav")
+    write(audio / "notes.txt")
+    assert daemon.run_once() == []          # not settled yet
+    clock.now = 6.0
+    assert daemon.run_once() == [new]
+    assert seen == [new]
+    assert batches == [([new], [new + ".seg"])]
+    daemon.close()
+
+    # Restart: a file that arrived while stopped is caught up, nothing else
+    later = write(audio / "later.wav")
+    clock = FakeClock()
+    daemon, batches = make_daemon(tmp_path, lambda p: seen.append(p) or [], clock)
+    clock.now = 6.0
+    assert daemon.run_once() == [later]
+    assert seen == [new, later]
+    daemon.close()
+
+    with open(tmp_path / "ledger.csv", newline="") as f:
+        assert {r["path"] for r in csv.DictReader(f)} == {str(audio / "old.wav"), new, later}
+
+
+def test_failures_are_not_recorded_and_concurrency_is_bounded(tmp_path: Path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    clock = FakeClock()
+
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def process(path):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        if path.endswith("bad.wav"):
+            raise ValueError("corrupt")
+        return [path]
+
+    daemon, batches = make_daemon(tmp_path, process, clock, max_workers=2)
+    paths = [write(audio / f"{i}.wav") for i in range(6)]
+    bad = write(audio / "bad.wav")
+    daemon.run_once()
+    clock.now = 6.0
+
+    assert daemon.run_once() == sorted(paths)
+    assert peak[0] == 2
+    assert bad in daemon.failures
+    assert len(batches) == 1
+    daemon.close()
+
+
+def test_failed_batch_is_retried_and_not_ledgered(tmp_path: Path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    clock = FakeClock()
+    seen, batches = [], []
+
+    def finish(files, outputs):
+        batches.append((files, outputs))
+        if len(batches) == 1:
+            raise SystemExit("Missing input file: index.csv")
+
+    daemon = IngestDaemon(
+        [str(audio)],
+        lambda p: seen.append(p) or [p + ".seg"],
+        finish,
+        ledger_path=str(tmp_path / "ledger.csv"),
+        debounce_seconds=5.0,
+        polling=True,
+        clock=clock,
+    )
+    daemon.run_once()
+    new = write(audio / "new.wav")
+    daemon.run_once()
+    clock.now = 6.0
+
+    assert daemon.run_once() == []
+    assert daemon.batch_error.startswith("SystemExit")
+    with open(tmp_path / "ledger.csv", newline="") as f:
+        assert [r["path"] for r in csv.DictReader(f)] == []
+
+    # Next tick retries the batch without processing the file again
+    assert daemon.run_once() == [new]
+    assert seen == [new]
+    assert batches == [([new], [new + ".seg"])] * 2
+    assert daemon.batch_error == ""
+    daemon.close()
+
+
+def test_new_dail_file_reaches_the_merged_index(tmp_path: Path, monkeypatch):
+    import train_province_mfcc_baseline
+
+    def redirect(subdir, module, **paths):
+        mod = ingest_daemon._import_from(subdir, module)
+        for name, value in paths.items():
+            monkeypatch.setattr(mod, name, str(value))
+
+    monkeypatch.setattr(train_province_mfcc_baseline, "FEATURE_CACHE_DIR", str(tmp_path / "cache"))
+    redirect("NorthernIreland/ni_scripts", "trim_ni_segments", OUT_DIR=tmp_path / "segments",
+             LOG_FILE=tmp_path / "trim_log.csv")
+    redirect("Scripts", "merge_ni_and_dail_datasets", NI_PATH=tmp_path / "ni.csv", DAIL_PATH=tmp_path / "dail.csv",
+             OUT_PATH=tmp_path / "all.csv", DUPLICATES_PATH=tmp_path / "none.csv")
+    redirect("Scripts", "add_resolved_paths", IN_PATH=tmp_path / "all.csv", OUT_PATH=tmp_path / "resolved.csv",
+             DAIL_DIR=tmp_path / "dail")
+
+    (tmp_path / "ni.csv").write_text("segment_file,video_id,start_sec,end_sec,dataset\n/ni/a.wav,nivid,0,30,NI\n")
+    meta = tmp_path / "meta"
+    meta.mkdir()
+    (meta / "speaker_master.csv").write_text(
+        "speaker_key,constituency,non_td_role,gender,native_place\nmicheal martin,Cork South-Central,,M,Cork\n"
+    )
+    (meta / "constituency_coordinates.csv").write_text(
+        "constituencies,x_coordinates,y_coordinates\nCork South-Central,-8.47,51.89\n"
+    )
+    (tmp_path / "dail").mkdir()
+    clip = write(tmp_path / "dail" / "abcdefghijk_Micheál Martin - Budget.wav")
+
+    pipeline = FypPipeline(str(tmp_path / "ni_audio"), str(tmp_path / "dail"), str(meta))
+    pipeline.finish_batch([clip], [clip])
+
+    with open(tmp_path / "resolved.csv", newline="", encoding="utf-8") as f:
+        rows = {r["video_id"]: r for r in csv.DictReader(f)}
+    assert set(rows) == {"nivid", "abcdefghijk"}
+    assert rows["abcdefghijk"]["segment_file"] == clip
+    assert rows["abcdefghijk"]["constituency"] == "Cork South-Central"
+    assert rows["abcdefghijk"]["native_province"] == "Munster"
+
+
+def test_inotify_watcher_reports_new_files(tmp_path: Path):
+    pytest.importorskip("watchdog")
+    watcher = InotifyWatcher([str(tmp_path)])
+    try:
+        path = write(tmp_path / "x.wav")
+        deadline = time.time() + 5
+        changes = []
+        while path not in changes and time.time() < deadline:
+            time.sleep(0.05)
+            changes += watcher.changes()
+        assert path in changes
+    finally:
+        watcher.close()
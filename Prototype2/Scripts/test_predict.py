@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from sklearn.ensemble import RandomForestClassifier
+
+from feature_cache import FeatureCache
+from predict import aggregate_by_video, build_scored_frame, extract_features, predict_paths, segments_from_dir
+from train_province_mfcc_baseline import TARGET_SR, feature_config, mfcc_features
+
+
+def write_tone(path: Path, freq: float, seconds: float = 1.0):
+    t = np.arange(int(seconds * TARGET_SR)) / TARGET_SR
+    sf.write(str(path), 0.3 * np.sin(2 * np.pi * freq * t), TARGET_SR)
+
+
+def make_wavs(tmp_path: Path) -> list[Path]:
+    paths = []
+    for i, freq in enumerate([220, 440, 880, 1760]):
+        p = tmp_path / f"clip{i}.wav"
+        write_tone(p, freq)
+        paths.append(p)
+    return paths
+
+
+def test_extract_features_matches_mfcc_features_and_uses_cache(tmp_path: Path):
+    wavs = make_wavs(tmp_path)
+    paths = [str(p) for p in wavs] + [str(tmp_path / "missing.wav")]
+    cache = FeatureCache(str(tmp_path / "cache"), feature_config())
+
+    X, errors = extract_features(paths, cache=cache, jobs=2)
+
+    assert errors[:4] == ["", "", "", ""]
+    assert errors[4].startswith("missing_audio:")
+    np.testing.assert_allclose(X[0], mfcc_features(paths[0]), rtol=1e-5)
+    assert np.isnan(X[4]).all()
+    assert cache.hits == 0
+
+    X2, _ = extract_features(paths, cache=cache, jobs=1)
+    assert cache.hits == 4
+    np.testing.assert_array_equal(X[:4], X2[:4])
+
+
+def test_cache_misses_after_file_changes(tmp_path: Path):
+    wav = tmp_path / "clip.wav"
+    write_tone(wav, 220)
+    cache = FeatureCache(str(tmp_path / "cache"), feature_config())
+
+    extract_features([str(wav)], cache=cache)
+    write_tone(wav, 440, seconds=2.0)
+    extract_features([str(wav)], cache=cache)
+
+    assert cache.hits == 0
+    assert cache.misses == 2
+
+
+def test_score_and_aggregate(tmp_path: Path):
+    make_wavs(tmp_path)
+    segments = segments_from_dir(str(tmp_path))
+    segments["video_id"] = ["A", "A", "B", "B"]
+
+    X, errors = extract_features(list(segments["segment_file"]))
+    labels = ["Connacht", "Leinster", "Munster", "Ulster"]
+    clf = RandomForestClassifier(n_estimators=5, bootstrap=False, random_state=0)
+    clf.fit(X, np.array(labels, dtype=object))
+
+    Path(segments["segment_file"][3]).unlink()
+    probs, errors = predict_paths(clf, labels, list(segments["segment_file"]))
+    scored = build_scored_frame(segments, labels, probs, errors)
+
+    assert list(scored["status"][:3]) == ["ok", "ok", "ok"]
+    assert scored["status"][3].startswith("missing_audio:")
+    assert list(scored["predicted_province"][:3]) == labels[:3]
+    assert scored["predicted_province"][3] == ""
+    assert np.isnan(scored["confidence"][3])
+
+    videos = aggregate_by_video(scored, labels).set_index("video_id")
+    assert videos.loc["A", "n_segments"] == 2
+    assert videos.loc["B", "n_segments"] == 1
+    assert videos.loc["B", "predicted_province"] == "Munster"
+    np.testing.assert_allclose(videos[[f"prob_{l}" for l in labels]].sum(axis=1), 1.0)
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from predict_long_recording import frame_features, window_features, window_starts, window_stats
+from train_province_mfcc_baseline import HOP_LENGTH, TARGET_SR, mfcc_features
+
+
+def test_window_starts_cover_tail_and_short_recordings():
+    assert list(window_starts(100, 40, 30)) == [0, 30, 60]
+    assert list(window_starts(100, 40, 20)) == [0, 20, 40, 60]
+    assert list(window_starts(25, 40, 20)) == [0]
+
+
+def test_window_stats_match_naive_per_window():
+    rng = np.random.default_rng(0)
+    frames = rng.normal(size=(13, 500)).astype(np.float32)
+    starts = window_starts(frames.shape[1], 120, 50)
+
+    means, stds = window_stats(frames, starts, 120)
+
+    for k, s in enumerate(starts):
+        w = frames[:, s:s + 120]
+        np.testing.assert_allclose(means[k], w.mean(axis=1), rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(stds[k], w.std(axis=1), rtol=1e-4, atol=1e-6)
+
+
+def test_window_features_close_to_per_clip_extraction(tmp_path: Path):
+    rng = np.random.default_rng(1)
+    y = (0.1 * rng.normal(size=6 * TARGET_SR)).astype(np.float32)
+
+    # Clip covering seconds 2-4 of the recording
+    clip = tmp_path / "clip.wav"
+    sf.write(str(clip), y[2 * TARGET_SR:4 * TARGET_SR], TARGET_SR, subtype="FLOAT")
+    expected = mfcc_features(str(clip))
+
+    mfcc, delta = frame_features(y)
+    win = 1 + (2 * TARGET_SR) // HOP_LENGTH
+    start = (2 * TARGET_SR) // HOP_LENGTH
+    got = window_features(mfcc, delta, np.array([start]), win)[0]
+
+    assert got.shape == (52,)
+    # Only a handful of edge frames differ (padding/delta context), so stats agree closely
+    np.testing.assert_allclose(got[:26], expected[:26], rtol=0.05, atol=0.5)
@@ -0,0 +1,102 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+import predict
+from prediction_cache import PredictionCache, content_key
+from train_province_mfcc_baseline import TARGET_SR, feature_config
+
+
+LABELS = ["Connacht", "Leinster", "Munster", "Ulster"]
+
+
+def write_noise(path: Path, seed: int, fmt: str = "WAV"):
+    rng = np.random.default_rng(seed)
+    pcm = rng.integers(-3000, 3000, size=TARGET_SR // 2, dtype=np.int16)
+    sf.write(str(path), pcm, TARGET_SR, format=fmt, subtype="PCM_16")
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows_scored = 0
+
+    def predict_proba(self, X):
+        self.rows_scored += len(X)
+        return np.tile([0.1, 0.2, 0.3, 0.4], (len(X), 1))
+
+
+def test_lru_evicts_from_memory_but_disk_survives_restart(tmp_path: Path):
+    db = tmp_path / "preds.sqlite"
+    cache = PredictionCache(str(db), max_memory_entries=2)
+    for k in ["a", "b", "c"]:
+        cache.put(k, [0.25, 0.25, 0.25, 0.25])
+
+    assert list(cache.memory) == ["b", "c"]
+    assert cache.get("a") == [0.25] * 4
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = PredictionCache(str(db))
+    assert reopened.get("c") == [0.25] * 4
+    assert reopened.get("c") == [0.25] * 4
+    assert reopened.get("missing") is None
+    assert reopened.stats()["memory_hits"] == 1
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+
+def test_prune_keeps_most_recently_used(tmp_path: Path):
+    cache = PredictionCache(str(tmp_path / "preds.sqlite"), max_disk_entries=2)
+    for k in ["a", "b", "c"]:
+        cache.put(k, [1.0])
+    cache.prune()
+
+    keys = {r[0] for r in cache.conn.execute("SELECT key FROM predictions")}
+    assert keys == {"b", "c"}
+
+
+def test_keys_depend_on_content_config_and_model(tmp_path: Path):
+    a, copy, other = tmp_path / "a.wav", tmp_path / "copy.wav", tmp_path / "other.wav"
+    write_noise(a, 0)
+    shutil.copy(a, copy)
+    write_noise(other, 1)
+
+    key = content_key(str(a), feature_config(), "v1")
+    assert content_key(str(copy), feature_config(), "v1") == key
+    assert content_key(str(other), feature_config(), "v1") != key
+    assert content_key(str(a), feature_config(), "v2") != key
+    assert content_key(str(a), dict(feature_config(), n_mfcc=20), "v1") != key
+
+
+def test_pcm_mode_matches_across_containers(tmp_path: Path):
+    wav, flac = tmp_path / "clip.wav", tmp_path / "clip.flac"
+    write_noise(wav, 0, "WAV")
+    write_noise(flac, 0, "FLAC")
+
+    assert content_key(str(wav), feature_config(), "v1") != content_key(str(flac), feature_config(), "v1")
+    assert (
+        content_key(str(wav), feature_config(), "v1", mode="pcm")
+        == content_key(str(flac), feature_config(), "v1", mode="pcm")
+    )
+
+
+def test_predict_paths_scores_each_content_once(tmp_path: Path):
+    write_noise(tmp_path / "a.wav", 0)
+    shutil.copy(tmp_path / "a.wav", tmp_path / "a_reupload.wav")
+    write_noise(tmp_path / "b.wav", 1)
+    paths = [str(tmp_path / n) for n in ["a.wav", "a_reupload.wav", "b.wav"]]
+
+    cache = PredictionCache(str(tmp_path / "preds.sqlite"))
+    model = CountingModel()
+
+    probs, errors = predict.predict_paths(model, LABELS, paths, "v1", prediction_cache=cache)
+    assert errors == ["", "", ""]
+    assert model.rows_scored == 2
+    np.testing.assert_allclose(probs[1], [0.1, 0.2, 0.3, 0.4])
+
+    probs2, _ = predict.predict_paths(model, LABELS, paths, "v1", prediction_cache=cache)
+    assert model.rows_scored == 2
+    np.testing.assert_allclose(probs2, probs)
+    assert cache.stats()["memory_hits"] == 3
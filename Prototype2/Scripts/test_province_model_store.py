@@ -0,0 +1,81 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from province_model_store import (
+    LATEST_FILE,
+    PackedForest,
+    load_province_model,
+    read_model_meta,
+    save_province_model,
+)
+from train_province_mfcc_baseline import feature_config
+
+
+def fit_small_model() -> tuple[RandomForestClassifier, np.ndarray]:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(80, 52)).astype(np.float32)
+    y = np.array(["Connacht", "Leinster", "Munster", "Ulster"] * 20, dtype=object)
+    clf = RandomForestClassifier(n_estimators=10, random_state=0)
+    clf.fit(X, y)
+    return clf, X
+
+
+def test_save_and_load_round_trip(tmp_path: Path):
+    clf, X = fit_small_model()
+
+    model_dir = save_province_model(clf, list(clf.classes_), feature_config(), str(tmp_path))
+
+    # Loading the root resolves LATEST to the version just written
+    assert (tmp_path / LATEST_FILE).read_text().strip() == os.path.basename(model_dir)
+
+    loaded, meta = load_province_model(str(tmp_path), expected_config=feature_config())
+    assert meta["labels"] == ["Connacht", "Leinster", "Munster", "Ulster"]
+    assert meta["feature_config"]["n_features"] == 52
+    np.testing.assert_allclose(loaded.predict_proba(X), clf.predict_proba(X))
+
+
+def test_load_memory_maps_packed_forest(tmp_path: Path):
+    clf, X = fit_small_model()
+    save_province_model(clf, list(clf.classes_), feature_config(), str(tmp_path))
+
+    loaded, _ = load_province_model(str(tmp_path), mmap=True)
+    assert isinstance(loaded, PackedForest)
+    assert isinstance(loaded.value, np.memmap)
+    assert list(loaded.predict(X)) == list(clf.predict(X))
+
+
+def test_full_load_returns_original_estimator(tmp_path: Path):
+    clf, X = fit_small_model()
+    save_province_model(clf, list(clf.classes_), feature_config(), str(tmp_path))
+
+    loaded, _ = load_province_model(str(tmp_path), full=True)
+    assert isinstance(loaded, RandomForestClassifier)
+    np.testing.assert_allclose(loaded.predict_proba(X), clf.predict_proba(X))
+
+
+def test_load_rejects_mismatched_feature_config(tmp_path: Path):
+    clf, _ = fit_small_model()
+    save_province_model(clf, list(clf.classes_), feature_config(), str(tmp_path))
+
+    other = dict(feature_config(), hop_length=256)
+    with pytest.raises(ValueError, match="hop_length"):
+        load_province_model(str(tmp_path), expected_config=other)
+
+
+def test_save_rejects_labels_not_matching_model(tmp_path: Path):
+    clf, _ = fit_small_model()
+    with pytest.raises(ValueError):
+        save_province_model(clf, ["Leinster", "Munster"], feature_config(), str(tmp_path))
+
+
+def test_versions_do_not_overwrite_each_other(tmp_path: Path):
+    clf, _ = fit_small_model()
+    first = save_province_model(clf, list(clf.classes_), feature_config(), str(tmp_path))
+    second = save_province_model(clf, list(clf.classes_), feature_config(), str(tmp_path))
+
+    assert first != second
+    assert read_model_meta(str(tmp_path))["version"] == os.path.basename(second)
@@ -0,0 +1,81 @@
+import time
+
+import pandas as pd
+
+from speaker_resolution import (
+    SpeakerIndex,
+    apply_matches,
+    match_key,
+    near_duplicates,
+    resolve_speakers,
+)
+
+MASTER = [
+    "micheál martin",
+    "mary lou mcdonald",
+    "bríd smith",
+    "danny healy-rae",
+    "michael healy-rae",
+    "éamon ó cuív",
+    "richard boyd barrett",
+]
+
+
+def test_match_key_normalises_titles_fadas_and_punctuation():
+    assert match_key("Deputy Micheál Martin") == "micheal martin"
+    assert match_key("Br√≠d Smith") == "brid smith"
+    assert match_key("Danny Healy-Rae") == match_key("danny healy rae")
+
+
+def test_resolve_speakers_match_table():
+    index = SpeakerIndex(MASTER)
+    queries = pd.Series([
+        "micheal martin",          # fada dropped
+        "McDonald Mary Lou",       # reordered
+        "Br√≠d Smith",             # mojibake
+        "richard boyd-barret",     # typo
+        "michael healy rae",       # punctuation, must not pick Danny
+        "leo varadkar",            # not in master
+        "micheal martin",
+        None,
+    ])
+
+    matches = resolve_speakers(queries, index).set_index("query_key")
+
+    assert len(matches) == 6
+    assert matches.loc["micheal martin", "match_key"] == "micheál martin"
+    assert matches.loc["micheal martin", "method"] == "exact"
+    assert matches.loc["McDonald Mary Lou", "match_key"] == "mary lou mcdonald"
+    assert matches.loc["Br√≠d Smith", "match_key"] == "bríd smith"
+    assert matches.loc["richard boyd-barret", "method"] == "fuzzy"
+    assert matches.loc["richard boyd-barret", "match_key"] == "richard boyd barrett"
+    assert matches.loc["michael healy rae", "match_key"] == "michael healy-rae"
+    assert matches.loc["leo varadkar", "method"] == "none"
+    assert pd.isna(matches.loc["leo varadkar", "match_key"])
+
+    resolved = apply_matches(pd.Series(["micheal martin", "leo varadkar"]), matches.reset_index())
+    assert list(resolved) == ["micheál martin", "leo varadkar"]
+
+
+def test_near_duplicates():
+    pairs = near_duplicates(MASTER + ["Deputy Micheal Martin", "richard boyd barret"])
+    found = {frozenset((a, b)) for a, b in zip(pairs["name_a"], pairs["name_b"])}
+
+    assert frozenset(("micheál martin", "Deputy Micheal Martin")) in found
+    assert frozenset(("richard boyd barrett", "richard boyd barret")) in found
+    assert not any("danny healy-rae" in p and "michael healy-rae" in p for p in found)
+
+
+def test_index_limits_comparisons_on_large_lists():
+    master = [f"speaker{i:05d} surname{i % 97:02d}" for i in range(20000)]
+    index = SpeakerIndex(master)
+
+    assert len(index.candidates(match_key("speaker01234 surname21"))) <= 20
+
+    t0 = time.perf_counter()
+    matches = resolve_speakers([f"speaker{i:05d} surnam{i % 97:02d}" for i in range(0, 20000, 40)], index)
+    elapsed = time.perf_counter() - t0
+
+    assert (matches["method"] == "fuzzy").all()
+    assert (matches["match_key"] == [f"speaker{i:05d} surname{i % 97:02d}" for i in range(0, 20000, 40)]).all()
+    assert elapsed < 5.0
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from stream_classifier import StreamingClassifier, StreamingMfccExtractor, iter_wav_chunks
+from train_province_mfcc_baseline import HOP_LENGTH, N_FFT, N_MFCC, TARGET_SR, WIN_LENGTH
+
+
+def offline_frames(y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    mel = librosa.feature.melspectrogram(
+        y=y, sr=TARGET_SR, n_fft=N_FFT, hop_length=HOP_LENGTH, win_length=WIN_LENGTH
+    )
+    mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel, top_db=None), n_mfcc=N_MFCC)
+    return mfcc, librosa.feature.delta(mfcc)
+
+
+def test_streamed_features_match_offline_frames():
+    rng = np.random.default_rng(0)
+    y = (0.1 * rng.normal(size=3 * TARGET_SR)).astype(np.float32)
+
+    ex = StreamingMfccExtractor(window_frames=10_000, top_db=None)
+    # Uneven chunk sizes exercise the carry-over between pushes
+    for chunk in np.array_split(y, [137, 1000, 1001, 20000, 33333]):
+        ex.push(chunk)
+
+    mfcc, delta = offline_frames(y)
+    n = ex.n_frames
+    n_delta = ex.delta_stats.count
+    assert n_delta == n - 4
+
+    got = ex.features()
+    np.testing.assert_allclose(got[:13], mfcc[:, :n].mean(axis=1), rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(got[13:26], mfcc[:, :n].std(axis=1), rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(got[26:39], delta[:, :n_delta].mean(axis=1), rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(got[39:], delta[:, :n_delta].std(axis=1), rtol=1e-4, atol=1e-3)
+
+
+def test_stats_cover_only_the_most_recent_window():
+    rng = np.random.default_rng(1)
+    y = (0.1 * rng.normal(size=2 * TARGET_SR)).astype(np.float32)
+
+    ex = StreamingMfccExtractor(window_frames=50, top_db=None)
+    for chunk in np.array_split(y, 40):
+        ex.push(chunk)
+
+    mfcc, _ = offline_frames(y)
+    n = ex.n_frames
+    np.testing.assert_allclose(ex.features()[:13], mfcc[:, n - 50:n].mean(axis=1), rtol=1e-4, atol=1e-3)
+    assert ex.mfcc_stats.buf.shape[0] == 50
+    assert ex.pending.size < N_FFT
+
+
+class ConstantModel:
+    def predict_proba(self, X):
+        return np.tile([0.1, 0.2, 0.3, 0.4], (len(X), 1))
+
+
+def test_classifier_emits_every_n_frames_from_wav(tmp_path: Path):
+    wav = tmp_path / "live.wav"
+    rng = np.random.default_rng(2)
+    sf.write(str(wav), 0.1 * rng.normal(size=3 * TARGET_SR), TARGET_SR, subtype="PCM_16")
+
+    clf = StreamingClassifier(ConstantModel(), ["Connacht", "Leinster", "Munster", "Ulster"], emit_every=100)
+    preds = []
+    for chunk in iter_wav_chunks(str(wav), chunk_samples=1600):
+        preds.extend(clf.push(chunk))
+
+    # Predictions land on the first chunk boundary past each multiple of 100 frames
+    frames = [p["frame"] for p in preds]
+    assert len(frames) == 2
+    assert 100 <= frames[0] < 110 and 200 <= frames[1] < 210
+    assert preds[-1]["predicted_province"] == "Ulster"
+    assert preds[0]["time_sec"] == frames[0] * HOP_LENGTH / TARGET_SR
@@ -12,6 +12,9 @@ from sklearn.metrics import classification_report, confusion_matrix
 
 import librosa
 
+from audio_loader import load_audio, load_counts
+from feature_cache import FeatureCache
+from province_model_store import save_province_model
 
 DATA_CSV = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/all_segments_index_with_resolved_paths.csv"
 
@@ -39,6 +42,15 @@ N_FFT = 512
 HOP_LENGTH = 160   # 10ms at 16kHz
 WIN_LENGTH = 400   # 25ms at 16kHz
 
+# Order of the blocks in the feature vector built by mfcc_features()
+FEATURE_LAYOUT = ["mfcc_mean", "mfcc_std", "delta_mean", "delta_std"]
+
+# Where the final model is saved (one subdirectory per version)
+MODEL_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/models/province_rf"
+
+# Per-file feature vectors shared with predict.py and the ingest daemon
+FEATURE_CACHE_DIR = "/Users/cianan/Documents/College/GitHub/FYP/Prototype2/feature_cache"
+
 
 def slugify(text: str) -> str:
     text = (text or "").strip().lower()
@@ -94,6 +106,22 @@ def cap_segments_per_speaker(df: pd.DataFrame, cap: int, seed: int) -> pd.DataFr
     return df.loc[sorted(kept_rows)].copy()
 
 
+def feature_config() -> dict:
+    """
+    Feature settings a saved model depends on. Stored with the model and
+    checked again at load time, so a model is never scored on different features.
+    """
+    return {
+        "target_sr": TARGET_SR,
+        "n_mfcc": N_MFCC,
+        "n_fft": N_FFT,
+        "hop_length": HOP_LENGTH,
+        "win_length": WIN_LENGTH,
+        "layout": FEATURE_LAYOUT,
+        "n_features": len(FEATURE_LAYOUT) * N_MFCC,
+    }
+
+
 def mfcc_features(path: str) -> np.ndarray:
     """
     Extract MFCC-based features from one audio file.
@@ -105,7 +133,7 @@ def mfcc_features(path: str) -> np.ndarray:
       - Delta std  (13)
     Total length: 52
     """
-    y, sr = librosa.load(path, sr=TARGET_SR, mono=True)
+    y, sr = load_audio(path, sr=TARGET_SR)
 
     # Guard: very short clips can cause FFT issues
     if y.size < WIN_LENGTH:
@@ -135,10 +163,11 @@ def mfcc_features(path: str) -> np.ndarray:
     return feats.astype(np.float32)
 
 
-def build_feature_matrix(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+def build_feature_matrix(df: pd.DataFrame, cache=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
     """
     Build X, y, groups arrays from the dataframe.
     Skips rows with missing labels or missing audio paths.
+    With a FeatureCache, cached vectors are reused and new ones stored.
     Returns:
       X: (n_samples, 52)
       y: (n_samples,)
@@ -161,11 +190,15 @@ def build_feature_matrix(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.n
             bad.append(f"{i}:missing_audio:{audio_path}")
             continue
 
-        try:
-            x = mfcc_features(audio_path)
-        except Exception as e:
-            bad.append(f"{i}:mfcc_error:{e}")
-            continue
+        x = cache.get(audio_path) if cache is not None else None
+        if x is None:
+            try:
+                x = mfcc_features(audio_path)
+            except Exception as e:
+                bad.append(f"{i}:mfcc_error:{e}")
+                continue
+            if cache is not None:
+                cache.put(audio_path, x)
 
         X_list.append(x)
         y_list.append(label)
@@ -178,8 +211,21 @@ def build_feature_matrix(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.n
     return X, y, groups, bad
 
 
-def main():
-    df = pd.read_csv(DATA_CSV, encoding="utf-8-sig")
+def make_forest() -> RandomForestClassifier:
+    return RandomForestClassifier(
+        n_estimators=400,
+        random_state=RANDOM_SEED,
+        n_jobs=-1,
+        class_weight="balanced_subsample",
+    )
+
+
+def load_training_frame(data_csv: str = DATA_CSV) -> pd.DataFrame:
+    """
+    Read the segment index and apply the training filters:
+    speaker key, 4 main provinces only, capped segments per speaker.
+    """
+    df = pd.read_csv(data_csv, encoding="utf-8-sig")
 
     # Ensure speaker key for grouped splits (prevents speaker leakage)
     df = ensure_speaker_key(df)
@@ -193,13 +239,21 @@ def main():
 
     # Cap segments per speaker to reduce dominance
     df = cap_segments_per_speaker(df, cap=MAX_SEGMENTS_PER_SPEAKER, seed=RANDOM_SEED)
+    return df
+
+
+def main():
+    df = load_training_frame(DATA_CSV)
 
-    # Build features
-    X, y, groups, bad = build_feature_matrix(df)
+    # Build features (recordings already seen by predict.py / the ingest daemon come from the cache)
+    cache = FeatureCache(FEATURE_CACHE_DIR, feature_config())
+    X, y, groups, bad = build_feature_matrix(df, cache=cache)
 
     print("Rows after province filter + cap:", len(df))
     print("Feature matrix shape:", X.shape)
     print("Bad rows skipped:", len(bad))
+    print(f"Feature cache: {cache.hits} hits, {cache.misses} misses")
+    print("Audio loads:", load_counts())
     if bad:
         print("First 10 bad rows:", bad[:10])
 
@@ -214,12 +268,7 @@ def main():
     y_true_all: List[str] = []
     y_pred_all: List[str] = []
 
-    clf = RandomForestClassifier(
-        n_estimators=400,
-        random_state=RANDOM_SEED,
-        n_jobs=-1,
-        class_weight="balanced_subsample",
-    )
+    clf = make_forest()
 
     for fold, (train_idx, test_idx) in enumerate(gkf.split(X, y, groups), start=1):
         X_train, X_test = X[train_idx], X[test_idx]
@@ -243,6 +292,16 @@ def main():
     print(labels)
     print(confusion_matrix(y_true_all, y_pred_all, labels=labels))
 
+    # Refit on all rows and save the final model for downstream prediction
+    clf.fit(X, y)
+    model_dir = save_province_model(
+        clf,
+        labels=list(clf.classes_),
+        feature_config=feature_config(),
+        model_root=MODEL_DIR,
+    )
+    print("\nSaved final model:", model_dir)
+
 
 if __name__ == "__main__":
     main()